@@ -0,0 +1,61 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Per bar cost of reading the current candle.
+
+Compare the former `FlexArray.current` implementation, building a new dict
+over every column on each call, with the reusable `Row` accessor.
+
+Run with:
+
+    $ PYTHONPATH=src python benchmarks/bench_current.py
+"""
+
+import timeit
+
+import numpy as np
+
+import pandas as pd
+
+from mercury.lib import FlexArray
+
+BARS = 1_000_000
+READS = 3  # typical number of `current` calls per bar (engine + strategy)
+
+
+def legacy_current(array: FlexArray) -> dict:
+    """Former implementation of `FlexArray.current`."""
+    values = {key: data[array._cursor - 1]
+              for key, data in array._data.items()}
+    index = values.pop("index")
+    values[array._index_name] = pd.Timestamp(index)
+    return values
+
+
+def main() -> None:
+    """Run the benchmark."""
+    size = 1000
+    dataframe = pd.DataFrame(
+        {column: np.random.uniform(0.8, 1.0, size)
+         for column in ("open", "high", "low", "close", "volume")},
+        index=pd.date_range("2020-01-01", periods=size, freq="T",
+                            name="date"))
+    array = FlexArray(dataframe)
+    loops = 100_000
+
+    def run_legacy() -> None:
+        for _ in range(READS):
+            legacy_current(array)["close"]
+
+    def run_row() -> None:
+        for _ in range(READS):
+            array.current["close"]
+
+    for name, func in (("dict", run_legacy), ("row", run_row)):
+        elapsed = min(timeit.repeat(func, number=loops, repeat=3))
+        print(f"{name:>5}: {elapsed / loops * BARS:8.2f}s per million bars")
+
+
+if __name__ == "__main__":
+    main()
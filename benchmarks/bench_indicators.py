@@ -0,0 +1,82 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Cost of the `mercury.indicators` kernels compared to TA-Lib.
+
+For each indicator, time the numpy batch kernel, the TA-Lib function when
+available (`pip install materya-mercury[bench]`) and the streaming
+updater per bar, and report the largest difference with TA-Lib values
+once both are out of their warmup.
+
+Run with:
+
+    $ PYTHONPATH=src python benchmarks/bench_indicators.py
+"""
+
+import timeit
+
+import numpy as np
+
+from mercury.indicators import (ATR, EMA, MAX, MIN, RSI, SMA, STDDEV, STOCH,
+                                WMA)
+
+try:
+    import talib
+except ImportError:
+    talib = None
+
+BARS = 100_000
+
+KERNELS = [
+    (SMA(30), "SMA", {"timeperiod": 30}),
+    (EMA(30), "EMA", {"timeperiod": 30}),
+    (WMA(30), "WMA", {"timeperiod": 30}),
+    (RSI(14), "RSI", {"timeperiod": 14}),
+    (ATR(14), "ATR", {"timeperiod": 14}),
+    (STDDEV(20), "STDDEV", {"timeperiod": 20}),
+    (MAX(20), "MAX", {"timeperiod": 20}),
+    (MIN(20), "MIN", {"timeperiod": 20}),
+    (STOCH(5, 3), "STOCH", {"fastk_period": 5, "slowk_period": 3,
+                            "slowd_period": 3}),
+]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    random = np.random.RandomState(0)
+    close = 1.1 + np.cumsum(random.normal(0, 0.001, BARS))
+    spread = np.abs(random.normal(0, 0.0005, (2, BARS)))
+    prices = {"high": close + spread[0], "low": close - spread[1],
+              "close": close}
+
+    print(f"{'':>8} {'batch':>10} {'talib':>10} {'stream':>12} {'diff':>10}")
+    for kernel, name, params in KERNELS:
+        values = [prices[column] for column in kernel.columns]
+        batch = min(timeit.repeat(lambda: kernel.batch(*values),
+                                  number=10, repeat=3)) / 10
+
+        stream = kernel.clone()
+        bars = list(zip(*values))
+        start = timeit.default_timer()
+        for bar in bars:
+            stream.update(*bar)
+        per_bar = (timeit.default_timer() - start) / BARS
+
+        reference, diff = float("NaN"), float("NaN")
+        if talib is not None:
+            func = getattr(talib, name)
+            reference = min(timeit.repeat(lambda: func(*values, **params),
+                                          number=10, repeat=3)) / 10
+            expected = func(*values, **params)
+            if isinstance(expected, tuple):
+                expected = expected[0]
+            diff = np.nanmax(np.abs(kernel.batch(*values)[200:] -
+                                    expected[200:]))
+
+        print(f"{name:>8} {batch * 1e3:8.2f}ms {reference * 1e3:8.2f}ms "
+              f"{per_bar * 1e6:8.2f}us/bar {diff:10.2e}")
+
+
+if __name__ == "__main__":
+    main()
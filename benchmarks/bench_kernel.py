@@ -0,0 +1,107 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Throughput of the backtest kernel compared to the bar per bar loop.
+
+Backtest a SMA crossover over a random walk four ways: stepping the
+strategy with `Simulator.run` (indicators precomputed), running its signals
+with a stop loss through the kernel loop as plain Python and compiled with
+numba when available (`pip install materya-mercury[jit]`), and running its
+plain signals through the vectorized kernel. Report the bars processed per
+second of each.
+
+Run with:
+
+    $ PYTHONPATH=src python benchmarks/bench_kernel.py
+"""
+
+import time
+
+import numpy as np
+
+from mercury import Parameter, Strategy, Timeframe, Timeseries
+from mercury.backtest import Simulator, simulate
+from mercury.backtest.kernel import JIT
+from mercury.indicators import SMA
+from mercury.lib import Datastore, crossover, crossover_mask, crossunder_mask
+
+SIZES = {"run": 100_000, "python": 1_000_000, "jit": 10_000_000,
+         "vectorized": 10_000_000}
+
+
+class NullDatastore(Datastore):
+    """Datastore required by the Simulator, unused."""
+
+    def _connect(self) -> None:
+        pass
+
+    def store(self, name: str, data: object, metadata: dict = None) -> None:
+        pass
+
+    def append(self, name: str, data: object) -> None:
+        pass
+
+    def get(self, name: str) -> None:
+        pass
+
+
+class Crossover(Strategy):
+    """SMA crossover, both bar per bar and as array rules."""
+    fast = Parameter(10)
+    slow = Parameter(30)
+    stop_loss = Parameter(0.0)
+
+    def setup(self) -> None:
+        """Add the averages."""
+        self.add_indicator(SMA(self.fast).indicator("sma_fast"))
+        self.add_indicator(SMA(self.slow).indicator("sma_slow"))
+
+    def tick(self) -> None:
+        """Check the crossover on the current bar."""
+        crossover(self.sma_fast, self.sma_slow)
+
+    def signals(self) -> dict:
+        """Return the crossover masks."""
+        return {"entries": crossover_mask(self.sma_fast, self.sma_slow),
+                "exits": crossunder_mask(self.sma_fast, self.sma_slow),
+                "stop_loss": self.stop_loss}
+
+
+def timeseries(bars: int) -> Timeseries:
+    """Return a random walk of close prices."""
+    random = np.random.RandomState(0)
+    return Timeseries.from_arrays("EURUSD", Timeframe.M1, {
+        "date": np.arange(bars).astype("datetime64[m]"),
+        "close": 1.1 + np.cumsum(random.normal(0, 0.001, bars)),
+    })
+
+
+def measure(mode: str) -> float:
+    """Return the bars per second of a backtest mode."""
+    bars = SIZES[mode]
+    simulator = Simulator(Crossover, datastore=NullDatastore(),
+                          timeseries=timeseries(bars), precompute=True)
+    if mode == "jit":
+        simulate(np.ones(2), np.ones(2), np.ones(2), stop_loss=1)  # compile
+    start = time.perf_counter()
+    if mode == "run":
+        simulator.run()
+    elif mode == "vectorized":
+        simulator.simulate()
+    else:
+        simulator.simulate(jit=mode == "jit", stop_loss=0.01)
+    return bars / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    modes = ["run", "python"] + (["jit"] if JIT else []) + ["vectorized"]
+    results = {mode: measure(mode) for mode in modes}
+    for mode, speed in results.items():
+        print(f"{mode:>10} {SIZES[mode]:>12,} bars {speed:>14,.0f} bars/s "
+              f"x{speed / results['run']:>8,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Scaling of `Simulator.optimize` with the number of worker processes.
+
+Sweep a SMA crossover strategy over a parameters grid on a random walk with
+1, 2, 4... workers up to the number of cores, and report the runs per
+second and the speedup over a single process, then compare a random search
+pruned by successive halving with the exhaustive sweep of a larger grid.
+
+Run with:
+
+    $ PYTHONPATH=src python benchmarks/bench_optimize.py
+"""
+
+import os
+import time
+
+import numpy as np
+
+from mercury import OrderAction, Parameter, Strategy, Timeframe, Timeseries
+from mercury.backtest import Simulator
+from mercury.indicators import SMA
+from mercury.lib import Datastore
+
+BARS = 20_000
+GRID = {"fast": range(5, 25, 5), "slow": range(30, 110, 10)}
+LARGE_GRID = {"fast": range(2, 30), "slow": range(30, 120, 5)}
+SAMPLES = 81
+
+
+class NullDatastore(Datastore):
+    """Datastore required by the Simulator, unused."""
+
+    def _connect(self) -> None:
+        pass
+
+    def store(self, name: str, data: object, metadata: dict = None) -> None:
+        pass
+
+    def append(self, name: str, data: object) -> None:
+        pass
+
+    def get(self, name: str) -> None:
+        pass
+
+
+class Crossover(Strategy):
+    """SMA crossover trading through the backtest broker."""
+    fast = Parameter(10)
+    slow = Parameter(30)
+
+    def setup(self) -> None:
+        """Add the averages."""
+        self.add_indicator(SMA(self.fast).indicator("sma_fast"))
+        self.add_indicator(SMA(self.slow).indicator("sma_slow"))
+
+    def tick(self) -> None:
+        """Hold a long position while the fast average is above."""
+        above = float(self.sma_fast) > float(self.sma_slow)
+        if self.broker.positions:
+            if not above:
+                self.broker.close(self.broker.positions[0], None)
+        elif above:
+            self.broker._api_submit_order(OrderAction.BUY, 1,
+                                          instrument="EURUSD")
+
+
+def balance(strategy: Strategy) -> float:
+    """Return the final balance of a run."""
+    return strategy.broker.account.balance
+
+
+def main() -> None:
+    """Run the benchmark."""
+    random = np.random.RandomState(0)
+    timeseries = Timeseries.from_arrays("EURUSD", Timeframe.M1, {
+        "date": np.arange(BARS).astype("datetime64[m]"),
+        "close": 1.1 + np.cumsum(random.normal(0, 0.001, BARS)),
+    })
+    simulator = Simulator(Crossover, datastore=NullDatastore(),
+                          timeseries=timeseries, precompute=True)
+    runs = len(GRID["fast"]) * len(GRID["slow"])
+
+    workers, reference = 1, None
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        for _ in simulator.optimize(workers=workers, evaluate=balance,
+                                    **GRID):
+            pass
+        speed = runs / (time.perf_counter() - start)
+        reference = reference or speed
+        print(f"{workers:>4} workers {speed:>10,.1f} runs/s "
+              f"x{speed / reference:>6.2f}")
+        workers *= 2
+
+    for label, options in (("exhaustive", {}),
+                           ("halving", {"halving": 3})):
+        start = time.perf_counter()
+        best = max(outcome for _, outcome in simulator.optimize(
+            evaluate=balance, samples=SAMPLES, seed=0, **options,
+            **LARGE_GRID))
+        print(f"{label:>10} {SAMPLES} samples "
+              f"{time.perf_counter() - start:>8.2f} s best {best:,.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -41,7 +41,6 @@ if __name__ == "__main__":
         install_requires=[
             "numpy==1.20.1",
             "pandas==1.2.2",
-            "ta-lib==0.4.19",
             "websockets",
         ],
         extras_require={
@@ -51,10 +50,16 @@ if __name__ == "__main__":
                 "pandas-stubs",
                 "twine",
             ],
+            "bench": [
+                "ta-lib==0.4.19",
+            ],
             "doc": [
                 "pdoc3",
             ],
             "extras": extras,
+            "jit": [
+                "numba",
+            ],
             "test": [
                 "flake8-annotations-coverage",
                 "flake8-bandit",
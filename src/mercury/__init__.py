@@ -15,16 +15,20 @@ from .core import (
     Broker,
     CurrencyCode,
     Engine,
+    Feed,
     Indicator,
     Order,
     OrderAction,
     OrderStatus,
     OrderType,
+    Panel,
+    Parameter,
     Position,
     PositionStatus,
     PositionType,
     PriceType,
     Strategy,
+    TickAggregator,
     Timeframe,
     Timeseries,
 )
@@ -44,16 +48,20 @@ __all__ = [
     "Broker",
     "CurrencyCode",
     "Engine",
+    "Feed",
     "Indicator",
     "Order",
     "OrderAction",
     "OrderStatus",
     "OrderType",
+    "Panel",
+    "Parameter",
     "Position",
     "PositionStatus",
     "PositionType",
     "PriceType",
     "Strategy",
+    "TickAggregator",
     "Timeframe",
     "Timeseries",
 ]
@@ -7,8 +7,16 @@
 __copyright__ = "Copyright 2019 - 2021 Richard Kemp"
 __revision__ = "$Id$"
 __all__ = [
+    "BacktestBroker",
+    "KernelResult",
     "Simulator",
+    "WalkForward",
+    "WalkForwardResult",
+    "simulate",
 ]
 
 
+from .broker import BacktestBroker
+from .kernel import KernelResult, simulate
 from .simulator import Simulator
+from .walkforward import WalkForward, WalkForwardResult
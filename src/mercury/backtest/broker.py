@@ -13,58 +13,317 @@ __all__ = [
     "BacktestBroker",
 ]
 
-from .. import Broker
-# from ..lib import InstrumentCandles
+import bisect
+import itertools
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
 
+from .. import (Account, Broker, CurrencyCode, Order, OrderAction, Position,
+                PositionStatus, PositionType, PriceType, Timeframe,
+                Timeseries)
+from ..lib import BaseClass, Client
 
-class MockBrokerApi():
-    """Mock of a broker API class for backtesting simulation."""
-    def __init__(self, token) -> None:
-        super().__init__()
-        self.token = token
+_BUYS = (OrderAction.BUY, OrderAction.BUY_LIMIT, OrderAction.BUY_STOP)
 
-    def set_orders(self) -> dict:
-        """Get opened orders."""
-        return {}
+# Pending orders reached when the price rises up to them, the others being
+# reached when the price falls down to them.
+_RISING = (OrderAction.BUY_STOP, OrderAction.SELL_LIMIT)
 
-    def get_orders(self) -> dict:
-        """Get opened orders."""
-        return {}
+# Exit kinds, in the order they are processed within a bar.
+_STOP_LOSS, _TAKE_PROFIT, _FILL = range(3)
+
+
+class _Book(BaseClass):
+    """Pending prices of an instrument sorted for O(log n) triggering.
+
+    A rising book holds prices reached when the market rises up to them
+    (e.g. buy stops), a falling book the ones reached when it falls down to
+    them (e.g. buy limits). The prices reached by a bar are then a prefix
+    (rising) or a suffix (falling) of the sorted prices, found by bisection
+    without scanning the entries not reached.
+    """
+    def __init__(self, rising: bool) -> None:
+        """Class Initializer."""
+        self.rising = rising
+        self._keys: List[Tuple[float, int]] = []
+        self._entries: List[Tuple[int, Any]] = []
+
+    def __len__(self) -> int:
+        """Override __len__."""
+        return len(self._keys)
+
+    def add(self, key: Tuple[float, int], kind: int, target: Any) -> None:
+        """Insert an entry under a `(price, sequence)` key."""
+        position = bisect.bisect(self._keys, key)
+        self._keys.insert(position, key)
+        self._entries.insert(position, (kind, target))
+
+    def remove(self, key: Tuple[float, int]) -> None:
+        """Remove the entry of a key, if still there."""
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+            del self._entries[position]
+
+    def pop(self, low: float, high: float) -> List[Tuple[float, int, Any]]:
+        """Remove and return the `(price, kind, target)` reached by a bar."""
+        if self.rising:
+            position = bisect.bisect_right(self._keys, (high, float("inf")))
+            reached = slice(0, position)
+        else:
+            position = bisect.bisect_left(self._keys, (low,))
+            reached = slice(position, None)
+        triggered = [(key[0], kind, target) for key, (kind, target)
+                     in zip(self._keys[reached], self._entries[reached])]
+        del self._keys[reached]
+        del self._entries[reached]
+        return triggered
+
+
+class BacktestClient(Client):
+    """Client of the backtest broker, no remote end to talk to."""
+    def connect(self) -> None:
+        """Nothing to connect to."""
+
+    def request(self, payload: Any, *, endpoint: str = None) -> Any:
+        """Return the payload as is."""
+        return payload
 
 
 class BacktestBroker(Broker):
-    """Dummy Broker for backtesting."""
-    def __init__(self, account) -> None:
-        """Initialize."""
+    """In-memory broker filling orders against historical bars.
+
+    Prices are read from the timeseries `attach`ed to the broker, under
+    their cursor, so the broker follows a `mercury.backtest.Simulator` run
+    (which attaches its timeseries and calls `match` on each bar).
+
+    Market orders and position closes are filled at once at the close of
+    the current bar, the ask price being `spread` above it. Limit and stop
+    orders, as well as positions stop loss and take profit, are filled on a
+    later bar reaching their price, at that price or at the bar open when
+    it gaps beyond. Bars reaching both the stop loss and the take profit of
+    a position close it at the stop loss.
+
+    Pending prices are kept sorted per instrument, so checking which ones a
+    bar reaches costs O(log n) whatever the number of pending orders.
+
+    Attributes:
+        spread (float): difference between the ask and the bid (close)
+            prices.
+        history (list): closed positions.
+        orders (dict): pending orders by id.
+    """
+    def __init__(self, account: Account = None, *,
+                 spread: float = 0.0) -> None:
+        """Class Initializer.
+
+        Args:
+            account: account to trade with, a 10000 EUR cash account by
+                default. Its balance follows the closed positions profit.
+            spread: difference between the ask and the bid prices.
+        """
+        self._account = account or Account(currency=CurrencyCode.EUR.value,
+                                           balance=10000.0)
+        self.spread = spread
+        self._timeseries: Dict[str, Timeseries] = {}
         super().__init__("BacktestBroker")
-        self.account = account
-
-    # def fees(self):
-    #     return 0
-
-    # def _connect(self):
-    #     return MockBrokerAPI("dummy_token")
-
-    # def get_account(self, account_id: str) -> Account:
-    #     return self.account
-
-    # def get_candles(self, instrument: str,
-    # params: dict) -> InstrumentCandles:
-    #     data = {
-    #         "open": [1, 2, 3, 4, 5],
-    #         "high": [1, 2, 3, 4, 5],
-    #         "low": [1, 2, 3, 4, 5],
-    #         "close": [1, 2, 3, 4, 5],
-    #     }
-    #     return InstrumentCandles(instrument=instrument, timeframe="H1",
-    #                              dataframe=pd.DataFrame(data))
-
-    # def get_positions(self, *args):
-    #     return []
-
-    # def open_position(self, direction: TradeType, size: int,
-    #                   ptype: OrderType, *, level: float = None,
-    #                   sl: float = None, tp: float = None) -> None:
-    #     position = Position(size, datetime.datetime.now(), broker=self,
-    #                         direction=direction, sl=sl, tp=tp)
-    #     self._positions.append(position)
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop every position and order, restoring the account capital."""
+        self._positions = []
+        self.history: List[Position] = []
+        self.orders: Dict[str, Order] = {}
+        self._books: Dict[str, Tuple[_Book, _Book]] = {}
+        self._keys: Dict[str, list] = {}
+        self._sequence = itertools.count()
+        self.account.balance = self.account.capital
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave the market data and trading state out when pickled."""
+        state = dict(vars(self))
+        state["_timeseries"] = {}
+        del state["_sequence"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled broker with a fresh trading state."""
+        vars(self).update(state)
+        self.reset()
+
+    def attach(self, timeseries: Timeseries) -> None:
+        """Use a timeseries as the market of its instrument."""
+        self._timeseries[timeseries.instrument] = timeseries
+
+    @property
+    def _client(self) -> Client:
+        return BacktestClient()
+
+    def _api_fees(self) -> float:
+        return 0.0
+
+    def _api_auth(self) -> None:
+        pass
+
+    def _api_get_account(self, account_id: str = None) -> Account:
+        return self._account
+
+    def _render_order(self, raw: dict) -> Order:
+        return Order(OrderAction(raw["action"]), raw["price"], raw["volume"],
+                     instrument=raw["instrument"], or_id=raw.get("id"),
+                     sl=raw.get("sl"), tp=raw.get("tp"), raw=raw)
+
+    def _render_position(self, raw: dict) -> Position:
+        return Position(PositionType(raw["type"]), raw["volume"],
+                        instrument=raw["instrument"], pos_id=raw.get("id"),
+                        open_price=raw["open_price"],
+                        open_date=raw.get("open_date"),
+                        sl=raw.get("sl"), tp=raw.get("tp"), raw=raw)
+
+    def _api_get_candles(self, instrument: str, timeframe: Timeframe, *,
+                         start_date: datetime, end_date: datetime = None,
+                         **kwargs) -> Timeseries:
+        candles = self._timeseries[instrument].between(start_date, end_date)
+        if timeframe is not candles.timeframe:
+            candles = candles.resample(timeframe)
+        return candles
+
+    def _api_get_market_price(self, instrument: str,
+                              price_type: PriceType) -> float:
+        close = float(self._timeseries[instrument].current["close"])
+        return (close + self.spread if price_type is PriceType.ASK else
+                close + self.spread / 2 if price_type is PriceType.LAST else
+                close)
+
+    def _api_submit_order(self, action: OrderAction, size: int, *,
+                          price: float = None, currency: CurrencyCode = None,
+                          instrument: str = None,
+                          sl: float = None, tp: float = None) -> str:
+        order = Order(action, price, size, instrument=instrument,
+                      or_id=str(next(self._sequence)),
+                      creation_date=self._date(instrument), sl=sl, tp=tp)
+        if action in (OrderAction.BUY, OrderAction.SELL):
+            price = self._api_get_market_price(
+                instrument, PriceType.ASK if action is OrderAction.BUY
+                else PriceType.BID)
+            self._open(order, price)
+        else:
+            self.orders[order.id] = order
+            self._push(instrument, price, _FILL, order,
+                       action in _RISING)
+        self.__logger.debug(f"submitted order {order.id} {action.name}")
+        return order.id
+
+    def _api_get_positions(self, *args,
+                           status: PositionStatus = None) -> List[Position]:
+        if status is PositionStatus.OPENED:
+            return list(self._positions)
+        if status is PositionStatus.CLOSED:
+            return list(self.history)
+        return self.history + self._positions
+
+    def _api_close_position(self, position: Position,
+                            level: float = None) -> bool:
+        if position.status is not PositionStatus.OPENED:
+            return False
+        price = self._api_get_market_price(
+            position.instrument, PriceType.ASK
+            if position.type is PositionType.SELL else PriceType.BID)
+        self._close(position, price)
+        return True
+
+    def cancel_order(self, order_id: str) -> None:
+        """Cancel a pending order.
+
+        Raises:
+            KeyError: no pending order with this id.
+        """
+        order = self.orders.pop(order_id)
+        for book, key in self._keys.pop(order.id):
+            book.remove(key)
+
+    def match(self) -> None:
+        """Fill the pending orders and exits reached by the current bar.
+
+        Stop losses are processed first, then take profits, then pending
+        orders. Positions opened by a pending order get their exits checked
+        from the next bar on.
+        """
+        for instrument, books in self._books.items():
+            if not (books[0] or books[1]):
+                continue
+            timeseries = self._timeseries[instrument]
+            bar = timeseries.current
+            close = bar["close"]
+            low, high = bar.get("low", close), bar.get("high", close)
+            opening = bar.get("open")
+            triggered = books[0].pop(low, high) + books[1].pop(low, high)
+            triggered.sort(key=lambda entry: entry[1])
+            for price, kind, target in triggered:
+                price = self._fill_price(price, opening, target, kind)
+                if kind == _FILL:
+                    self._fill(target, price)
+                elif target.status is PositionStatus.OPENED:
+                    self._close(target, price)
+
+    def _fill_price(self, price: float, opening: float, target: Any,
+                    kind: int) -> float:
+        """Return the price a pending price is filled at, gaps included."""
+        if opening is None:
+            return price
+        rising = (target.action in _RISING if kind == _FILL else
+                  (target.type is PositionType.BUY) == (kind == _TAKE_PROFIT))
+        return max(price, opening) if rising else min(price, opening)
+
+    def _date(self, instrument: str) -> datetime:
+        """Return the date of the current bar of an instrument."""
+        timeseries = self._timeseries.get(instrument)
+        return timeseries.current["date"] if timeseries else None
+
+    def _push(self, instrument: str, price: float, kind: int, target: Any,
+              rising: bool) -> None:
+        """Add a pending price in the books of an instrument."""
+        books = self._books.get(instrument)
+        if books is None:
+            books = self._books[instrument] = (_Book(True), _Book(False))
+        book = books[0] if rising else books[1]
+        key = (price, next(self._sequence))
+        book.add(key, kind, target)
+        self._keys.setdefault(target.id, []).append((book, key))
+
+    def _fill(self, order: Order, price: float) -> None:
+        """Fill a pending order."""
+        del self.orders[order.id]
+        self._keys.pop(order.id, None)
+        self._open(order, price)
+
+    def _open(self, order: Order, price: float) -> None:
+        """Open the position of a filled order."""
+        buy = order.action in _BUYS
+        position = Position(PositionType.BUY if buy else PositionType.SELL,
+                            order.volume, instrument=order.instrument,
+                            pos_id=str(next(self._sequence)),
+                            reference_order_id=order.id, open_price=price,
+                            open_date=self._date(order.instrument),
+                            sl=order.sl, tp=order.tp)
+        self._positions.append(position)
+        if position.sl:
+            self._push(position.instrument, position.sl, _STOP_LOSS,
+                       position, not buy)
+        if position.tp:
+            self._push(position.instrument, position.tp, _TAKE_PROFIT,
+                       position, buy)
+
+    def _close(self, position: Position, price: float) -> None:
+        """Close an open position and book its profit."""
+        for book, key in self._keys.pop(position.id, ()):
+            book.remove(key)
+        sign = 1 if position.type is PositionType.BUY else -1
+        position.profit = (price - position.open_price) * position.volume * \
+            sign
+        position.close_price = price
+        position.close_date = self._date(position.instrument)
+        position.status = PositionStatus.CLOSED
+        self._positions.remove(position)
+        self.history.append(position)
+        self.account.balance += position.profit
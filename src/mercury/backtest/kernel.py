@@ -0,0 +1,266 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Backtest Kernel Module.
+
+Provide:
+    - simulate function
+    - KernelResult Class
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "JIT",
+    "KernelResult",
+    "simulate",
+]
+
+
+from typing import Tuple
+
+import numpy as np
+
+from ..lib import BaseClass
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover
+    njit = None
+
+JIT = njit is not None
+"""Whether the kernel can be compiled (numba is installed)."""
+
+TRADE = np.dtype([("entry", np.int64), ("exit", np.int64),
+                  ("entry_price", np.float64), ("exit_price", np.float64),
+                  ("pnl", np.float64)])
+
+
+def _run(close: np.ndarray, adverse: np.ndarray, favorable: np.ndarray,
+         opening: np.ndarray, entries: np.ndarray, exits: np.ndarray,
+         direction: float, stop_loss: float,
+         take_profit: float) -> np.ndarray:
+    """Bar loop of the kernel, compiled by numba when available.
+
+    Written in the numba supported subset of Python, it only walks the bars
+    to find the trades: rows of entry bar, exit bar, entry price and exit
+    price, the exit of the last one being NaN while still open.
+    `adverse` and `favorable` are the prices moving against and in favor of
+    the position (low and high for long positions), `opening` the open
+    prices, NaN when unknown.
+    """
+    bars = len(close)
+    trades = np.full((bars // 2 + 1, 4), np.nan)
+    count = 0
+    held = False
+    stop = target = 0.0
+    for bar in range(bars):
+        if not held:
+            # The entry is written ahead and only kept once the trade opens.
+            held = entries[bar]
+            trades[count, 0] = bar
+            trades[count, 2] = close[bar]
+            stop = close[bar] - direction * stop_loss
+            target = close[bar] + direction * take_profit
+            continue
+
+        # levels gapped through are filled at the open, beyond them
+        if (adverse[bar] - stop) * direction <= 0:
+            price = (opening[bar] if (opening[bar] - stop) * direction < 0
+                     else stop)
+        elif (favorable[bar] - target) * direction >= 0:
+            price = (opening[bar] if (opening[bar] - target) * direction > 0
+                     else target)
+        elif exits[bar]:
+            price = close[bar]
+        else:
+            continue
+        trades[count, 1] = bar
+        trades[count, 3] = price
+        count += 1
+        held = False
+    return trades[:count + held]
+
+
+def _mark(close: np.ndarray, trades: np.ndarray,
+          amount: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Fill the position and profit and loss arrays out of the trades.
+
+    Compiled along with `_run`, it only loops over the trades, filling the
+    bars they span by slices.
+    """
+    bars = len(close)
+    position = np.zeros(bars)
+    pnl = np.empty(bars)
+    realized = 0.0
+    last = 0
+    for row in range(len(trades)):
+        entry = int(trades[row, 0])
+        closing = bars if np.isnan(trades[row, 1]) else int(trades[row, 1])
+        pnl[last:entry] = realized
+        position[entry:closing] = amount
+        pnl[entry:closing] = realized + (close[entry:closing] -
+                                         trades[row, 2]) * amount
+        if closing < bars:
+            realized += (trades[row, 3] - trades[row, 2]) * amount
+        last = closing
+    pnl[last:] = realized
+    return position, pnl
+
+
+if JIT:
+    _LOOPS = (njit(cache=True, nogil=True)(_run),
+              njit(cache=True, nogil=True)(_mark))
+else:  # pragma: no cover
+    _LOOPS = (_run, _mark)
+
+
+class KernelResult(BaseClass):
+    """Outcome of a kernel simulation.
+
+    Attributes:
+        position (np.ndarray): signed size held at the close of each bar.
+        pnl (np.ndarray): cumulated profit and loss at the close of each
+            bar, the open position being valued at the close price.
+        trades (np.ndarray): closed trades, a structured array of `entry`
+            and `exit` bar positions, `entry_price`, `exit_price` and
+            `pnl`.
+    """
+    def __init__(self, position: np.ndarray, pnl: np.ndarray,
+                 trades: np.ndarray) -> None:
+        """Class Initializer."""
+        self.position = position
+        self.pnl = pnl
+        self.trades = trades
+
+
+def simulate(close: np.ndarray, entries: np.ndarray, exits: np.ndarray, *,
+             high: np.ndarray = None, low: np.ndarray = None,
+             opening: np.ndarray = None, size: float = 1.0,
+             direction: int = 1, stop_loss: float = 0.0,
+             take_profit: float = 0.0, jit: bool = True) -> KernelResult:
+    """Backtest array rules over whole price arrays in a single pass.
+
+    A position is opened at the close of a bar with an entry signal when
+    none is held. It is closed on a later bar at the stop loss price if the
+    bar reaches it, else at the take profit price if the bar reaches it
+    (the stop loss being checked first when both are), else at the close
+    of a bar with an exit signal. As with the `BacktestBroker`, a bar
+    opening beyond the stop loss or take profit price fills it at the open.
+
+    Without stop loss nor take profit, positions only depend on the
+    signals and are found with numpy cumulative operations over the whole
+    arrays. Otherwise a bar loop is run, compiled with numba when installed
+    or (with `jit` disabled) as plain Python. All give identical results.
+
+    Args:
+        close: close prices.
+        entries: bars to open a position at.
+        exits: bars to close the position at.
+        high: high prices, to check stop loss and take profit, defaults to
+            the close prices.
+        low: low prices, defaults to the close prices.
+        opening: open prices, to fill the stop loss and take profit of bars
+            gapping through them, filled at their price if omitted.
+        size: position size.
+        direction: 1 for long positions, -1 for short ones.
+        stop_loss: stop loss distance from the entry price, 0 for none.
+        take_profit: take profit distance from the entry price, 0 for none.
+        jit: use the compiled loop when available, if a loop is needed.
+
+    Raises:
+        ValueError: arrays lengths differ.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    high = close if high is None else np.ascontiguousarray(high, np.float64)
+    low = close if low is None else np.ascontiguousarray(low, np.float64)
+    entries = np.ascontiguousarray(entries, dtype=np.bool_)
+    exits = np.ascontiguousarray(exits, dtype=np.bool_)
+    if len({len(array) for array in (close, high, low, opening, entries,
+                                     exits) if array is not None}) > 1:
+        raise ValueError("Arrays must have the same length")
+
+    direction = 1.0 if direction > 0 else -1.0
+    amount = direction * size
+    if not (stop_loss or take_profit):
+        return _vectorized(close, entries, exits, amount)
+
+    adverse, favorable = (low, high) if direction > 0 else (high, low)
+    run, mark = _LOOPS if jit else (_run, _mark)
+    opening = (np.full(len(close), np.nan) if opening is None else
+               np.ascontiguousarray(opening, np.float64))
+    trades = run(close, adverse, favorable, opening, entries, exits,
+                 direction, float(stop_loss or np.inf),
+                 float(take_profit or np.inf))
+    position, pnl = mark(close, trades, amount)
+    return KernelResult(position, pnl, _records(trades, amount))
+
+
+def _records(trades: np.ndarray, amount: float) -> np.ndarray:
+    """Return the closed trades as a structured array."""
+    closed = trades[~np.isnan(trades[:, 1])]
+    records = np.empty(len(closed), dtype=TRADE)
+    for index, name in enumerate(TRADE.names[:-1]):
+        records[name] = closed[:, index]
+    records["pnl"] = (closed[:, 3] - closed[:, 2]) * amount
+    return records
+
+
+def _held(entries: np.ndarray, exits: np.ndarray) -> np.ndarray:
+    """Return whether a position is held after each signal.
+
+    The position is set by the last single signal, each later signal pair
+    (entry and exit on the same bar) flipping it: an exit when held, an
+    entry when not, as in the bar loop.
+    """
+    signals = np.arange(len(entries))
+    last = np.maximum.accumulate(np.where(entries ^ exits, signals, -1))
+    started = last >= 0
+    last = np.maximum(last, 0)
+    held = started & entries[last]
+    both = entries & exits
+    if both.any():
+        flips = np.cumsum(both)
+        flips -= np.where(started, flips[last], 0)
+        held ^= (flips & 1).astype(bool)
+    return held
+
+
+def _vectorized(close: np.ndarray, entries: np.ndarray, exits: np.ndarray,
+                amount: float) -> KernelResult:
+    """Backtest signal rules with cumulative operations, without bar loop.
+
+    Only for rules without stop loss nor take profit, whose positions only
+    depend on the signals: the positions are solved over the bars with a
+    signal only, then spread over every bar. Results are identical to the
+    bar loop ones.
+    """
+    bars = len(close)
+    signals = np.flatnonzero(entries | exits)
+    held = _held(entries[signals], exits[signals])
+    moves = np.diff(held.view(np.int8), prepend=np.int8(0))
+    opened = signals[moves == 1]
+    closed = signals[moves == -1]
+
+    trades = np.full((len(opened), 4), np.nan)
+    trades[:, 0] = opened
+    trades[:, 2] = close[opened]
+    trades[:len(closed), 1] = closed
+    trades[:len(closed), 3] = close[closed]
+
+    steps = np.zeros(bars, dtype=np.int8)
+    steps[signals] = moves
+    position = np.cumsum(steps, dtype=np.int8).view(bool)
+    realized = np.zeros(bars)
+    realized[closed] = (trades[:len(closed), 3] -
+                        trades[:len(closed), 2]) * amount
+    prices = np.repeat(np.r_[0.0, trades[:, 2]],
+                       np.diff(np.r_[0, opened, bars]))
+    pnl = np.cumsum(realized)
+    pnl += np.where(position, (close - prices) * amount, 0.0)
+    return KernelResult(np.where(position, amount, 0.0), pnl,
+                        _records(trades, amount))
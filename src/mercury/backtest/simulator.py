@@ -4,6 +4,8 @@
 
 """Mercury Backtest Module."""
 
+from __future__ import annotations
+
 __copyright__ = "Copyright 2019 - 2021 Richard Kemp"
 __revision__ = "$Id$"
 __all__ = [
@@ -11,15 +13,183 @@ __all__ = [
 ]
 
 
-# from .broker import BacktestBroker
-from .. import Strategy
+import contextlib
+import copy
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Manager
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Sequence,
+                    Tuple, Union)
+
+import numpy as np
+
+from .broker import BacktestBroker
+from .kernel import KernelResult, simulate
+from .. import Broker, Strategy, Timeseries
+from ..core.panel import Panel
 from ..lib import BaseClass, Datasource, Datastore
 
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:  # pragma: no cover
+    SharedMemory = None  # Python < 3.8, runs are not parallelized
+
+_WORKER: Dict[str, Any] = {}
+"""State of an optimization worker process."""
+
+
+def _share(timeseries: Timeseries) -> Tuple[SharedMemory, Dict[str, Any]]:
+    """Copy the timeseries data into a new shared memory block.
+
+    Returns:
+        The shared memory block and the layout to rebuild the timeseries
+        from it, see `_attach`.
+    """
+    size = timeseries._size
+    arrays = {key: data[:size] for key, data in timeseries._data.items()}
+    columns = {}
+    total = 0
+    for key, array in arrays.items():
+        columns[key] = (total, array.dtype.str)
+        total += -(-array.nbytes // 64) * 64  # keep columns aligned
+    memory = SharedMemory(create=True, size=max(total, 1))
+    for key, array in arrays.items():
+        offset, dtype = columns[key]
+        np.ndarray(size, dtype, memory.buf, offset)[:] = array
+
+    layout = {"columns": columns, "size": size,
+              "index": timeseries._index_name,
+              "instrument": timeseries.instrument,
+              "timeframe": timeseries.timeframe}
+    return memory, layout
+
+
+def _attach(name: str,
+            layout: Dict[str, Any]) -> Tuple[SharedMemory, Timeseries]:
+    """Rebuild a timeseries over a shared memory block, without copy."""
+    memory = SharedMemory(name)
+    columns = {key: np.ndarray(layout["size"], dtype, memory.buf, offset)
+               for key, (offset, dtype) in layout["columns"].items()}
+    columns[layout["index"]] = columns.pop("index")
+    timeseries = Timeseries.from_arrays(layout["instrument"],
+                                        layout["timeframe"], columns,
+                                        index=layout["index"], copy=False)
+    return memory, timeseries
+
+
+def _init_worker(simulator: Simulator, name: str,
+                 layout: Dict[str, Any]) -> None:
+    """Set up an optimization worker process."""
+    memory, timeseries = _attach(name, layout)
+    simulator._bind(timeseries)
+    _WORKER.update(memory=memory, simulator=simulator)
+
+
+def _run_worker(params: Dict[str, Any], window: Optional[Tuple[int, int]],
+                evaluate: Callable[[Strategy], Any],
+                checkpoint: Optional[_Rungs]) -> Tuple[bool, Any]:
+    """Run the backtest of one parameters set in a worker process.
+
+    Returns:
+        Whether the run completed, and its outcome if so.
+    """
+    strategy = _WORKER["simulator"]._run(params, window, checkpoint)
+    if strategy is None:
+        return False, None
+    return True, evaluate(strategy)
+
+
+def _markets(panel: Panel) -> List[Timeseries]:
+    """Return one timeseries per instrument of a panel, over its data."""
+    index = {panel._index_name: panel._data["index"]}
+    return [Timeseries.from_arrays(instrument, panel.timeframe, dict(
+        index, **{key: panel._data[key][position] for key in panel.fields}),
+        index=panel._index_name, copy=False)
+        for position, instrument in enumerate(panel.instruments)]
+
+
+def _history(strategy: Strategy) -> List:
+    """Return the positions closed during a run."""
+    return strategy.broker.history
+
+
+def _balance(strategy: Strategy) -> float:
+    """Return the account balance at the end of a run."""
+    return strategy.broker.account.balance
+
+
+def _combinations(grid: Dict[str, List], samples: int = None,
+                  seed: int = None) -> List[Dict[str, Any]]:
+    """Return the parameters sets of a grid, or a random sample of them.
+
+    Sampled sets are drawn without replacement and without building the
+    whole grid, so `samples` may be taken from grids too large to be run.
+    """
+    if samples is None or not grid:
+        return [dict(zip(grid, values))
+                for values in itertools.product(*grid.values())]
+    shape = [len(values) for values in grid.values()]
+    total = int(np.prod(shape, dtype=np.int64))
+    picks = np.random.default_rng(seed).choice(total, min(samples, total),
+                                               replace=False)
+    return [{name: values[index] for (name, values), index
+             in zip(grid.items(), indices)}
+            for indices in zip(*np.unravel_index(picks, shape))]
+
+
+class _Rungs(BaseClass):
+    """Checkpoint pruning the runs of an asynchronous successive halving.
+
+    Runs are scored when they reach each rung cursor and go on only if
+    their score ranks in the top `1 / eta` of the scores reached at this
+    rung so far, so that each rung keeps about `1 / eta` of the runs of the
+    previous one. Scores are kept in lists shared by the worker processes
+    for parallel runs.
+    """
+    def __init__(self, cursors: List[int], scores: List[List[float]],
+                 score: Callable[[Strategy], float], eta: int) -> None:
+        """Class Initializer."""
+        self.cursors = cursors
+        self.scores = scores
+        self.score = score
+        self.eta = eta
+
+    def __call__(self, strategy: Strategy, cursor: int) -> bool:
+        """Record the score of a run at a rung, return if it goes on."""
+        value = self.score(strategy)
+        scores = self.scores[self.cursors.index(cursor)]
+        scores.append(value)
+        ranked = sorted(scores[:], reverse=True)
+        return value >= ranked[-(-len(ranked) // self.eta) - 1]
+
 
 class Simulator(BaseClass):
-    """Backtest strategy simulation."""
+    """Backtest strategy simulation.
+
+    The strategy is stepped bar after bar over `timeseries`, which can be a
+    `Panel` to step several instruments at once.
+
+    Orders go to a `BacktestBroker` by default, filled against the bars of
+    the timeseries (of each instrument of a `Panel`) as the run goes. Each
+    run trades with its own copy of the backtest broker given, so that the
+    strategies run keep their own positions and account.
+
+    With `precompute` enabled, the strategy indicators are computed once
+    over the whole timeseries before the run and read through views bounded
+    by the cursor (see `Strategy.precompute`), instead of being updated on
+    each bar. Precomputed indicators are cached by the simulator, so
+    parameter sweeps (see `optimize`) compute each distinct indicator once.
+
+    Unless `warmup` is given, the first bars are skipped until every
+    indicator of the strategy has a value (see `Strategy.lookback`), as no
+    signal can be produced before.
+    """
     def __init__(self, strategy: Strategy, *, datastore: Datastore,
-                 datasource: Datasource = None, warmup: int = 1) -> None:
+                 datasource: Datasource = None,
+                 timeseries: Union[Timeseries, Panel] = None,
+                 broker: Broker = None, warmup: int = None,
+                 precompute: bool = False) -> None:
         """Initialize."""
         # some sanity checks
         if datasource and not isinstance(datasource, Datasource):
@@ -27,30 +197,305 @@ class Simulator(BaseClass):
         if not isinstance(datastore, Datastore):
             raise TypeError("`datastore` must be a `Datastore` subclass")
 
-        # self.broker = BacktestBroker(account)
+        self.broker = broker or BacktestBroker()
         self.strategy = strategy
-        # self.candles = candles
         self.warmup = warmup
+        self.precompute = precompute
+        self._bind(timeseries)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave the market data out when pickled (see `optimize`)."""
+        state = dict(vars(self))
+        state["candles"] = None
+        state["_cache"] = {}
+        state["_markets"] = []
+        return state
+
+    def _bind(self, timeseries: Union[Timeseries, Panel]) -> None:
+        """Use a timeseries as the market data of the runs."""
+        self.candles = timeseries
+        self._bars = len(timeseries) if timeseries is not None else 0
+        self._cache = {}
+        self._markets = ([timeseries] if isinstance(timeseries, Timeseries)
+                         else _markets(timeseries)
+                         if isinstance(timeseries, Panel) else [])
+
+    def _broker(self) -> Broker:
+        """Return the broker of a new run.
+
+        Backtest brokers are copied with a fresh trading state and attached
+        to the markets, other brokers are shared by the runs.
+        """
+        if not isinstance(self.broker, BacktestBroker):
+            return self.broker
+        broker = copy.deepcopy(self.broker)
+        for market in self._markets:
+            broker.attach(market)
+        return broker
+
+    def run(self, **params: Any) -> Strategy:
+        """Execute the backtest.
+
+        Args:
+            params: strategy parameters values, see `Parameter`.
+
+        Returns:
+            The strategy instance run.
+        """
+        return self._run(params)
+
+    def _run(self, params: Dict[str, Any], window: Tuple[int, int] = None,
+             checkpoint: _Rungs = None) -> Optional[Strategy]:
+        """Execute the backtest over a window of bars only.
+
+        The strategy (and its precomputed indicators) still sees the bars
+        before the window, only the bars from `first` to `last` (excluded)
+        are stepped.
+
+        Args:
+            params: strategy parameters values.
+            window: `(first, last)` bars positions, all the bars if omitted.
+            checkpoint: function called with the strategy and the cursor
+                once the cursor reaches each of its `cursors`, stopping the
+                run when it returns False.
+
+        Returns:
+            The strategy instance run, None if stopped at a checkpoint.
+        """
+        self.candles.set_cursor(self._bars)
+        broker = self._broker()
+        strategy = self.strategy(broker, self.candles, **params)
+        if self.precompute:
+            strategy.precompute(self._cache)
+        first, last = window or (0, self._bars)
+        warmup = max(self.warmup or self._warmup(strategy), first + 1)
+        match = broker.match if isinstance(broker, BacktestBroker) else None
+        # Panel instruments markets follow the panel cursor
+        followers = [market for market in self._markets
+                     if market is not self.candles]
 
-    def run(self) -> None:
-        """Execute the backtest."""
-        strategy = self.strategy(self.broker, self.candles)
-        # start = 1 + max((np.isnan(indicator).argmin()
-        #                  for _, indicator in indicator_attrs), default=0)
-        # test = max((np.isnan(indicator).argmin()
-        #             for _, indicator in strategy._indicators.items()))
-        for i in range(self.warmup, len(self.candles)):
+        # Aliases to use inside the strategy, the row follows the cursor
+        strategy.current = current = self.candles.current
+        stops = set(checkpoint.cursors) if checkpoint else ()
+        for i in range(warmup, last + 1):
             self.candles.set_cursor(i)
+            for market in followers:
+                market.set_cursor(i)
 
-            # Aliases to use inside the strategy
-            strategy.current = self.candles.current
-            strategy.time = self.candles.current.get("date").time()
+            strategy.time = current["date"].time()
 
+            if match:
+                match()
             strategy.tick()
+            if i in stops and not checkpoint(strategy, i):
+                return None
+
+        return strategy
+
+    def simulate(self, signals: Dict[str, Any] = None, *, jit: bool = True,
+                 **params: Any) -> KernelResult:
+        """Execute the backtest of array rules in a single pass.
+
+        Rather than stepping the strategy bar per bar, entry and exit masks
+        are run through `mercury.backtest.kernel.simulate`: with numpy
+        cumulative operations only for plain signals, with a bar loop
+        (compiled with numba when available) when a stop loss or a take
+        profit is set. Signals are filled at the close of their bar, like
+        market orders of the `BacktestBroker` (without spread), so results
+        match `run` with a strategy trading the same signals.
+
+        The rules are the `signals` given, otherwise the ones returned by
+        `Strategy.signals`, the strategy indicators being precomputed.
+        Signals before the warmup are ignored.
+
+        Args:
+            signals: keyword arguments of `mercury.backtest.kernel.simulate`
+                (`entries`, `exits`, ...), in place of the strategy ones.
+            jit: use the compiled loop when available.
+            params: strategy parameters values, see `Parameter`.
 
-    def optimize(self) -> None:
+        Returns:
+            The positions, profit and loss and trades of the run.
+        """
+        self.candles.set_cursor(self._bars)
+        if signals is None:
+            strategy = self.strategy(self.broker, self.candles, **params)
+            strategy.precompute(self._cache)
+            signals = strategy.signals()
+            start = (self.warmup or self._warmup(strategy)) - 1
+        else:
+            start = (self.warmup or 1) - 1
+
+        rules = dict(signals)
+        for key in ("entries", "exits"):
+            rules[key] = np.array(rules[key], dtype=bool)
+            rules[key][:start] = False
+
+        prices = {name: np.asarray(self.candles[key])
+                  for name, key in (("high", "high"), ("low", "low"),
+                                    ("opening", "open"))
+                  if key in self.candles.current}
+        return simulate(np.asarray(self.candles.close), jit=jit, **prices,
+                        **rules)
+
+    def _warmup(self, strategy: Strategy) -> int:
+        """Return the first cursor position where indicators have values.
+
+        Lookbacks not declared are detected from the indicators values,
+        computed over the whole timeseries first if needed.
+        """
+        lookback = strategy.lookback
+        if lookback is None:
+            for indicator in strategy._indicators.values():
+                indicator.apply(self.candles)
+            lookback = strategy.lookback
+        return self._bars if lookback is None else lookback + 1
+
+    def optimize(self, *, workers: int = 1,
+                 evaluate: Callable[[Strategy], Any] = None,
+                 samples: int = None, seed: int = None, halving: int = None,
+                 score: Callable[[Strategy], float] = None,
+                 **grid: Sequence) -> Iterator[Tuple[Dict, Any]]:
         """Run the backtest several times with different params.
 
         Goal is to find the best values for each param tested and suggest them
         for a real run and get the most out of the strategy backtested.
+
+        Every combination of the parameters values is run, or only a random
+        sample of `samples` of them. Parameters not given are swept over
+        their declared `values`, if any.
+
+        With `halving`, runs are pruned by asynchronous successive halving:
+        rungs are set at the `1 / halving`, `1 / halving ** 2`... fractions
+        of the bars, as many as the number of runs allows, and a run only
+        goes past a rung if its `score` there ranks in the top
+        `1 / halving` of the runs which reached the rung before it. Most
+        runs thus stop on a short prefix of the data and only the best ones
+        are run to the end, the pruned runs being left out of the results.
+
+        With several `workers`, runs are spread over a pool of processes.
+        The timeseries is copied once into shared memory, which every
+        worker reads in place, and each worker keeps its own indicators
+        cache between its runs. The strategy class, `evaluate` and `score`
+        must then be picklable (defined at module level). Runs are not
+        parallelized before Python 3.8, which lacks shared memory.
+
+        Outcomes are the same whatever the number of workers: the positions
+        closed during the run unless `evaluate` is given, strategies not
+        leaving the worker processes.
+
+        Args:
+            workers: number of processes to run the backtests in.
+            evaluate: function computing the outcome of a run from the
+                strategy instance run, e.g. its final balance, the list of
+                positions closed during the run by default.
+            samples: number of parameters sets to draw at random from the
+                grid, all of them if omitted.
+            seed: random generator seed of the draw.
+            halving: reduction factor of successive halving (e.g. 3), no
+                pruning if omitted.
+            score: function rating a run at each rung, the highest score
+                being the best, the account balance by default.
+            grid: values to test, by parameter name.
+
+        Yields:
+            The parameters and outcome of each run, as soon as it
+            completes.
+
+        Raises:
+            TypeError: parallel runs over a `Panel`.
+        """
+        runs = self._candidates(grid, samples, seed)
+
+        evaluate = evaluate or _history
+        tasks = [(params, None, evaluate) for params in runs]
+        with contextlib.ExitStack() as stack:
+            checkpoint = halving and self._rungs(
+                len(runs), halving, score or _balance, workers, stack)
+            for number, outcome in self._execute(tasks, workers,
+                                                 checkpoint):
+                yield runs[number], outcome
+
+    def _candidates(self, grid: Dict[str, Sequence], samples: int = None,
+                    seed: int = None) -> List[Dict[str, Any]]:
+        """Return the parameters sets of a grid, see `optimize`.
+
+        Parameters not in the grid are swept over their declared `values`,
+        if any.
+        """
+        grid = {name: list(values) for name, values in grid.items()}
+        for name, parameter in self.strategy.parameters().items():
+            if name not in grid and parameter.values is not None:
+                grid[name] = list(parameter.values)
+        return _combinations(grid, samples, seed)
+
+    def _rungs(self, runs: int, eta: int, score: Callable[[Strategy], float],
+               workers: int, stack: contextlib.ExitStack) -> _Rungs:
+        """Return the checkpoint of a successive halving of runs.
+
+        Rungs scores are shared through a manager process, entered into
+        `stack`, for parallel runs.
+        """
+        count = int(math.log(max(runs, 1), eta) + 1e-9)
+        cursors = [self._bars // eta ** rung for rung in range(count, 0, -1)]
+        if workers > 1:
+            manager = stack.enter_context(Manager())
+            scores = [manager.list() for _ in cursors]
+        else:
+            scores = [[] for _ in cursors]
+        return _Rungs(cursors, scores, score, eta)
+
+    def _execute(self, tasks: Sequence[Tuple[Dict, Optional[Tuple[int, int]],
+                                             Optional[Callable]]],
+                 workers: int = 1,
+                 checkpoint: _Rungs = None) -> Iterator[Tuple[int, Any]]:
+        """Run backtests, in a pool of processes sharing the data if asked.
+
+        Args:
+            tasks: parameters, window (see `_run`) and evaluate function of
+                each backtest, the strategy instance being the outcome of
+                runs without function.
+            workers: number of processes to run the backtests in.
+            checkpoint: checkpoint of every run, see `_run`.
+
+        Yields:
+            The position of each task and its outcome, as soon as it
+            completes, runs stopped at a checkpoint being skipped.
+
+        Raises:
+            TypeError: parallel runs over a `Panel`.
         """
+        if workers <= 1 or SharedMemory is None:
+            for number, (params, window, evaluate) in enumerate(tasks):
+                strategy = self._run(params, window, checkpoint)
+                if strategy is not None:
+                    yield number, evaluate(strategy) if evaluate else strategy
+        else:
+            yield from self._parallel(tasks, workers, checkpoint)
+
+    def _parallel(self, tasks: Sequence[Tuple], workers: int,
+                  checkpoint: Optional[_Rungs]) -> Iterator[Tuple[int, Any]]:
+        """Run backtests in a pool of processes sharing the data.
+
+        See `_execute`.
+        """
+        if not isinstance(self.candles, Timeseries):
+            raise TypeError("Parallel runs require a Timeseries")
+
+        memory, layout = _share(self.candles)
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                   initargs=(self, memory.name, layout))
+        futures = {}
+        try:
+            futures = {pool.submit(_run_worker, *task, checkpoint): number
+                       for number, task in enumerate(tasks)}
+            for future in as_completed(futures):
+                completed, outcome = future.result()
+                if completed:
+                    yield futures[future], outcome
+        finally:
+            for future in futures:
+                future.cancel()
+            pool.shutdown()
+            memory.close()
+            memory.unlink()
@@ -0,0 +1,187 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Walk-Forward Module.
+
+Provide:
+    - WalkForward Class
+    - WalkForwardResult Class
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "WalkForward",
+    "WalkForwardResult",
+]
+
+
+import functools
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .simulator import Simulator, _balance
+from .. import PositionType, Strategy
+from ..lib import BaseClass
+
+
+def _equity(strategy: Strategy, first: int, last: int) -> np.ndarray:
+    """Return the profit and loss of a run at the close of each bar.
+
+    Positions are valued at the close price while open, their profit being
+    booked from the bar they are closed on.
+    """
+    timeseries = strategy.timeseries
+    close = np.asarray(timeseries.close)
+    pnl = np.zeros(last - first)
+    for position in strategy.broker.history + strategy.broker.positions:
+        opened = timeseries._search(position.open_date, "left")
+        closed = (last if position.close_date is None else
+                  timeseries._search(position.close_date, "left"))
+        sign = 1 if position.type is PositionType.BUY else -1
+        pnl[opened - first:closed - first] += (
+            close[opened:closed] - position.open_price) * \
+            position.volume * sign
+        if position.close_date is not None:
+            pnl[closed - first:] += position.profit
+    return pnl
+
+
+class WalkForwardResult(BaseClass):
+    """Outcome of a walk-forward optimization.
+
+    Attributes:
+        folds (list): one dict per fold with the `train` and `test` windows
+            (bars positions, last excluded), the best `params` found on the
+            train window and their in-sample `score`.
+        dates (np.ndarray): dates of the test bars, end to end.
+        equity (np.ndarray): out-of-sample profit and loss at the close of
+            each test bar, the folds being stitched end to end.
+    """
+    def __init__(self, folds: List[Dict[str, Any]], dates: np.ndarray,
+                 equity: np.ndarray) -> None:
+        """Class Initializer."""
+        self.folds = folds
+        self.dates = dates
+        self.equity = equity
+
+
+class WalkForward(BaseClass):
+    """Walk-forward optimization of a strategy.
+
+    The timeseries of a `Simulator` is split into folds made of a train
+    window, over which the parameters grid is swept, followed by a test
+    window, over which the best parameters are run. The test windows are
+    contiguous, so their results make an out-of-sample equity curve.
+
+    Windows are mere cursor ranges over the same timeseries: nothing is
+    copied, and the strategy indicators are computed over the whole
+    timeseries, so with `precompute` enabled on the simulator each distinct
+    indicator is computed once for every fold (per worker process).
+
+    Usage::
+
+        >>> walk = WalkForward(simulator, train=5000, test=1000)
+        >>> result = walk.run(workers=4, fast=range(5, 30, 5))
+        >>> result.equity[-1]
+    """
+    def __init__(self, simulator: Simulator, *, train: int, test: int,
+                 step: int = None, anchored: bool = False) -> None:
+        """Class Initializer.
+
+        Args:
+            simulator: simulator to run the backtests with.
+            train: number of bars of the train windows.
+            test: number of bars of the test windows.
+            step: number of bars between two folds, `test` by default.
+            anchored: start every train window at the first bar, growing
+                them fold after fold.
+
+        Raises:
+            ValueError: test windows would overlap.
+        """
+        step = step or test
+        if step < test:
+            raise ValueError("Test windows must not overlap")
+        self.simulator = simulator
+        self.train = train
+        self.test = test
+        self.step = step
+        self.anchored = anchored
+
+    def windows(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """Return the train and test windows of every fold.
+
+        Windows are `(first, last)` bars positions, last excluded. Only the
+        folds fitting entirely in the timeseries are kept.
+        """
+        windows = []
+        start = 0
+        while start + self.train + self.test <= self.simulator._bars:
+            split = start + self.train
+            windows.append(((0 if self.anchored else start, split),
+                            (split, split + self.test)))
+            start += self.step
+        return windows
+
+    def run(self, *, score: Callable[[Strategy], float] = None,
+            workers: int = 1, **grid: Sequence) -> WalkForwardResult:
+        """Run the walk-forward optimization.
+
+        The runs of every train window are spread together over the worker
+        processes, then the test runs of every fold. See
+        `Simulator.optimize` for parallel runs requirements.
+
+        Args:
+            score: function rating a train run from the strategy instance
+                run, the highest score winning, the final account balance
+                by default.
+            workers: number of processes to run the backtests in.
+            grid: values to test, by parameter name, parameters not given
+                being swept over their declared `values`.
+
+        Returns:
+            The folds best parameters and the out-of-sample equity.
+        """
+        simulator = self.simulator
+        runs = simulator._candidates(grid)
+        windows = self.windows()
+
+        tasks = [(params, train, score or _balance)
+                 for train, _ in windows for params in runs]
+        scores = np.full(len(tasks), -np.inf)
+        for number, outcome in simulator._execute(tasks, workers):
+            scores[number] = outcome
+        scores = scores.reshape(len(windows), len(runs))
+        best = scores.argmax(axis=1) if runs else []
+
+        tasks = [(runs[choice], test, functools.partial(_equity,
+                                                        first=test[0],
+                                                        last=test[1]))
+                 for choice, (_, test) in zip(best, windows)]
+        equities = [None] * len(tasks)
+        for number, outcome in simulator._execute(tasks, workers):
+            equities[number] = outcome
+        return self._result(windows, runs, best, scores, equities)
+
+    def _result(self, windows: List, runs: List[Dict[str, Any]],
+                best: np.ndarray, scores: np.ndarray,
+                equities: List[np.ndarray]) -> WalkForwardResult:
+        """Stitch the folds test runs end to end."""
+        folds = [{"train": train, "test": test, "params": runs[choice],
+                  "score": float(scores[fold, choice])}
+                 for fold, (choice, (train, test))
+                 in enumerate(zip(best, windows))]
+        equity = np.zeros(0)
+        for pnl in equities:
+            equity = np.r_[equity, pnl + (equity[-1] if len(equity) else 0)]
+        index = self.simulator.candles._data["index"]
+        dates = (np.concatenate([index[first:last]
+                                 for _, (first, last) in windows])
+                 if windows else index[:0])
+        return WalkForwardResult(folds, dates, equity)
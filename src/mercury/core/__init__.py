@@ -14,26 +14,33 @@ __all__ = [
     "Broker",
     "CurrencyCode",
     "Engine",
+    "Feed",
     "Indicator",
     "LotSize",
     "Order",
     "OrderAction",
     "OrderStatus",
     "OrderType",
+    "Panel",
+    "Parameter",
     "Position",
     "PositionStatus",
     "PositionType",
     "PriceType",
     "Strategy",
+    "TickAggregator",
     "Timeframe",
     "Timeseries",
 ]
 
 
 from .account import Account, AccountType
+from .aggregator import TickAggregator
 from .broker import Broker, CurrencyCode, LotSize, PriceType
 from .engine import Engine
+from .feed import Feed
 from .order import Order, OrderAction, OrderStatus, OrderType
+from .panel import Panel
 from .position import Position, PositionStatus, PositionType
-from .strategy import Indicator, Strategy
+from .strategy import Indicator, Parameter, Strategy
 from .timeseries import Timeframe, Timeseries
@@ -0,0 +1,167 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Tick Aggregator Module.
+
+Provide:
+    - TickAggregator Class
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "TickAggregator",
+]
+
+
+from datetime import datetime
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .broker import PriceType
+from .timeseries import Timeframe, Timeseries, _bucket_dates, _buckets
+from ..lib import BaseClass
+
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def _bucket(timestamp: float, timeframe: Timeframe) -> int:
+    """Return the timeframe period number of an epoch timestamp (UTC)."""
+    if timeframe is Timeframe.MN:
+        date = datetime.utcfromtimestamp(timestamp)
+        return (date.year - 1970) * 12 + date.month - 1
+    if timeframe is Timeframe.W1:
+        timestamp -= 4 * 86400  # 1970-01-01 is a thursday
+    return int(timestamp // timeframe.value)
+
+
+def _update(bar: list, price: float, volume: float) -> None:
+    """Update an open bar `[period, open, high, low, close, volume]`."""
+    if price > bar[2]:
+        bar[2] = price
+    elif price < bar[3]:
+        bar[3] = price
+    bar[4] = price
+    bar[5] += volume
+
+
+class TickAggregator(BaseClass):
+    """Build OHLCV bars of several timeframes from a stream of ticks.
+
+    Each tick updates the open bar of every timeframe in O(1). A bar is
+    closed when the first tick of the next period arrives: it is then
+    appended to the timeseries of its timeframe (`Timeseries.append_row`),
+    which notifies the timeseries subscribers straight away.
+
+    Periods are computed from UTC epoch timestamps, calendar aligned
+    like `Timeseries.resample`, bars being labelled with the datetime their
+    period starts.
+
+    Attributes:
+        instrument (str): name of the instrument ticks belong to.
+        price (PriceType): tick price used to build bars, BID, ASK or LAST
+            for the mid price.
+        timeseries (dict): closed bars Timeseries by Timeframe.
+
+    Usage::
+
+        >>> aggregator = TickAggregator("EURUSD", [Timeframe.M1,
+        ...                                        Timeframe.H1])
+        >>> aggregator.timeseries[Timeframe.M1].subscribe(on_new_bar)
+        >>> for timestamp, bid, ask in ticks:
+        ...     aggregator.push(timestamp, bid, ask)
+    """
+    def __init__(self, instrument: str, timeframes: Sequence[Timeframe], *,
+                 price: PriceType = PriceType.BID,
+                 timeseries: Dict[Timeframe, Timeseries] = None) -> None:
+        """Class Initializer.
+
+        Args:
+            instrument: name of the instrument ticks belong to.
+            timeframes: timeframes to build bars for.
+            price: tick price to use, LAST being the bid/ask mid price.
+            timeseries: existing timeseries (e.g. history fetched from a
+                broker) to append closed bars to, by timeframe. They must
+                hold OHLCV columns. Ticks of the periods they already hold
+                are ignored.
+        """
+        self.instrument = instrument
+        self.price = price
+        self.timeseries = dict(timeseries or {})
+        for timeframe in timeframes:
+            if timeframe not in self.timeseries:
+                self.timeseries[timeframe] = self._empty(timeframe)
+        self._bars: Dict[Timeframe, List] = {timeframe: None
+                                             for timeframe in timeframes}
+        self._last = {timeframe: self._last_bucket(timeframe)
+                      for timeframe in timeframes}
+
+    def _last_bucket(self, timeframe: Timeframe) -> float:
+        """Return the period of the last bar stored for a timeframe."""
+        timeseries = self.timeseries[timeframe]
+        size = timeseries._size
+        if not size:
+            return float("-inf")
+        return _buckets(timeseries._data["index"][size - 1:size],
+                        timeframe)[0]
+
+    def _empty(self, timeframe: Timeframe) -> Timeseries:
+        """Return an empty OHLCV timeseries."""
+        columns = {column: np.empty(0) for column in COLUMNS}
+        columns["date"] = np.empty(0, dtype="datetime64[ns]")
+        return Timeseries.from_arrays(self.instrument, timeframe, columns)
+
+    def push(self, timestamp: float, bid: float, ask: float,
+             volume: float = 1) -> None:
+        """Ingest a tick.
+
+        Args:
+            timestamp: tick UTC epoch time, in seconds.
+            bid: tick bid price.
+            ask: tick ask price.
+            volume: tick volume, defaults to 1 to count ticks.
+        """
+        price = (bid if self.price is PriceType.BID else
+                 ask if self.price is PriceType.ASK else
+                 (bid + ask) / 2)
+
+        for timeframe, bar in self._bars.items():
+            bucket = _bucket(timestamp, timeframe)
+            if bar is not None and bar[0] == bucket:
+                _update(bar, price, volume)
+            elif bucket > self._last[timeframe]:
+                if bar is not None:
+                    self._close(timeframe, bar)
+                self._bars[timeframe] = [bucket, price, price, price, price,
+                                         volume]
+
+    def current(self, timeframe: Timeframe) -> Dict[str, float]:
+        """Return the open (not closed yet) bar of a timeframe."""
+        bar = self._bars[timeframe]
+        if bar is None:
+            return {}
+        values = dict(zip(COLUMNS, bar[1:]))
+        values["date"] = _bucket_dates(np.array([bar[0]]), timeframe)[0]
+        return values
+
+    def flush(self) -> None:
+        """Close the open bars, e.g. at the end of a session."""
+        for timeframe, bar in self._bars.items():
+            if bar is not None:
+                self._close(timeframe, bar)
+                self._bars[timeframe] = None
+
+    def _close(self, timeframe: Timeframe, bar: list) -> None:
+        """Append a closed bar to its timeseries."""
+        self._last[timeframe] = bar[0]
+        timeseries = self.timeseries[timeframe]
+        values = dict(zip(COLUMNS, bar[1:]))
+        values[timeseries._index_name] = _bucket_dates(np.array([bar[0]]),
+                                                       timeframe)[0]
+        timeseries.append_row(values)
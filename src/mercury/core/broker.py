@@ -23,7 +23,7 @@ import time
 from abc import abstractmethod
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, TypeVar
+from typing import Iterator, List, Tuple, TypeVar
 
 
 from . import Account
@@ -143,6 +143,20 @@ class Broker(metaclass=BaseMetaClass):
     def _api_close_position(self, position: Position, level: float) -> bool:
         """Implement the broker's method to close a position."""
 
+    #
+    # OPTIONAL METHODS
+    #
+    # Broker's API features not available everywhere
+    #
+    def _api_stream_ticks(self, instrument: str,
+                          ) -> Iterator[Tuple[float, float, float, float]]:
+        """Implement the broker's method to stream live ticks.
+
+        Must yield `(timestamp, bid, ask, volume)` tuples, the timestamp
+        being a UTC epoch time in seconds.
+        """
+        raise NotImplementedError(f"{self.name} does not stream ticks")
+
     #
     # PROPERTIES
     #
@@ -215,6 +229,18 @@ class Broker(metaclass=BaseMetaClass):
 
         return candles
 
+    def stream_ticks(self, instrument: str,
+                     ) -> Iterator[Tuple[float, float, float, float]]:
+        """Yield live `(timestamp, bid, ask, volume)` ticks of an instrument.
+
+        This method uses the internal method `_api_stream_ticks`, not
+        implemented by every broker.
+
+        Raises:
+            NotImplementedError: the broker cannot stream ticks.
+        """
+        return self._api_stream_ticks(instrument)
+
     def long_positions(self, refresh: bool = False) -> List[Position]:
         """Return all current long open positions."""
         refresh and self._sync_positions()
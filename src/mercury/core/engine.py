@@ -18,9 +18,12 @@ import time
 from datetime import datetime, timedelta
 from typing import Type
 
+import numpy as np
+
+from .aggregator import TickAggregator
 from .broker import Broker
 from .strategy import Strategy
-from .timeseries import Timeframe
+from .timeseries import Timeframe, Timeseries
 from ..lib import BaseClass
 
 
@@ -47,10 +50,11 @@ class Engine(BaseClass):
 
         The loop is triggered once the engine has been started.
         """
+        # The row follows the candles cursor, no need to refresh it
+        self.strategy.current = current = self.candles.current
         while True:
             self.__logger.debug("- tick -")
-            self.strategy.current = self.candles.current
-            self.strategy.time = self.candles.current["date"].time()
+            self.strategy.time = current["date"].time()
 
             self.strategy.tick()
 
@@ -60,6 +64,26 @@ class Engine(BaseClass):
 
             self.increment_candles()
 
+    def _run_stream(self) -> None:
+        """Streaming Engine loop.
+
+        Candles are built from the broker live ticks and the strategy is
+        ticked as soon as a candle closes, instead of polling the broker.
+        """
+        aggregator = TickAggregator(self.instrument, [self.timeframe],
+                                    timeseries={self.timeframe: self.candles})
+        self.strategy.current = self.candles.current
+        self.candles.subscribe(self._on_candle)
+
+        for tick in self.broker.stream_ticks(self.instrument):
+            aggregator.push(*tick)
+
+    def _on_candle(self, start: int, count: int) -> None:
+        """Tick the strategy on a new candle."""
+        self.__logger.debug("- tick -")
+        self.strategy.time = self.strategy.current["date"].time()
+        self.strategy.tick()
+
     def increment_candles(self) -> None:
         """Increment candles with the last available from the broker."""
         while True:
@@ -76,12 +100,36 @@ class Engine(BaseClass):
             time.sleep(1)
 
     def start(self, *, instrument: str, timeframe: Timeframe,
-              warmup: int = 1) -> None:
-        """Start the engine."""
-        self.warmup = warmup
+              warmup: int = None, stream: bool = False) -> None:
+        """Start the engine.
+
+        Args:
+            instrument: instrument to trade.
+            timeframe: candles timeframe.
+            warmup: number of past candles to fetch before starting,
+                defaults to the strategy lookback plus the current candle,
+                the minimum for every indicator to have a value, or to the
+                current candle only when the lookback of some indicators is
+                not declared (see `Indicator.lookback`).
+            stream: build candles from the broker live ticks (see
+                `Broker.stream_ticks`) rather than polling new candles.
+        """
         self.timeframe = timeframe
         self.instrument = instrument
 
+        # the strategy is set up first to know the history it needs
+        empty = Timeseries.from_arrays(instrument, timeframe, {
+            "date": np.empty(0, dtype="datetime64[ns]")})
+        self.strategy = self.strategy(self.broker, empty)
+        if warmup is None:
+            lookback = self.strategy.lookback
+            if lookback is None:
+                self.__logger.warning("strategy lookback unknown, starting "
+                                      "from the current candle only")
+                lookback = 0
+            warmup = lookback + 1
+        self.warmup = warmup
+
         now = datetime.now()
         delta = timedelta(seconds=self.timeframe.value * self.warmup)
 
@@ -89,6 +137,9 @@ class Engine(BaseClass):
                                                     self.timeframe,
                                                     start_date=(now - delta),
                                                     end_date=now)
-        self.strategy = self.strategy(self.broker, self.candles)
+        self.strategy.timeseries = self.candles
 
-        self._run_loop()
+        if stream:
+            self._run_stream()
+        else:
+            self._run_loop()
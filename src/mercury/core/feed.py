@@ -0,0 +1,151 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Feed Module.
+
+Provide:
+    - Feed Class
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "Feed",
+]
+
+
+import numpy as np
+
+from .timeseries import (Timeframe, Timeseries, _NS, _Resampler,
+                         _bucket_dates, _buckets)
+from ..lib import BaseClass
+from ..lib.flexarray import _allocate
+
+
+def _ends(index: np.ndarray, timeframe: Timeframe) -> np.ndarray:
+    """Return the closing datetime of bars, as int64 nanoseconds."""
+    stamps = index.astype("datetime64[ns]").astype(np.int64)
+    if timeframe is None:
+        return stamps
+    if timeframe is Timeframe.MN:
+        return _bucket_dates(_buckets(index, timeframe) + 1,
+                             timeframe).astype(np.int64)
+    return stamps + timeframe.value * _NS
+
+
+class Feed(BaseClass):
+    """Extra timeseries of a strategy, in sync with its base timeseries.
+
+    A feed is either derived from the base timeseries, resampled into a
+    higher timeframe, or a timeseries loaded separately. Its cursor follows
+    the base one so that only the bars completed at the time of the current
+    base bar are exposed: a D1 bar shows up once the last H1 bar of the day
+    is under the base cursor.
+
+    The feed cursor of every base cursor position is precomputed in a
+    single vectorized pass into an int64 array, so keeping the feed in sync
+    costs O(1) per bar. Rows appended to the base timeseries (live sessions)
+    extend the map, its buffer doubling its capacity when full, and, for
+    derived feeds, are folded into the feed bars.
+
+    Attributes:
+        timeframe (Timeframe): feed timeframe.
+        timeseries (Timeseries): feed data, built on the first sync for
+            derived feeds.
+
+    Usage::
+
+        >>> daily = Feed(Timeframe.D1)
+        >>> daily.sync(hourly).close[-1]  # last completed daily close
+    """
+    def __init__(self, timeframe: Timeframe = None, *,
+                 timeseries: Timeseries = None) -> None:
+        """Class Initializer.
+
+        Args:
+            timeframe: timeframe to resample the base timeseries into.
+            timeseries: separately loaded timeseries, in place of a derived
+                one.
+
+        Raises:
+            ValueError: neither or both a timeframe and a timeseries are
+                given.
+        """
+        if (timeframe is None) == (timeseries is None):
+            raise ValueError("Either a timeframe or a timeseries is required")
+        self.timeframe = timeframe or timeseries.timeframe
+        self.timeseries = timeseries
+        self._derived = timeseries is None
+        self._base = None
+        self._revision = None
+        self._amends = 0
+        self._resampler = None
+        self._folded = 0
+        self._ends = None
+        self._positions = np.zeros(1, dtype=np.int64)
+        self._mapped = 0
+
+    def sync(self, base: Timeseries) -> Timeseries:
+        """Move the feed cursor in line with the base timeseries cursor.
+
+        Args:
+            base: timeseries the strategy runs on.
+
+        Returns:
+            The feed timeseries.
+
+        Raises:
+            ValueError: a derived feed timeframe is lower than the base one.
+        """
+        if base is not self._base or base._revision != self._revision:
+            self._bind(base)
+        elif base._size >= self._mapped or base._amends != self._amends:
+            self._extend(base)
+        # no feed bar may be completed yet, exposing an empty timeseries
+        self.timeseries._set_cursor(int(self._positions[base._cursor]))
+        return self.timeseries
+
+    def _bind(self, base: Timeseries) -> None:
+        """Build the feed and the cursor map of a new base timeseries."""
+        self._base = base
+        self._revision = base._revision
+        self._amends = base._amends
+        if self._derived:
+            size = base._size
+            self.timeseries = base.resample(self.timeframe)
+            last = (_buckets(base._data["index"][size - 1:size],
+                             self.timeframe)[0] if size else None)
+            self._resampler = _Resampler(base, self.timeseries, last)
+            self._folded = size
+        self._ends = None
+        self._positions = np.zeros(base._size + 1, dtype=np.int64)
+        self._mapped = 1
+        self._extend(base)
+
+    def _extend(self, base: Timeseries) -> None:
+        """Map the base rows not mapped yet to a feed cursor."""
+        size = base._size
+        # the last row folded is folded again if updated in place since
+        start = self._folded - (base._amends != self._amends)
+        self._amends = base._amends
+        if self._resampler is not None and start < size:
+            self._resampler(start, size - start)
+            self._folded = size
+
+        feed = self.timeseries
+        if self._ends is None or len(self._ends) != feed._size:
+            self._ends = _ends(feed._data["index"][:feed._size],
+                               self.timeframe)
+        start = self._mapped - 1
+        if size + 1 > len(self._positions):
+            self._positions = _allocate(self._positions[:self._mapped],
+                                        max(size + 1,
+                                            2 * len(self._positions)))
+        ends = _ends(base._data["index"][start:size], base.timeframe)
+        self._positions[start + 1:size + 1] = np.searchsorted(
+            self._ends, ends, side="right")
+        self._mapped = size + 1
@@ -0,0 +1,177 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Panel Module.
+
+Provide:
+    - Panel Class
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "Panel",
+]
+
+
+from typing import Any, List, Sequence
+
+import numpy as np
+
+import pandas as pd
+
+from .timeseries import Timeframe, Timeseries
+from ..lib import BaseClass
+from ..lib.flexarray import Row
+
+
+class PanelRow(Row):
+    """Values of every instrument under the cursor of a Panel.
+
+    Each field is an array of one value per instrument, the index (usually
+    "date") is the shared datetime of the bar.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        """Override __getitem__."""
+        owner = self._owner
+        key = owner._keys[key]
+        if key == "index":
+            return pd.Timestamp(owner._data["index"][owner._cursor - 1])
+        return owner._data[key][:, owner._cursor - 1]
+
+
+class Panel(BaseClass):
+    """Several instruments aligned on a shared time axis.
+
+    Values are stored in a single `(instruments, bars, fields)` array, the
+    time axis being the union of every instrument datetimes. Bars missing
+    for an instrument are NaN, unless `fill` is enabled in which case
+    prices are carried forward from the previous bar and volumes are 0.
+    `available` tells which bars were actually provided.
+
+    Like a `Timeseries`, a Panel has a single cursor and exposes fields as
+    attributes bounded by it, shaped `(instruments, cursor)`, so the last
+    close of every instrument is `panel.close[:, -1]`. A Panel can be given
+    to `mercury.backtest.Simulator` in place of a Timeseries to step every
+    instrument in one pass.
+
+    Attributes:
+        instruments (list): instrument names, in storage order.
+        timeframe (Timeframe): data timeframe scale.
+        fields (list): fields name, in storage order.
+    """
+    def __init__(self, timeseries: Sequence[Timeseries], *,
+                 fields: List[str] = None, fill: bool = False) -> None:
+        """Class Initializer.
+
+        Args:
+            timeseries: one timeseries per instrument, sharing a timeframe.
+            fields: fields to keep, defaults to the columns of the first
+                timeseries.
+            fill: carry prices forward on missing bars.
+
+        Raises:
+            ValueError: timeseries do not share the same timeframe.
+        """
+        timeframes = {series.timeframe for series in timeseries}
+        if len(timeframes) > 1:
+            raise ValueError("Timeseries must share the same timeframe")
+
+        self.instruments = [series.instrument for series in timeseries]
+        self.timeframe: Timeframe = timeframes.pop() if timeframes else None
+        self.fields = fields or [key for key in timeseries[0]._data
+                                 if key != "index"]
+
+        indexes = [series._data["index"][:series._size]
+                   for series in timeseries]
+        index = np.unique(np.concatenate(indexes))
+        block = np.full((len(timeseries), len(index), len(self.fields)),
+                        np.nan)
+        available = np.zeros((len(timeseries), len(index)), dtype=bool)
+        for position, (series, dates) in enumerate(zip(timeseries, indexes)):
+            bars = np.searchsorted(index, dates)
+            available[position, bars] = True
+            for field, key in enumerate(self.fields):
+                block[position, bars, field] = series._data[key][:len(dates)]
+        if fill:
+            self._fill(block, available)
+
+        self._block = block
+        self._available = available
+        self._index_name = timeseries[0]._index_name
+        self._data = {key: block[:, :, field]
+                      for field, key in enumerate(self.fields)}
+        self._data["index"] = index
+        self._keys = {key: key for key in self._data}
+        self._keys[self._index_name] = "index"
+        self._cache = {}
+        self._row = PanelRow(self)
+        self._cursor = len(index)
+
+    def _fill(self, block: np.ndarray, available: np.ndarray) -> None:
+        """Carry prices forward on missing bars, volumes being 0."""
+        bars = np.arange(block.shape[1])
+        last = np.maximum.accumulate(np.where(available, bars, 0), axis=1)
+        instruments = np.arange(block.shape[0])[:, None]
+        block[:] = block[instruments, last]
+        if "volume" in self.fields:
+            block[:, :, self.fields.index("volume")][~available] = 0
+
+    def __getitem__(self, item: str) -> np.ndarray:
+        """Override __getitem__."""
+        return getattr(self, item)
+
+    def __getattr__(self, item: str) -> np.ndarray:
+        """Override __getattr__."""
+        if item.startswith("_"):
+            raise AttributeError(item)
+        try:
+            return self._get_slice(item)
+        except KeyError:
+            raise KeyError("Field '{}' not in data".format(item)) from None
+
+    def __len__(self) -> int:
+        """Override __len__."""
+        return self._cursor
+
+    def _get_slice(self, key: str) -> np.ndarray:
+        """Extract the values up to the cursor."""
+        data = self._cache.get(key)
+        if data is None:
+            data = self._data[self._keys[key]]
+            data = data[..., :self._cursor]
+            self._cache[key] = data
+        return data
+
+    @property
+    def available(self) -> np.ndarray:
+        """Mask of the bars provided by each instrument, up to the cursor."""
+        return self._available[:, :self._cursor]
+
+    @property
+    def current(self) -> PanelRow:
+        """Return the values of every instrument under the cursor."""
+        return self._row
+
+    def set_cursor(self, cursor: int) -> None:
+        """Set the cursor shared by all instruments.
+
+        Raises:
+            IndexError: the cursor is not within `1` and the number of bars.
+        """
+        bars = len(self._data["index"])
+        if not 0 < cursor <= bars:
+            raise IndexError(f"Cursor {cursor} out of range (1 to {bars})")
+        self._cursor = cursor
+        if self._cache:
+            self._cache.clear()
+
+    def instrument(self, name: str) -> int:
+        """Return the position of an instrument along the first axis."""
+        return self.instruments.index(name)
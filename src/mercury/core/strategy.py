@@ -6,6 +6,7 @@
 
 Provide:
     - Indicator Class
+    - Parameter Descriptor
     - Strategy Interface
 """
 
@@ -16,34 +17,127 @@ __copyright__ = "Copyright 2019 - 2021 Richard Kemp"
 __revision__ = "$Id$"
 __all__ = [
     "Indicator",
+    "Parameter",
     "Strategy",
 ]
 
 
+import copy
 from abc import ABCMeta, abstractmethod
-from typing import Callable, List
+from typing import (Any, Callable, Dict, Hashable, List, Optional, Sequence,
+                    Union)
 
 import numpy as np
 
 from ..core.broker import Broker
-from ..core.timeseries import Timeseries
+from ..core.feed import Feed
+from ..core.timeseries import Timeframe, Timeseries
 from ..lib import BaseClass
+from ..lib.flexarray import Column, Row
 
 
 class Indicator(BaseClass):
     """An indicator to use in Strategy.
 
-    TODO: doc here
+    Values are computed up to the timeseries cursor and cached: reading an
+    indicator several times within a tick costs nothing, only the bars
+    added since the last read are computed.
+
+    An indicator is defined either by a batch function `func(timeseries)`
+    returning the values of all the bars up to the cursor, or by a `stream`
+    factory returning a stateful updater `update(row) -> float` called once
+    per new bar with the bar values (a `Row`). Streaming indicators update
+    in O(1) when the cursor advances, batch ones are recomputed over the
+    whole timeseries each time the cursor moves. Both start over only when
+    the history is rewritten (e.g. the timeseries data is replaced). When
+    the last bar is updated in place (the open bar of an incremental
+    resample), only that bar is computed again: streaming indicators then
+    resume from a `copy.deepcopy` of their updater taken before it, which
+    requires an updater holding its state in an object (e.g. a bound
+    method), closures being started over. When
+    both are given, the batch function is only used to precompute the
+    indicator (see `precompute`). `mercury.indicators` provides common
+    indicators defined both ways.
+
+    A batch function only needing the last bars can declare a `window`: it
+    is then called once per new bar with a zero-copy slice of the last
+    `window` bars only (see `FlexArray.view`), the value of the bar being
+    the last one returned. Each bar costs O(window) instead of the whole
+    history, which keeps a long live session cost flat.
+
+    Indicators can be computed from other ones, named in `inputs`: they
+    form a graph in which each indicator is evaluated at most once per
+    cursor position, however many indicators depend on it or how many
+    times it is read. Input values are given after the timeseries, as
+    arrays to `func(timeseries, *inputs)` and as the values of the new bar
+    to `update(row, *inputs)`. The `hits` and `misses` counters tell how
+    many reads were served from the cache or had to compute.
+
+    Usage::
+
+        >>> def sma(timeperiod):
+        ...     def stream():
+        ...         window = collections.deque(maxlen=timeperiod)
+        ...         def update(row):
+        ...             window.append(row["close"])
+        ...             if len(window) < timeperiod:
+        ...                 return float("NaN")
+        ...             return sum(window) / timeperiod
+        ...         return update
+        ...     return stream
+        >>> Indicator("sma10", stream=sma(10))
+        >>> Indicator("spread", inputs=["sma10"],
+        ...           stream=lambda: lambda row, sma: row.close - sma)
     """
-    def __init__(self, name: str, func: Callable, *,
-                 plot: bool = True, overlay: bool = False,
-                 color: str = None, scatter: bool = False) -> None:
-        """Initialize."""
+    def __init__(self, name: str, func: Callable = None, *,
+                 stream: Callable[[], Callable[[Row], float]] = None,
+                 inputs: Sequence[str] = (), key: Hashable = None,
+                 lookback: int = None, window: int = None,
+                 plot: bool = True,
+                 overlay: bool = False, color: str = None,
+                 scatter: bool = False) -> None:
+        """Initialize.
+
+        Args:
+            name: indicator name, used as the strategy attribute name.
+            func: batch function computing all the values of a timeseries.
+            stream: factory of a streaming updater, preferred over `func`
+                when stepping bar per bar.
+            inputs: name of the indicators this one is computed from, they
+                must be added to the strategy before it.
+            key: identifies the computation (e.g. the function and its
+                parameters), precomputed indicators sharing a key and
+                inputs share their values across runs (see
+                `Strategy.precompute`).
+            lookback: number of bars needed before the first value, on
+                top of the inputs ones. Detected from the leading NaN
+                values once computed when omitted.
+            window: number of trailing bars given to `func`, which is
+                then called for each bar. Ignored with a `stream`.
+            plot: plot the indicator.
+            overlay: plot the indicator over the prices.
+            color: plot color.
+            scatter: plot the values as points.
+
+        Raises:
+            ValueError: neither `func` nor `stream` given.
+        """
+        if func is None and stream is None:
+            raise ValueError("An indicator needs a `func` or a `stream`")
         self.name = name
         self._func = func
+        self._stream = stream
+        self.inputs = list(inputs)
+        self.key = key
+        self._lookback = lookback
+        self.window = window
+        self._inputs: List[Indicator] = []
+        self.hits = 0
+        self.misses = 0
         self.params = {"plot": plot, "overlay": overlay,
                        "color": color, "scatter": scatter}
         self._data = np.array([])
+        self._reset(None)
 
     def __getitem__(self, index: int) -> float:
         """Override __getitem__."""
@@ -77,14 +171,222 @@ class Indicator(BaseClass):
         """Override __str__."""
         return str(float(self))
 
+    def _reset(self, timeseries: Timeseries) -> None:
+        """Drop computed values and state, to start over on `timeseries`."""
+        self._source = timeseries
+        self._revision = getattr(timeseries, "_revision", None)
+        self._amends = getattr(timeseries, "_amends", 0)
+        self._buffer = np.empty(0)
+        self._size = 0
+        self._cursor = None
+        self._precomputed = False
+        self._update = None
+        self._settled = None
+        if self._stream is not None and timeseries is not None:
+            self._update = self._stream()
+
+    def _sync(self, timeseries: Timeseries) -> None:
+        """Drop the values the timeseries changes made stale."""
+        if (timeseries is not self._source or
+                getattr(timeseries, "_revision", None) != self._revision):
+            self._reset(timeseries)
+        elif getattr(timeseries, "_amends", 0) != self._amends:
+            self._rewind(timeseries)
+
+    def _rewind(self, timeseries: Timeseries) -> None:
+        """Drop the last bar computed, updated in place since."""
+        self._amends = timeseries._amends
+        self._size = max(0, self._size - 1)
+        self._cursor = None
+        # without a state saved before the bar a stream starts over
+        self._update, self._settled = self._settled, None
+        if self._precomputed:
+            # precomputed values may be shared, they are never modified
+            self._buffer = self._buffer[:self._size]
+
+    def _checkpoint(self, timeseries: Timeseries) -> None:
+        """Save the streaming state before the last bar, to rewind it."""
+        self._settled = None
+        if getattr(timeseries, "_amendable", False):
+            settled = copy.deepcopy(self._update)
+            # closures are returned as is, their state cannot be saved
+            if settled is not self._update:
+                self._settled = settled
+
     def apply(self, timeseries: Timeseries) -> None:
-        """Run the indicator function against a timeseries and store it."""
-        self._data = self._func(timeseries)
+        """Compute the indicator up to the timeseries cursor.
+
+        Inputs are computed first. Only the bars not computed yet are
+        processed, along with the last one computed if it was updated in
+        place, unless the timeseries changed or its history was rewritten
+        since the last call.
+        """
+        for indicator in self._inputs:
+            indicator.apply(timeseries)
+
+        cursor = len(timeseries)
+        self._sync(timeseries)
+        if (cursor == self._cursor or
+                self._precomputed and cursor <= self._size):
+            self.hits += 1
+            return
+        self.misses += 1
+        # bars added after a precomputation are computed incrementally
+        self._precomputed = False
+
+        if self._stream is None and self.window is None:
+            self._data = self._func(timeseries, *self._input_values())
+        else:
+            if cursor > self._size:
+                self._extend(timeseries, cursor)
+            self._data = self._buffer[:cursor]
+        self._cursor = cursor
+
+    def precompute(self, timeseries: Timeseries,
+                   cache: Dict[Hashable, tuple] = None) -> None:
+        """Compute the indicator once over all the bars up to the cursor.
+
+        Values are then exposed through a `Column` bounded by the
+        timeseries cursor, so moving the cursor backward (e.g. to step a
+        backtest) costs nothing and never exposes values of bars beyond it.
+        A batch `func` must only use past values to compute each bar, as
+        `talib` functions do, for this to hold.
+
+        Args:
+            timeseries: timeseries to compute the indicator for.
+            cache: values of indicators already precomputed, by key. The
+                values are reused when an entry matches the key of the
+                indicator and the timeseries state, otherwise they are
+                computed and stored in it. Values stored are never modified.
+        """
+        for indicator in self._inputs:
+            indicator.apply(timeseries)
+
+        cursor = len(timeseries)
+        self._reset(timeseries)
+        entry = (timeseries, self._revision, cursor)
+        key = self._cache_key() if cache is not None else None
+        cached = cache.get(key) if key is not None else None
+        if cached is not None and cached[:3] == entry:
+            self.hits += 1
+            self._buffer = cached[3]
+            self._size = cursor
+            self._update = None
+        else:
+            self.misses += 1
+            self._compute(timeseries, cursor)
+            if key is not None:
+                cache[key] = entry + (self._buffer,)
+        self._data = Column(self._buffer, timeseries)
+        self._cursor = cursor
+        self._precomputed = True
+
+    def _cache_key(self) -> Optional[Hashable]:
+        """Return the key of the values, made of the inputs ones too.
+
+        Indicators without a key, or with an input without one, are not
+        cached (`None`).
+        """
+        keys = tuple(source._cache_key() for source in self._inputs)
+        if self.key is None or None in keys:
+            return None
+        return (self.key, keys) if keys else self.key
+
+    def _compute(self, timeseries: Timeseries, cursor: int) -> None:
+        """Compute the values of all the bars up to `cursor`."""
+        if self._func is not None and (self._stream is not None or
+                                       self.window is None):
+            self._buffer = np.asarray(
+                self._func(timeseries, *self._input_values()), dtype=float)
+            self._size = cursor
+            # the streaming state is rebuilt if bars are appended
+            self._update = None
+        else:
+            self._extend(timeseries, cursor)
+            # bounded so growing it for new bars copies the cached values
+            self._buffer = self._buffer[:cursor]
+
+    def _input_values(self) -> List[np.ndarray]:
+        """Return the values of the inputs, up to their cursor."""
+        return [np.asarray(indicator.data()) for indicator in self._inputs]
+
+    def _extend(self, timeseries: Timeseries, cursor: int) -> None:
+        """Compute one by one the bars from the last computed to `cursor`."""
+        if self._stream is not None and self._update is None:
+            # values were precomputed in batch, no streaming state to resume
+            self._reset(timeseries)
+        if cursor > len(self._buffer):
+            buffer = np.empty(max(cursor, 2 * len(self._buffer)))
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+
+        if self._stream is None:
+            self._slide(timeseries, cursor)
+        else:
+            self._feed(timeseries, cursor)
+        self._size = cursor
+
+    def _slide(self, timeseries: Timeseries, cursor: int) -> None:
+        """Call the batch function on the trailing window of each bar."""
+        buffer, func, window = self._buffer, self._func, self.window
+        inputs = self._input_values()
+        for position in range(self._size + 1, cursor + 1):
+            start = max(0, position - window)
+            values = func(timeseries.view(start, position),
+                          *(values[start:position] for values in inputs))
+            buffer[position - 1] = np.asarray(values)[-1]
+
+    def _feed(self, timeseries: Timeseries, cursor: int) -> None:
+        """Feed the streaming updater with each bar."""
+        buffer, update, row = self._buffer, self._update, timeseries.current
+        inputs = self._input_values()
+        if cursor == self._size + 1:
+            # usual case when stepping, the new bar is under the cursor
+            self._checkpoint(timeseries)
+            buffer[self._size] = update(row, *(values[self._size]
+                                               for values in inputs))
+        else:
+            try:
+                for position in range(self._size + 1, cursor + 1):
+                    timeseries.set_cursor(position)
+                    if position == cursor:
+                        self._checkpoint(timeseries)
+                    buffer[position - 1] = update(
+                        row, *(values[position - 1] for values in inputs))
+            finally:
+                timeseries.set_cursor(cursor)
 
     def data(self) -> List[float]:
         """Return all computed values."""
+        if isinstance(self._data, Column):
+            return self._data.values
         return self._data
 
+    @property
+    def values(self) -> np.ndarray:
+        """Return the computed values up to the cursor, as a numpy array."""
+        data = self._data
+        if isinstance(data, Column):
+            return data.values
+        return np.asarray(data)
+
+    @property
+    def lookback(self) -> Optional[int]:
+        """Number of bars needed before the first value of the indicator.
+
+        The declared lookback plus the largest one of the inputs. When not
+        declared, it is the number of leading NaN values computed, `None`
+        if unknown yet (nothing computed or no value yet).
+        """
+        if self._lookback is None:
+            valid = ~np.isnan(self.values)
+            return int(valid.argmax()) if valid.any() else None
+
+        lookbacks = [indicator.lookback for indicator in self._inputs]
+        if None in lookbacks:
+            return None
+        return self._lookback + max(lookbacks, default=0)
+
     def previous(self, shift: int = 1) -> float:
         """Return previous value based on a shift."""
         try:
@@ -95,6 +397,48 @@ class Indicator(BaseClass):
         return value
 
 
+class Parameter(BaseClass):
+    """A strategy parameter, declared as a Strategy class attribute.
+
+    Parameters are given as keyword arguments to the strategy (see
+    `Simulator.run` and `Simulator.optimize`) and read as attributes,
+    defaulting to their declared value. A sweep can then vary them
+    without subclassing the strategy.
+
+    Usage::
+
+        >>> class MyStrategy(Strategy):
+        ...     fast = Parameter(10, values=range(5, 50, 5))
+        ...
+        ...     def setup(self):
+        ...         self.add_indicator(SMA(self.fast).indicator("fast"))
+    """
+    def __init__(self, default: Any, *, values: Sequence = None) -> None:
+        """Class Initializer.
+
+        Args:
+            default: value used when the parameter is not given.
+            values: values to sweep by default when optimizing.
+        """
+        self.default = default
+        self.values = values
+        self.name = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        """Bind the descriptor to its attribute name."""
+        self.name = name
+
+    def __get__(self, instance: Strategy, owner: type = None) -> Any:
+        """Return the strategy value of the parameter."""
+        if instance is None:
+            return self
+        return instance._params.get(self.name, self.default)
+
+    def __set__(self, instance: Strategy, value: Any) -> None:
+        """Set the strategy value of the parameter."""
+        instance._params[self.name] = value
+
+
 class StrategyMeta(ABCMeta, type(BaseClass)):
     """Strategy metaclass wrapper.
 
@@ -110,22 +454,48 @@ class Strategy(metaclass=StrategyMeta):
     Extend this class and override methods
     `mercury.Strategy.setup` and
     `mercury.Strategy.tick` to define your own strategy.
+
+    Tunable values are declared as `Parameter` class attributes, extra
+    timeframes with `add_feed`.
     """
-    def __init__(self, broker: Broker, timeseries: Timeseries) -> None:
-        """Initialize."""
+    def __init__(self, broker: Broker, timeseries: Timeseries,
+                 **params: Any) -> None:
+        """Initialize.
+
+        Args:
+            broker: broker to trade with.
+            timeseries: data to run the strategy on.
+            params: values of the strategy parameters, by name.
+
+        Raises:
+            TypeError: a parameter is not declared by the strategy.
+        """
+        self._params = {}
         self._indicators = {}
+        self._feeds = {}
+        declared = self.parameters()
+        for name, value in params.items():
+            if name not in declared:
+                raise TypeError(f"Unknown strategy parameter '{name}'")
+            setattr(self, name, value)
         self.broker = broker
         self.timeseries = timeseries
         self.setup()
 
-    def __getattr__(self, name: str) -> Indicator:
-        """Override __getattr__."""
-        # TODO: do not recompute but move the indicator's cursor in some way
-        # like for candles
-        indicator = self._indicators[name]
-        indicator.apply(self.timeseries)
+    def __getattr__(self, name: str) -> Union[Indicator, Timeseries]:
+        """Return an indicator or a feed, up to the timeseries cursor."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        indicator = self._indicators.get(name)
+        if indicator is not None:
+            indicator.apply(self.timeseries)
+            return indicator
+        try:
+            feed = self._feeds[name]
+        except KeyError:
+            raise AttributeError(name) from None
 
-        return indicator
+        return feed.sync(self.timeseries)
 
     @abstractmethod
     def setup(self) -> None:
@@ -146,9 +516,107 @@ class Strategy(metaclass=StrategyMeta):
             super().tick()
         """
 
+    @classmethod
+    def parameters(cls) -> Dict[str, Parameter]:
+        """Return the parameters declared by the strategy, by name."""
+        return {name: value for klass in reversed(cls.__mro__)
+                for name, value in vars(klass).items()
+                if isinstance(value, Parameter)}
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """Return the value of every strategy parameter, by name."""
+        return {name: getattr(self, name) for name in self.parameters()}
+
+    def signals(self) -> Dict[str, Any]:
+        """Return the strategy rules as arrays over the whole timeseries.
+
+        Optional, for strategies simple enough to be expressed as entry and
+        exit masks, e.g. from `mercury.lib.crossover_mask`: such strategies
+        can be backtested by `mercury.backtest.Simulator.simulate` in a
+        single compiled pass instead of bar per bar. Indicators are
+        precomputed beforehand.
+
+        Returns:
+            The keyword arguments of `mercury.backtest.kernel.simulate`:
+            `entries` and `exits` masks, plus optionally `size`,
+            `direction`, `stop_loss` and `take_profit`.
+
+        Raises:
+            NotImplementedError: the strategy only runs bar per bar.
+        """
+        raise NotImplementedError()
+
+    def precompute(self, cache: Dict[Hashable, tuple] = None) -> None:
+        """Compute every indicator once over the whole timeseries.
+
+        Meant for backtests where all the bars are known upfront: the
+        indicators are computed up to the current cursor (the end of the
+        data before a run) and set as plain attributes of the strategy, so
+        reading one while stepping the cursor back from the start is a
+        mere attribute lookup. See `Indicator.precompute`.
+
+        Args:
+            cache: indicator values shared between runs (e.g. of a
+                parameter sweep), indicators with a key being computed
+                once for all the runs.
+        """
+        for name, indicator in self._indicators.items():
+            indicator.precompute(self.timeseries, cache)
+            setattr(self, name, indicator)
+
     def add_indicator(self, indicator: Indicator) -> None:
         """Add an indicator in the strategy.
 
-        TODO: write the doc here
+        The indicator is then available as a strategy attribute named after
+        it, computed up to the timeseries cursor on access.
+
+        Raises:
+            KeyError: an input of the indicator is not added yet.
         """
+        indicator._inputs = [self._indicators[name]
+                             for name in indicator.inputs]
         self._indicators[indicator.name] = indicator
+
+    def add_feed(self, name: str, timeframe: Timeframe = None, *,
+                 timeseries: Timeseries = None) -> None:
+        """Add an extra timeframe in the strategy.
+
+        The feed is then available as a strategy attribute named after it,
+        a timeseries whose cursor follows the strategy timeseries one, only
+        exposing the bars completed at the time of the current bar. See
+        `Feed`.
+
+        Args:
+            name: feed name.
+            timeframe: higher timeframe to resample the strategy timeseries
+                into.
+            timeseries: separately loaded timeseries, in place of a
+                resampled one.
+
+        Usage::
+
+            >>> def setup(self):
+            ...     self.add_feed("daily", Timeframe.D1)
+            >>> def tick(self):
+            ...     trend = self.daily.close[-1] > self.daily.close[-2]
+        """
+        self._feeds[name] = Feed(timeframe, timeseries=timeseries)
+
+    @property
+    def lookback(self) -> Optional[int]:
+        """Number of bars needed before every indicator has a value.
+
+        `None` if the lookback of an indicator is unknown, see
+        `Indicator.lookback`.
+        """
+        lookbacks = [indicator.lookback
+                     for indicator in self._indicators.values()]
+        if None in lookbacks:
+            return None
+        return max(lookbacks, default=0)
+
+    def cache_info(self) -> Dict[str, Dict[str, int]]:
+        """Return the cache hits and misses of each indicator."""
+        return {name: {"hits": indicator.hits, "misses": indicator.misses}
+                for name, indicator in self._indicators.items()}
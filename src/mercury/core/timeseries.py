@@ -9,18 +9,29 @@ Provide:
     - Timeseries Class
 """
 
+from __future__ import annotations
+
+
 __copyright__ = "Copyright 2019 - 2021 Richard Kemp"
 __revision__ = "$Id$"
 __all__ = [
+    "COMPACT_DTYPES",
+    "RESAMPLE_RULES",
     "Timeframe",
     "Timeseries",
 ]
 
+import operator
+from datetime import datetime
 from enum import Enum
+from typing import Any, Dict, Union
+
+import numpy as np
 
-from pandas import DataFrame
+from pandas import DataFrame, Timestamp
 
-from ..lib.flexarray import FlexArray
+from ..lib import columnfile
+from ..lib.flexarray import FlexArray, Row, _allocate, _allocate_blocks
 
 
 class Timeframe(Enum):
@@ -53,28 +64,344 @@ class Timeframe(Enum):
     MN = 43200 * 60
 
 
+COMPACT_DTYPES = {
+    "open": np.float32,
+    "high": np.float32,
+    "low": np.float32,
+    "close": np.float32,
+    "adj_close": np.float32,
+    "volume": np.int32,
+}
+"""Storage dtypes halving the memory footprint of OHLCV data."""
+
+
+RESAMPLE_RULES = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+}
+"""How each column is aggregated when resampling, "last" by default."""
+
+_BATCH_RULES = {
+    "first": lambda values, starts: values[starts],
+    "last": lambda values, starts: values[np.r_[starts[1:], len(values)] - 1],
+    "max": np.maximum.reduceat,
+    "min": np.minimum.reduceat,
+    "sum": np.add.reduceat,
+}
+
+_MERGE_RULES = {
+    "first": lambda current, value: current,
+    "last": lambda current, value: value,
+    "max": max,
+    "min": min,
+    "sum": operator.add,
+}
+
+_NS = 10 ** 9
+_FIRST = np.zeros(1, dtype=np.intp)  # `starts` of a single group
+_WEEK_SHIFT = 4 * 86400 * _NS  # 1970-01-01 is a thursday, weeks start monday
+
+
+def _buckets(index: np.ndarray, timeframe: Timeframe) -> np.ndarray:
+    """Return the timeframe period number of each datetime of an index."""
+    if timeframe is Timeframe.MN:
+        return index.astype("datetime64[M]").astype(np.int64)
+    stamps = index.astype("datetime64[ns]").astype(np.int64)
+    if timeframe is Timeframe.W1:
+        stamps = stamps - _WEEK_SHIFT
+    return stamps // (timeframe.value * _NS)
+
+
+def _bucket_dates(buckets: np.ndarray, timeframe: Timeframe) -> np.ndarray:
+    """Return the starting datetime of timeframe periods."""
+    if timeframe is Timeframe.MN:
+        return buckets.astype("datetime64[M]").astype("datetime64[ns]")
+    stamps = buckets * (timeframe.value * _NS)
+    if timeframe is Timeframe.W1:
+        stamps = stamps + _WEEK_SHIFT
+    return stamps.astype("datetime64[ns]")
+
+
+class _Resampler():
+    """Keep a resampled timeseries up to date with its source.
+
+    Each appended source row either updates the last (open) bar of the
+    target in place or starts a new one, in O(1). Source rows rewritten in
+    place (the open bar of a source which is itself resampled) have the
+    open bar of the target aggregated again from its source rows.
+
+    The target is notified of its open bar updates (see `FlexArray._amend`),
+    so indicators and resamples chained on it only compute that bar again.
+    """
+    def __init__(self, source: Timeseries, target: Timeseries,
+                 last: int) -> None:
+        """Bind a source to its resampled target."""
+        self.source = source
+        self.target = target
+        self.target._amendable = True
+        self.last = last
+        self.size = source._size
+        self.first = (int(np.searchsorted(
+            source._data["index"][:self.size],
+            _bucket_dates(np.array([last]), target.timeframe)[0]))
+            if self.size else 0)
+
+    def __call__(self, start: int, count: int) -> None:
+        """Fold the source rows appended or rewritten from `start`."""
+        end = start + count
+        if start < self.size:
+            self._refold()
+            start = self.size
+        self.size = max(self.size, end)
+
+        source = self.source._data
+        target = self.target
+        timeframe = target.timeframe
+        buckets = _buckets(source["index"][start:end], timeframe)
+        for row, bucket in zip(range(start, end), buckets):
+            values = {key: data[row] for key, data in source.items()
+                      if key != "index"}
+            if bucket == self.last:
+                position = target._size - 1
+                for key, value in values.items():
+                    rule = _MERGE_RULES[RESAMPLE_RULES.get(key, "last")]
+                    data = target._data[key]
+                    data[position] = rule(data[position], value)
+                target._amend()
+            else:
+                self.last = bucket
+                self.first = row
+                values["index"] = _bucket_dates(np.array([bucket]),
+                                                timeframe)[0]
+                target._write(target._size, values, 1)
+
+    def _refold(self) -> None:
+        """Aggregate the open bar of the target again from its rows."""
+        position = self.target._size - 1
+        rows = slice(self.first, self.size)
+        for key, data in self.source._data.items():
+            if key != "index":
+                rule = _BATCH_RULES[RESAMPLE_RULES.get(key, "last")]
+                self.target._data[key][position] = rule(data[rows], _FIRST)[0]
+        self.target._amend()
+
+
 class Timeseries(FlexArray):
     """Timeseries Class.
 
     A classic financial timeseries representation, normalized for internal
     library usage.
 
+    Values are held in contiguous numpy blocks (see `FlexArray`), pass
+    `dtypes=COMPACT_DTYPES` to store prices as float32 and volumes as int32
+    when lots of history have to be kept in memory.
+
     Attributes:
         instrument (str): name of the instrument data belongs to.
         timeframe (Timeframe): data timeframe scale.
         data (DataFrame): pandas DataFrame representation of data.
     """
     def __init__(self, instrument: str, timeframe: Timeframe,
-                 dataframe: DataFrame) -> None:
+                 dataframe: DataFrame = None, *, dtypes: Dict[str, Any] = None,
+                 views: bool = False) -> None:
         """Class Initializer.
 
         Args:
             instrument: name of the instrument data belongs to.
             timeframe: data timeframe scale.
-            dataframe: pandas DataFrame representation of data.
+            dataframe: pandas DataFrame representation of data, see
+                `Timeseries.from_arrays` to build it from numpy arrays.
+            dtypes: storage dtype by column name (see `COMPACT_DTYPES`).
+            views: expose columns as persistent cursor-bound views
+                (see `mercury.lib.flexarray.Column`).
         """
         self.instrument = instrument
         self.timeframe = timeframe
-        self.data = dataframe
 
-        super().__init__(dataframe)
+        super().__init__(dataframe, dtypes=dtypes, views=views)
+
+    @property
+    def data(self) -> DataFrame:
+        """Pandas DataFrame representation of data, built on demand."""
+        return self.dataframe
+
+    @classmethod
+    def from_arrays(cls, instrument: str, timeframe: Timeframe,
+                    columns: Dict[str, Any], *, index: str = "date",
+                    dtypes: Dict[str, Any] = None, copy: bool = True,
+                    views: bool = False) -> Timeseries:
+        """Build a timeseries straight from numpy columns, without pandas.
+
+        Args:
+            instrument: name of the instrument data belongs to.
+            timeframe: data timeframe scale.
+            columns: values by column name, arrays or sequences of the same
+                length, including the index (time axis) values.
+            index: name of the index column.
+            dtypes: storage dtype by column name (see `COMPACT_DTYPES`).
+            copy: copy the values into the contiguous internal storage. If
+                disabled, numpy arrays are used in place as buffers.
+            views: expose columns as persistent cursor-bound views.
+
+        Returns:
+            A new Timeseries.
+
+        Raises:
+            KeyError: the index column is missing.
+        """
+        columns = dict(columns)
+        dates = np.asarray(columns.pop(index))
+        if dates.dtype.kind in "OM":
+            dates = dates.astype("datetime64[ns]", copy=False)
+        dtypes = dtypes or {}
+        arrays = {key: np.asarray(values, dtype=dtypes.get(key))
+                  for key, values in columns.items()}
+
+        size = len(dates)
+        if copy:
+            arrays = _allocate_blocks(arrays, size, max(size, 1))
+            dates = _allocate(dates, max(size, 1))
+
+        timeseries = cls(instrument, timeframe, views=views)
+        timeseries._attach(arrays, dates, index, size)
+
+        return timeseries
+
+    def _search(self, date: Union[datetime, str], side: str) -> int:
+        """Binary search a datetime position on the int64 time axis."""
+        stamp = Timestamp(date).to_datetime64().astype("datetime64[ns]")
+        index = self._data["index"][:self._cursor]
+        return int(np.searchsorted(index.view(np.int64),
+                                   stamp.astype(np.int64), side=side))
+
+    def between(self, start: Union[datetime, str] = None,
+                end: Union[datetime, str] = None) -> Timeseries:
+        """Return the bars between two datetimes, both included.
+
+        Bounds are found by binary search on the time axis in O(log n) and
+        the result is a zero-copy view of this timeseries (see
+        `FlexArray.view`). Only bars before the cursor are considered.
+
+        Args:
+            start: first datetime, from the beginning if omitted.
+            end: last datetime, up to the cursor if omitted.
+
+        Returns:
+            A Timeseries view, possibly empty.
+        """
+        first = 0 if start is None else self._search(start, "left")
+        last = self._cursor if end is None else self._search(end, "right")
+        return self.view(first, last)
+
+    def at(self, date: Union[datetime, str]) -> Row:
+        """Return the bar at a given datetime, found by binary search.
+
+        Returns:
+            The `Row` of a single bar zero-copy view.
+
+        Raises:
+            KeyError: no bar at this datetime before the cursor.
+        """
+        position = self._search(date, "left")
+        index = self._data["index"]
+        if (position >= self._cursor or
+                index[position] != Timestamp(date).to_datetime64()):
+            raise KeyError(f"No bar at {date}")
+        return self.view(position, position + 1).current
+
+    def resample(self, timeframe: Timeframe, *,
+                 incremental: bool = False) -> Timeseries:
+        """Aggregate the timeseries into a higher timeframe.
+
+        Bars are grouped by timeframe period (calendar aligned, weeks start
+        on monday) and each column aggregated following `RESAMPLE_RULES`.
+        Groups are found in a single pass over the time axis and reduced
+        with numpy `reduceat`, no pandas involved.
+
+        Args:
+            timeframe: target timeframe, higher or equal to the current one.
+            incremental: keep the resampled timeseries up to date when rows
+                are appended to this one (e.g. by `Engine.increment_candles`),
+                the last, still open, bar being updated in place.
+
+        Returns:
+            A new Timeseries labelled with periods starting datetime.
+
+        Raises:
+            ValueError: the target timeframe is lower than the current one.
+        """
+        if self.timeframe and timeframe.value < self.timeframe.value:
+            raise ValueError(f"Cannot resample {self.timeframe.name} "
+                             f"into a lower timeframe {timeframe.name}")
+
+        size = self._size
+        buckets = _buckets(self._data["index"][:size], timeframe)
+        starts = np.flatnonzero(np.diff(buckets)) + 1
+        starts = np.r_[0, starts] if size else starts
+
+        columns = {}
+        for key, data in self._data.items():
+            if key == "index":
+                continue
+            rule = _BATCH_RULES[RESAMPLE_RULES.get(key, "last")]
+            columns[key] = (rule(data[:size], starts) if size
+                            else data[:0].copy())
+
+        columns[self._index_name] = _bucket_dates(buckets[starts], timeframe)
+        resampled = self.from_arrays(self.instrument, timeframe, columns,
+                                     index=self._index_name)
+        if incremental:
+            self.subscribe(_Resampler(self, resampled,
+                                      buckets[-1] if size else None))
+
+        return resampled
+
+    @classmethod
+    def from_file(cls, path: str, *, mode: str = "r",
+                  views: bool = False) -> Timeseries:
+        """Load a timeseries memory-mapped from a column file.
+
+        The file layout is described in `mercury.lib.columnfile`. Data is not
+        read upfront, pages are loaded by the OS when accessed, so histories
+        larger than the memory can be backtested. Appending to the
+        timeseries moves it into memory.
+
+        Args:
+            path: column file location, written by `Timeseries.to_file`.
+            mode: memory-map mode, "r" (read-only), "r+" (read-write) or
+                "c" (copy-on-write).
+            views: expose columns as persistent cursor-bound views.
+
+        Returns:
+            A memory-mapped Timeseries.
+        """
+        columns, index, header = columnfile.read(path, mode=mode)
+        metadata = header["metadata"]
+        timeseries = cls(metadata.get("instrument"),
+                         Timeframe[metadata["timeframe"]]
+                         if metadata.get("timeframe") else None,
+                         views=views)
+        timeseries._attach(columns, index, header["index"]["name"])
+
+        return timeseries
+
+    def to_file(self, path: str, *, dtypes: Dict[str, Any] = None) -> None:
+        """Write the whole timeseries to a column file.
+
+        Args:
+            path: target file location, overwritten if existing.
+            dtypes: dtype to store some columns with, by column name
+                (see `COMPACT_DTYPES`).
+        """
+        dtypes = dtypes or {}
+        size = self._size
+        columns = {key: data[:size].astype(dtypes.get(key, data.dtype),
+                                           copy=False)
+                   for key, data in self._data.items() if key != "index"}
+        metadata = {"instrument": self.instrument,
+                    "timeframe": self.timeframe and self.timeframe.name}
+        columnfile.write(path, columns, self._data["index"][:size],
+                         index_name=self._index_name, metadata=metadata)
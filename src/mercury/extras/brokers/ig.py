@@ -16,7 +16,7 @@ __all__ = [
 import json
 from datetime import datetime
 from functools import reduce
-from typing import List
+from typing import Dict, List
 
 # from mercury import (Account, AccountType, Broker, CurrencyCode,
 #                      Order, OrderAction, OrderType,
@@ -30,8 +30,6 @@ from mercury import (Account, AccountType, CurrencyCode,
 from mercury import Broker as AbcBroker
 from mercury.lib import Client
 
-import pandas as pd
-
 import requests
 
 
@@ -49,7 +47,7 @@ TIMEFRAME_MAP = {
 }
 
 
-def reduce_candles(candles) -> pd.DataFrame:
+def reduce_candles(candles) -> Dict[str, list]:
     init_candles = {"date": [], "open": [], "high": [], "low": [],
                     "close": [], "volume": []}
 
@@ -67,8 +65,7 @@ def reduce_candles(candles) -> pd.DataFrame:
         candles["volume"].append(candle["lastTradedVolume"])
         return candles
 
-    data = reduce(reducer, candles, init_candles)
-    return pd.DataFrame(data).set_index("date")
+    return reduce(reducer, candles, init_candles)
 
 
 class IgClientRequestError(Exception):
@@ -191,11 +188,8 @@ class Broker(AbcBroker):
         )
         response = self.request({}, method="get", endpoint=path)
 
-        dataframe = reduce_candles(response["prices"])
-
-        return Timeseries(instrument=instrument,
-                          timeframe=timeframe,
-                          dataframe=dataframe)
+        return Timeseries.from_arrays(instrument, timeframe,
+                                      reduce_candles(response["prices"]))
 
     def _api_get_positions(self, *args,
                            status: PositionStatus = None) -> List(Position):
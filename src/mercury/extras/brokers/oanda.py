@@ -23,11 +23,11 @@ from mercury import (Account, AccountType, CurrencyCode, OrderAction,
 from mercury import Broker as AbcBroker
 from mercury.lib import Client
 
+import numpy as np
+
 from oandapyV20 import API
 from oandapyV20.endpoints import accounts, instruments
 
-import pandas as pd
-
 
 class Broker(AbcBroker):
     """Oanda Broker."""
@@ -75,6 +75,7 @@ class Broker(AbcBroker):
                         "close": [], "volume": []}
 
         def reduce_candles(candles, candle):
+            candles["date"].append(candle["time"].rstrip("Z"))
             candles["open"].append(candle["mid"]["o"])
             candles["high"].append(candle["mid"]["h"])
             candles["low"].append(candle["mid"]["l"])
@@ -83,9 +84,11 @@ class Broker(AbcBroker):
             return candles
         candles = reduce(reduce_candles, data["candles"], init_candles)
 
-        return Timeseries(instrument=instrument,
-                          timeframe=timeframe,
-                          dataframe=pd.DataFrame(candles))
+        candles["date"] = np.array(candles["date"], dtype="datetime64[ns]")
+
+        return Timeseries.from_arrays(instrument, timeframe, candles,
+                                      dtypes={"open": float, "high": float,
+                                              "low": float, "close": float})
 
     def _api_get_positions(self, *args,
                            status: PositionStatus = None) -> List[Position]:
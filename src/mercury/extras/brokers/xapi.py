@@ -18,7 +18,7 @@ import time
 from datetime import datetime, timedelta
 from enum import Enum
 from functools import reduce
-from typing import List
+from typing import Dict, Iterator, List, Tuple
 
 from mercury import (Account, AccountType, CurrencyCode,
                      Order, OrderAction, OrderType,
@@ -29,8 +29,6 @@ from mercury.lib import Client
 from mercury.lib.connectors import WebSocket
 from mercury.lib.exceptions import NotValidPositionTypeError
 
-import pandas as pd
-
 
 class XTBTradeCommand(Enum):
     """XTB Trade transactions mapping to OrderAction."""
@@ -53,15 +51,16 @@ class XTBTradeType(Enum):
     DELETE = 4
 
 
-def reduce_candles(candles) -> pd.DataFrame:
+def reduce_candles(candles) -> Dict[str, list]:
     init_candles = {"date": [], "open": [], "high": [], "low": [],
                     "close": [], "volume": []}
 
     def consolidate_price(candle: dict, price: str) -> float:
         return (candle["open"] + candle[price])
 
-    def reducer(candles, candle) -> pd.DataFrame:
-        date = datetime.fromtimestamp(candle["ctm"] / 1000)
+    def reducer(candles, candle) -> Dict[str, list]:
+        # UTC naive dates, on the clock of the streamed ticks buckets
+        date = datetime.utcfromtimestamp(candle["ctm"] / 1000)
         candles["date"].append(date)
         candles["open"].append(candle["open"])
         candles["low"].append(consolidate_price(candle, "low"))
@@ -70,8 +69,7 @@ def reduce_candles(candles) -> pd.DataFrame:
         candles["volume"].append(candle["vol"])
         return candles
 
-    data = reduce(reducer, candles, init_candles)
-    return pd.DataFrame(data).set_index("date")
+    return reduce(reducer, candles, init_candles)
 
 
 WEBSOCKET_SERVER = "ws.xtb.com"
@@ -142,6 +140,29 @@ class Broker(AbcBroker):
     def _api_fees(self) -> float:
         return 0.0
 
+    def _api_stream_ticks(self, instrument: str,
+                          ) -> Iterator[Tuple[float, float, float, float]]:
+        websocket_url = "wss://{server}/{endpoint}Stream".format(
+            server=WEBSOCKET_SERVER,
+            endpoint="demo" if self.is_paper else "real",
+        )
+        ws = WebSocket(websocket_url)
+        ws.connect()
+        ws.emit(json.dumps({
+            "command": "getTickPrices",
+            "streamSessionId": self._stream_session_id,
+            "symbol": instrument,
+            "minArrivalTime": 0,
+            "maxLevel": 0,
+        }))
+
+        while True:
+            message = json.loads(ws.receive())
+            if message.get("command") != "tickPrices":
+                continue
+            tick = message["data"]
+            yield (tick["timestamp"] / 1000, tick["bid"], tick["ask"], 1)
+
     def _api_auth(self) -> None:
         command = {
             "command": "login",
@@ -151,7 +172,7 @@ class Broker(AbcBroker):
             },
         }
         response = self.request(command)
-        print("_api_auth response", response)
+        self._stream_session_id = response
 
     def _api_get_account(self, account_id: str = None) -> Account:
         command = {
@@ -205,11 +226,9 @@ class Broker(AbcBroker):
         }
 
         data = self.request(command)
-        dataframe = reduce_candles(data["rateInfos"])
 
-        return Timeseries(instrument=instrument,
-                          timeframe=timeframe,
-                          dataframe=dataframe)
+        return Timeseries.from_arrays(instrument, timeframe,
+                                      reduce_candles(data["rateInfos"]))
 
     def _api_get_market_price(self, instrument: str,
                               price_type: PriceType) -> float:
@@ -19,7 +19,8 @@ __all__ = [
 ]
 
 
-from typing import Dict
+from datetime import datetime
+from typing import Any, Dict
 
 from mercury import Timeframe, Timeseries
 from mercury.lib import Datasource as AbcDatasource
@@ -54,6 +55,12 @@ class Datasource(AbcDatasource):
         >>> datasource = CSV('./some/file.csv', colsmap, "Date Time",
         "EURUSD", Timeframe.H1)
         >>> dataframe = datasource.get_source()
+
+    The loaded data can be converted once into a column file, then
+    memory-mapped for backtests on histories larger than the memory::
+
+        >>> datasource.to_file("./some/file.bin")
+        >>> timeseries = Timeseries.from_file("./some/file.bin")
     """
     def __init__(self, filepath: str, colsmap: Dict[str, str],
                  index: str, instrument: str, timeframe: Timeframe) -> None:
@@ -83,6 +90,7 @@ class Datasource(AbcDatasource):
             dataframe.rename(columns=colsmap, inplace=True)
             dataframe.index.names = [colsmap[index]]
             self.data = dataframe
+            self._timeseries = None
         except ValueError as error:
             if str(error) == f"'{index}' is not in list":
                 raise ValueError(f"Index column '{index}' does not exist") \
@@ -101,14 +109,17 @@ class Datasource(AbcDatasource):
         """
         return self._colsmap
 
-    def get_timeseries(self) -> Timeseries:
+    def get_timeseries(self, from_date: datetime = None,
+                       to_date: datetime = None) -> Timeseries:
         """Retrieve a given timeseries from the datasource.
 
+        The whole file is loaded once, ranges are then served as zero-copy
+        views found by binary search (see `Timeseries.between`).
+
         Args:
-            from_date: timeseries starting date.
-            to_date: timeseries last date.
-            instrument: target instrument.
-            timeframe: target timeframe.
+            from_date: timeseries starting date, from the first one if
+                omitted.
+            to_date: timeseries last date, up to the last one if omitted.
 
         Returns:
             An Mercury Timeseries.
@@ -116,4 +127,24 @@ class Datasource(AbcDatasource):
         Raises:
             IndexError: The requested time range cannot be satisfied.
         """
-        return Timeseries(self.instrument, self.timeframe, self.data)
+        if self._timeseries is None:
+            self._timeseries = Timeseries(self.instrument, self.timeframe,
+                                          self.data)
+        timeseries = self._timeseries.between(from_date, to_date)
+        if not len(timeseries) and (from_date or to_date):
+            raise IndexError(f"No data between {from_date} and {to_date}")
+        return timeseries
+
+    def to_file(self, path: str, *, dtypes: Dict[str, Any] = None) -> None:
+        """Convert the csv data into a column file.
+
+        See `mercury.lib.columnfile` for the layout and
+        `mercury.Timeseries.from_file` to load it back.
+
+        Args:
+            path: target file location, overwritten if existing.
+            dtypes: dtype to store some columns with, by column name
+                (see `mercury.core.timeseries.COMPACT_DTYPES`).
+        """
+        Timeseries(self.instrument, self.timeframe, self.data,
+                   dtypes=dtypes).to_file(path)
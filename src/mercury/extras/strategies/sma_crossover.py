@@ -11,16 +11,12 @@ __all__ = [
 ]
 
 
-from typing import Callable
+from typing import Any, Dict
 
-from mercury import Indicator, OrderAction, PriceType, Strategy
-from mercury.lib import crossover, crossunder
-
-import talib
-
-
-def sma(timeperiod: int) -> Callable:
-    return lambda candles: talib.SMA(candles.close, timeperiod)
+from mercury import OrderAction, Parameter, PriceType, Strategy
+from mercury.indicators import SMA
+from mercury.lib import (crossover, crossover_mask, crossunder,
+                         crossunder_mask)
 
 
 class StrategySmaCrossOver(Strategy):
@@ -29,32 +25,40 @@ class StrategySmaCrossOver(Strategy):
     This strategy is for demo purpose only and is very basic.
     It is highly suggested to not try to trade on a real account with it.
     """
+    fast = Parameter(10, values=range(5, 35, 5))
+    slow = Parameter(30, values=range(20, 110, 10))
+    factor = Parameter(1)
+
     def setup(self) -> None:
         """Initialize the strategy."""
-        self.add_indicator(Indicator("sma10", sma(10)))
-        self.add_indicator(Indicator("sma30", sma(30)))
-
-        self.set_factor()
+        self.add_indicator(SMA(self.fast).indicator("sma_fast"))
+        self.add_indicator(SMA(self.slow).indicator("sma_slow"))
 
-    def set_factor(self) -> None:
-        """Set the strategy multiplier factor."""
-        self.factor = 1
+    def signals(self) -> Dict[str, Any]:
+        """Array rules of the strategy, see `Strategy.signals`."""
+        return {
+            "entries": crossover_mask(self.sma_fast, self.sma_slow),
+            "exits": crossunder_mask(self.sma_fast, self.sma_slow),
+            "size": self.factor,
+        }
 
     def tick(self) -> None:
         """Tick per tick strategy run."""
         positions = self.broker.positions
 
-        instrument = self.candles.instrument
+        instrument = self.timeseries.instrument
         currency = "EUR"
 
         if positions:
-            if crossunder(self.sma10, self.sma30):
+            if crossunder(self.sma_fast, self.sma_slow):
                 print("current positions", positions)
                 if len(positions) > 1:
                     raise Exception("only one pos. should be opened at a time")
                 position = positions[0]
-                self.broker._close_position(position)
-        elif crossover(self.sma10, self.sma30):
+                price = self.broker._api_get_market_price(instrument,
+                                                          PriceType.BID)
+                self.broker.close(position, price)
+        elif crossover(self.sma_fast, self.sma_slow):
             action = OrderAction.BUY
             price_type = PriceType.ASK
             price = self.broker._api_get_market_price(instrument, price_type)
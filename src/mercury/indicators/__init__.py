@@ -0,0 +1,48 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Indicators Module.
+
+Common technical indicators, without any build dependency. Each kernel
+(`SMA`, `EMA`, ...) provides a vectorized numpy `batch` computation and a
+matching O(1) streaming `update`, and builds a strategy `Indicator` using
+both. Indicators with several lines (`bbands`, `macd`, `stoch`,
+`donchian`) are built as several indicators depending on each other.
+
+Usage::
+
+    >>> class MyStrategy(Strategy):
+    ...     def setup(self):
+    ...         self.add_indicator(SMA(10).indicator("sma10"))
+    ...         for indicator in bbands("bb", 20):
+    ...             self.add_indicator(indicator)
+"""
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "ATR",
+    "EMA",
+    "Kernel",
+    "MACD",
+    "MAX",
+    "MIN",
+    "RSI",
+    "SMA",
+    "STDDEV",
+    "STOCH",
+    "WMA",
+    "bbands",
+    "combine",
+    "donchian",
+    "macd",
+    "stoch",
+]
+
+
+from .average import EMA, SMA, WMA
+from .base import Kernel, combine
+from .momentum import MACD, RSI, STOCH, macd, stoch
+from .statistic import MAX, MIN, STDDEV
+from .volatility import ATR, bbands, donchian
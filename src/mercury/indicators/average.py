@@ -0,0 +1,170 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Moving Averages Module.
+
+Provide:
+    - SMA Kernel
+    - EMA Kernel
+    - WMA Kernel
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "EMA",
+    "SMA",
+    "WMA",
+]
+
+
+from collections import deque
+
+import numpy as np
+
+from .base import Kernel, NAN, _ewm, _rolling
+
+
+class SMA(Kernel):
+    """Simple Moving Average.
+
+    The mean of the last `timeperiod` values, computed from running sums
+    both in batch (cumulative sum differences) and when streaming.
+    """
+    def __init__(self, timeperiod: int = 30) -> None:
+        """Class Initializer."""
+        self.timeperiod = timeperiod
+        super().__init__()
+
+    @property
+    def lookback(self) -> int:
+        """Number of bars needed before the first value."""
+        return self.timeperiod - 1
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        super().reset()
+        self._window = deque()
+        self._sum = 0.0
+
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        timeperiod = self.timeperiod
+        output = np.full(len(values), NAN)
+        if len(values) >= timeperiod:
+            sums = np.cumsum(values)
+            output[timeperiod - 1] = sums[timeperiod - 1]
+            output[timeperiod:] = sums[timeperiod:] - sums[:-timeperiod]
+            output[timeperiod - 1:] /= timeperiod
+        return output
+
+    def _update(self, value: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        window = self._window
+        window.append(value)
+        self._sum += value
+        if len(window) > self.timeperiod:
+            self._sum -= window.popleft()
+        elif len(window) < self.timeperiod:
+            return NAN
+        return self._sum / self.timeperiod
+
+
+class EMA(Kernel):
+    """Exponential Moving Average.
+
+    Smoothing factor `2 / (timeperiod + 1)`, seeded like TA-Lib with the
+    simple average of the first `timeperiod` values.
+    """
+    def __init__(self, timeperiod: int = 30) -> None:
+        """Class Initializer."""
+        self.timeperiod = timeperiod
+        self.alpha = 2 / (timeperiod + 1)
+        super().__init__()
+
+    @property
+    def lookback(self) -> int:
+        """Number of bars needed before the first value."""
+        return self.timeperiod - 1
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        super().reset()
+        self._count = 0
+        self._value = 0.0
+
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        timeperiod = self.timeperiod
+        output = np.full(len(values), NAN)
+        if len(values) >= timeperiod:
+            seed = values[:timeperiod].mean()
+            output[timeperiod - 1] = seed
+            output[timeperiod:] = _ewm(values[timeperiod:], self.alpha, seed)
+        return output
+
+    def _update(self, value: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        if self._count >= self.timeperiod:
+            self._value += self.alpha * (value - self._value)
+            return self._value
+
+        self._count += 1
+        self._value += value
+        if self._count < self.timeperiod:
+            return NAN
+        self._value /= self.timeperiod
+        return self._value
+
+
+class WMA(Kernel):
+    """Weighted Moving Average.
+
+    Linear weights from 1 for the oldest value to `timeperiod` for the
+    newest one. The streaming state is the window sum and weighted sum.
+    """
+    def __init__(self, timeperiod: int = 30) -> None:
+        """Class Initializer."""
+        self.timeperiod = timeperiod
+        self._weights = np.arange(1, timeperiod + 1) / (
+            timeperiod * (timeperiod + 1) / 2)
+        super().__init__()
+
+    @property
+    def lookback(self) -> int:
+        """Number of bars needed before the first value."""
+        return self.timeperiod - 1
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        super().reset()
+        self._window = deque()
+        self._sum = 0.0
+        self._weighted = 0.0
+
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        output = np.full(len(values), NAN)
+        if len(values) >= self.timeperiod:
+            output[self.timeperiod - 1:] = _rolling(
+                values, self.timeperiod) @ self._weights
+        return output
+
+    def _update(self, value: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        timeperiod, window = self.timeperiod, self._window
+        if len(window) == timeperiod:
+            # every weight drops by one, the oldest value leaving the window
+            self._weighted += timeperiod * value - self._sum
+            self._sum += value - window.popleft()
+        else:
+            self._weighted += (len(window) + 1) * value
+            self._sum += value
+        window.append(value)
+        if len(window) < timeperiod:
+            return NAN
+        return self._weighted / (timeperiod * (timeperiod + 1) / 2)
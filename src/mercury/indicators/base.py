@@ -0,0 +1,228 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Indicators Base Module.
+
+Provide:
+    - Kernel Class
+    - combine function
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "Kernel",
+    "combine",
+]
+
+
+import copy
+import functools
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..core.strategy import Indicator
+from ..core.timeseries import Timeseries
+from ..lib import BaseClass
+from ..lib.flexarray import Row
+
+NAN = float("NaN")
+
+
+def _ewm(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """Exponentially smooth values, `y[i] = y[i-1] + alpha * (x[i] - y[i-1])`.
+
+    `y[-1]` being `initial`. The recursion is unrolled by blocks: within a
+    block `y[k] = d^(k+1) y[-1] + alpha d^k sum(x[j] / d^j)`, `d` being
+    `1 - alpha`, the block length keeping `d^-k` far from overflowing.
+    """
+    decay = 1 - alpha
+    if decay == 0:
+        return np.array(values, dtype=float)
+
+    output = np.empty(len(values))
+    length = max(1, int(200 / -math.log10(decay)))
+    powers = decay ** np.arange(min(length, len(values)))
+    for start in range(0, len(values), length):
+        block = values[start:start + length]
+        scale = powers[:len(block)]
+        output[start:start + length] = scale * (
+            decay * initial + alpha * np.cumsum(block / scale))
+        initial = output[start + len(block) - 1]
+    return output
+
+
+def _rolling(values: np.ndarray, timeperiod: int) -> np.ndarray:
+    """Return the `(bars - timeperiod + 1, timeperiod)` windows of values."""
+    return sliding_window_view(values, timeperiod)
+
+
+def _feed_inputs(kernel: Kernel, row: Row, *values: float) -> float:
+    """Update a kernel with the inputs values of a bar."""
+    return kernel.update(*values)
+
+
+def _feed_columns(kernel: Kernel, columns: List[str], row: Row) -> float:
+    """Update a kernel with the columns values of a bar."""
+    return kernel.update(*(row[key] for key in columns))
+
+
+def _combine(function: Callable, row: Row, *values: float) -> float:
+    """Apply a function to the inputs values of a bar."""
+    return function(*values)
+
+
+class Kernel(BaseClass):
+    """Base class of the indicator kernels.
+
+    A kernel computes an indicator both ways: `batch` returns the values
+    of whole arrays at once, vectorized with numpy, while `update` takes
+    the values of one new bar and returns the indicator value for it in
+    O(1), keeping its state between calls. Both produce the same values
+    (up to floating point rounding).
+
+    Leading NaN values (e.g. the warmup of an indicator used as input) are
+    skipped, the indicator starts on the first bar without NaN.
+
+    Subclasses define the timeseries `columns` they read (in the order
+    `batch` and `update` take them) and implement `_batch`, `_update` and
+    `reset`, which initializes the streaming state.
+
+    Usage::
+
+        >>> SMA(10).batch(timeseries.close)
+        >>> sma = SMA(10)
+        >>> [sma.update(close) for close in closes]
+        >>> strategy.add_indicator(SMA(10).indicator("sma10"))
+    """
+    columns: Tuple[str, ...] = ("close",)
+
+    def __init__(self) -> None:
+        """Class Initializer."""
+        self.reset()
+
+    @property
+    def lookback(self) -> Optional[int]:
+        """Number of bars needed before the first value, `None` if unknown."""
+        return None
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        self._started = False
+
+    def batch(self, *values: np.ndarray) -> np.ndarray:
+        """Compute the indicator over whole arrays.
+
+        Args:
+            values: one array per column the kernel reads.
+
+        Returns:
+            An array of the indicator values, NaN during its warmup.
+        """
+        values = [np.asarray(array, dtype=float) for array in values]
+        output = np.full(len(values[0]), NAN)
+        start = 0
+        for array in values:
+            invalid = np.isnan(array)
+            start = max(start, len(array) if invalid.all() else
+                        int(invalid.argmin()))
+        if start < len(output):
+            output[start:] = self._batch(*(array[start:]
+                                           for array in values))
+        return output
+
+    def update(self, *values: float) -> float:
+        """Compute the indicator for a new bar.
+
+        Args:
+            values: the new bar value of each column the kernel reads.
+        """
+        if not self._started:
+            if any(value != value for value in values):
+                return NAN
+            self._started = True
+        return self._update(*values)
+
+    def _batch(self, *values: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        raise NotImplementedError()
+
+    def _update(self, *values: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        raise NotImplementedError()
+
+    def clone(self) -> Kernel:
+        """Return a copy of the kernel with a fresh streaming state."""
+        kernel = copy.copy(self)
+        kernel.reset()
+        return kernel
+
+    def indicator(self, name: str, *, source: str = None,
+                  inputs: Sequence[str] = None, **params) -> Indicator:
+        """Build a strategy `Indicator` backed by the kernel.
+
+        The indicator computes its values with `batch` when precomputed and
+        with `update` when stepping bar per bar. Its key is made of the
+        kernel type, parameters and columns, so precomputed values are
+        shared between indicators of identical kernels, and its lookback is
+        the kernel one.
+
+        Args:
+            name: indicator name.
+            source: column to read, for single column kernels, in place of
+                the default one.
+            inputs: compute the indicator from these indicators values
+                rather than from timeseries columns.
+            params: plot parameters, see `Indicator`.
+        """
+        columns = [source] if source else list(self.columns)
+        params.setdefault("key", (type(self), tuple(sorted(
+            (key, value) for key, value in vars(self).items()
+            if not key.startswith("_"))), () if inputs else tuple(columns)))
+
+        if inputs:
+            def func(timeseries: Timeseries,
+                     *values: np.ndarray) -> np.ndarray:
+                return self.batch(*values)
+
+            def stream() -> Callable:
+                return functools.partial(_feed_inputs, self.clone())
+        else:
+            def func(timeseries: Timeseries) -> np.ndarray:
+                return self.batch(*(timeseries[key] for key in columns))
+
+            def stream() -> Callable:
+                return functools.partial(_feed_columns, self.clone(),
+                                         columns)
+
+        return Indicator(name, func, stream=stream, inputs=inputs or (),
+                         lookback=self.lookback, **params)
+
+
+def combine(name: str, inputs: Sequence[str], function: Callable,
+            **params) -> Indicator:
+    """Build an indicator combining other indicators bar per bar.
+
+    Args:
+        name: indicator name.
+        inputs: name of the indicators to combine.
+        function: element-wise function of the inputs values, called with
+            arrays in batch and floats when streaming, e.g.
+            `lambda middle, stddev: middle + 2 * stddev`.
+        params: plot parameters, see `Indicator`.
+    """
+    def func(timeseries: Timeseries, *values: np.ndarray) -> np.ndarray:
+        return function(*values)
+
+    def stream() -> Callable:
+        return functools.partial(_combine, function)
+
+    return Indicator(name, func, stream=stream, inputs=inputs, lookback=0,
+                     **params)
@@ -0,0 +1,234 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Momentum Indicators Module.
+
+Provide:
+    - RSI Kernel
+    - MACD Kernel
+    - STOCH Kernel
+    - macd function
+    - stoch function
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "MACD",
+    "RSI",
+    "STOCH",
+    "macd",
+    "stoch",
+]
+
+
+import operator
+from typing import List
+
+import numpy as np
+
+from .average import EMA, SMA
+from .base import Kernel, NAN, _ewm, combine
+from .statistic import MAX, MIN
+from ..core.strategy import Indicator
+
+
+class RSI(Kernel):
+    """Relative Strength Index.
+
+    Average gains and losses are smoothed with Wilder's method (factor
+    `1 / timeperiod`), seeded like TA-Lib with the simple average of the
+    first `timeperiod` changes. The RSI is 0 when prices do not move.
+    """
+    def __init__(self, timeperiod: int = 14) -> None:
+        """Class Initializer."""
+        self.timeperiod = timeperiod
+        super().__init__()
+
+    @property
+    def lookback(self) -> int:
+        """Number of bars needed before the first value."""
+        return self.timeperiod
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        super().reset()
+        self._previous = None
+        self._count = 0
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        timeperiod = self.timeperiod
+        output = np.full(len(values), NAN)
+        if len(values) <= timeperiod:
+            return output
+
+        changes = np.diff(values)
+        averages = []
+        for moves in (np.maximum(changes, 0), np.maximum(-changes, 0)):
+            seed = moves[:timeperiod].mean()
+            averages.append(np.concatenate((
+                [seed], _ewm(moves[timeperiod:], 1 / timeperiod, seed))))
+        gain, loss = averages
+        total = gain + loss
+        output[timeperiod:] = np.divide(100 * gain, total,
+                                        out=np.zeros(len(total)),
+                                        where=total != 0)
+        return output
+
+    def _update(self, value: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        previous, self._previous = self._previous, value
+        if previous is None:
+            return NAN
+
+        timeperiod = self.timeperiod
+        change = value - previous
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        if self._count >= timeperiod:
+            self._gain += (gain - self._gain) / timeperiod
+            self._loss += (loss - self._loss) / timeperiod
+        else:
+            self._count += 1
+            self._gain += gain
+            self._loss += loss
+            if self._count < timeperiod:
+                return NAN
+            self._gain /= timeperiod
+            self._loss /= timeperiod
+
+        total = self._gain + self._loss
+        return 100 * self._gain / total if total else 0.0
+
+
+class MACD(Kernel):
+    """Moving Average Convergence Divergence line.
+
+    The difference between a fast and a slow `EMA`. See `macd` for the
+    signal line and histogram.
+    """
+    def __init__(self, fastperiod: int = 12, slowperiod: int = 26) -> None:
+        """Class Initializer."""
+        self.fastperiod = fastperiod
+        self.slowperiod = slowperiod
+        super().__init__()
+
+    @property
+    def lookback(self) -> int:
+        """Number of bars needed before the first value."""
+        return max(self.fastperiod, self.slowperiod) - 1
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        super().reset()
+        self._fast = EMA(self.fastperiod)
+        self._slow = EMA(self.slowperiod)
+
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        return self._fast._batch(values) - self._slow._batch(values)
+
+    def _update(self, value: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        return self._fast._update(value) - self._slow._update(value)
+
+
+class STOCH(Kernel):
+    """Stochastic oscillator %K line (slow).
+
+    The raw %K, position of the close within the `fastk_period` high-low
+    range (0 when the range is empty), smoothed by a `slowk_period` simple
+    moving average. See `stoch` for the %D line.
+    """
+    columns = ("high", "low", "close")
+
+    def __init__(self, fastk_period: int = 5,
+                 slowk_period: int = 3) -> None:
+        """Class Initializer."""
+        self.fastk_period = fastk_period
+        self.slowk_period = slowk_period
+        super().__init__()
+
+    @property
+    def lookback(self) -> int:
+        """Number of bars needed before the first value."""
+        return self.fastk_period + self.slowk_period - 2
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        super().reset()
+        self._highest = MAX(self.fastk_period)
+        self._lowest = MIN(self.fastk_period)
+        self._smooth = SMA(self.slowk_period)
+
+    def _batch(self, high: np.ndarray, low: np.ndarray,
+               close: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        start = self.fastk_period - 1
+        output = np.full(len(close), NAN)
+        if len(close) > start:
+            lowest = self._lowest._batch(low)[start:]
+            spread = self._highest._batch(high)[start:] - lowest
+            fastk = np.divide(100 * (close[start:] - lowest), spread,
+                              out=np.zeros(len(spread)), where=spread != 0)
+            output[start:] = self._smooth._batch(fastk)
+        return output
+
+    def _update(self, high: float, low: float, close: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        highest = self._highest._update(high)
+        lowest = self._lowest._update(low)
+        if highest != highest:
+            return NAN
+        spread = highest - lowest
+        fastk = 100 * (close - lowest) / spread if spread else 0.0
+        return self._smooth._update(fastk)
+
+
+def macd(name: str, fastperiod: int = 12, slowperiod: int = 26,
+         signalperiod: int = 9, *, source: str = None,
+         **params) -> List[Indicator]:
+    """Build the MACD indicators, to add to a strategy in order.
+
+    Args:
+        name: MACD line indicator name, the signal line and histogram being
+            named `<name>_signal` and `<name>_hist`.
+        fastperiod: fast EMA period.
+        slowperiod: slow EMA period.
+        signalperiod: signal line EMA period.
+        source: column to read, defaults to "close".
+        params: plot parameters, see `Indicator`.
+    """
+    signal = f"{name}_signal"
+    return [
+        MACD(fastperiod, slowperiod).indicator(name, source=source,
+                                               **params),
+        EMA(signalperiod).indicator(signal, inputs=[name], **params),
+        combine(f"{name}_hist", [name, signal], operator.sub,
+                key=operator.sub, **params),
+    ]
+
+
+def stoch(name: str, fastk_period: int = 5, slowk_period: int = 3,
+          slowd_period: int = 3, **params) -> List[Indicator]:
+    """Build the stochastic oscillator indicators, to add in order.
+
+    Args:
+        name: base name, the lines being named `<name>_k` and `<name>_d`.
+        fastk_period: raw %K high-low range period.
+        slowk_period: %K smoothing period.
+        slowd_period: %D (moving average of %K) period.
+        params: plot parameters, see `Indicator`.
+    """
+    slowk = f"{name}_k"
+    return [
+        STOCH(fastk_period, slowk_period).indicator(slowk, **params),
+        SMA(slowd_period).indicator(f"{name}_d", inputs=[slowk], **params),
+    ]
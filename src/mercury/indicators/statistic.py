@@ -0,0 +1,146 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Statistic Indicators Module.
+
+Provide:
+    - MAX Kernel
+    - MIN Kernel
+    - STDDEV Kernel
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "MAX",
+    "MIN",
+    "STDDEV",
+]
+
+
+import math
+import operator
+from collections import deque
+
+import numpy as np
+
+from .base import Kernel, NAN, _rolling
+
+
+class MAX(Kernel):
+    """Highest value over the last `timeperiod` values.
+
+    The streaming state is a monotonic queue of the window values that can
+    still become the highest one, so each update is O(1) amortized.
+    """
+    _reduce = staticmethod(np.max)
+    _dominated = staticmethod(operator.le)
+
+    def __init__(self, timeperiod: int = 30) -> None:
+        """Class Initializer."""
+        self.timeperiod = timeperiod
+        super().__init__()
+
+    @property
+    def lookback(self) -> int:
+        """Number of bars needed before the first value."""
+        return self.timeperiod - 1
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        super().reset()
+        self._count = 0
+        self._queue = deque()
+
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        output = np.full(len(values), NAN)
+        if len(values) >= self.timeperiod:
+            output[self.timeperiod - 1:] = self._reduce(
+                _rolling(values, self.timeperiod), axis=1)
+        return output
+
+    def _update(self, value: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        queue, dominated = self._queue, self._dominated
+        self._count += 1
+        while queue and dominated(queue[-1][1], value):
+            queue.pop()
+        queue.append((self._count, value))
+        if queue[0][0] <= self._count - self.timeperiod:
+            queue.popleft()
+        if self._count < self.timeperiod:
+            return NAN
+        return queue[0][1]
+
+
+class MIN(MAX):
+    """Lowest value over the last `timeperiod` values."""
+    _reduce = staticmethod(np.min)
+    _dominated = staticmethod(operator.ge)
+
+
+class STDDEV(Kernel):
+    """Standard deviation (population) over the last `timeperiod` values.
+
+    The result is multiplied by `nbdev`. The streaming state is a sliding
+    window mean and sum of squared deviations (Welford), recomputed from the
+    window every `timeperiod` updates to cancel rounding drift, which keeps
+    updates O(1) amortized.
+    """
+    def __init__(self, timeperiod: int = 5, nbdev: float = 1.0) -> None:
+        """Class Initializer."""
+        self.timeperiod = timeperiod
+        self.nbdev = nbdev
+        super().__init__()
+
+    @property
+    def lookback(self) -> int:
+        """Number of bars needed before the first value."""
+        return self.timeperiod - 1
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        super().reset()
+        self._window = deque()
+        self._mean = 0.0
+        self._squares = 0.0
+        self._updates = 0
+
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        output = np.full(len(values), NAN)
+        if len(values) >= self.timeperiod:
+            output[self.timeperiod - 1:] = _rolling(
+                values, self.timeperiod).std(axis=1) * self.nbdev
+        return output
+
+    def _update(self, value: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        timeperiod, window = self.timeperiod, self._window
+        if len(window) < timeperiod:
+            window.append(value)
+            delta = value - self._mean
+            self._mean += delta / len(window)
+            self._squares += delta * (value - self._mean)
+            if len(window) < timeperiod:
+                return NAN
+        else:
+            oldest = window.popleft()
+            window.append(value)
+            self._updates += 1
+            if self._updates == timeperiod:
+                self._updates = 0
+                self._mean = math.fsum(window) / timeperiod
+                self._squares = sum((item - self._mean) ** 2
+                                    for item in window)
+            else:
+                mean = self._mean + (value - oldest) / timeperiod
+                self._squares += (value - oldest) * (value - mean +
+                                                     oldest - self._mean)
+                self._mean = mean
+        return math.sqrt(max(self._squares, 0.0) / timeperiod) * self.nbdev
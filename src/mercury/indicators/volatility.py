@@ -0,0 +1,144 @@
+# Copyright (C) 2019 - 2021 Richard Kemp
+# $Id$
+# -*- coding: utf-8; py-indent-offset:4 -*-
+
+"""Mercury Volatility Indicators Module.
+
+Provide:
+    - ATR Kernel
+    - bbands function
+    - donchian function
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "ATR",
+    "bbands",
+    "donchian",
+]
+
+
+from typing import List
+
+import numpy as np
+
+from .average import SMA
+from .base import Kernel, NAN, _ewm, combine
+from .statistic import MAX, MIN, STDDEV
+from ..core.strategy import Indicator
+
+
+class ATR(Kernel):
+    """Average True Range.
+
+    True ranges are smoothed with Wilder's method (factor `1 / timeperiod`),
+    seeded like TA-Lib with the simple average of the first `timeperiod`
+    true ranges, the first bar having none.
+    """
+    columns = ("high", "low", "close")
+
+    def __init__(self, timeperiod: int = 14) -> None:
+        """Class Initializer."""
+        self.timeperiod = timeperiod
+        super().__init__()
+
+    @property
+    def lookback(self) -> int:
+        """Number of bars needed before the first value."""
+        return self.timeperiod
+
+    def reset(self) -> None:
+        """Reset the streaming state."""
+        super().reset()
+        self._close = None
+        self._count = 0
+        self._value = 0.0
+
+    def _batch(self, high: np.ndarray, low: np.ndarray,
+               close: np.ndarray) -> np.ndarray:
+        """Compute the indicator over arrays without leading NaN."""
+        timeperiod = self.timeperiod
+        output = np.full(len(close), NAN)
+        if len(close) <= timeperiod:
+            return output
+
+        previous = close[:-1]
+        ranges = np.maximum.reduce((high[1:] - low[1:],
+                                    np.abs(high[1:] - previous),
+                                    np.abs(low[1:] - previous)))
+        seed = ranges[:timeperiod].mean()
+        output[timeperiod] = seed
+        output[timeperiod + 1:] = _ewm(ranges[timeperiod:], 1 / timeperiod,
+                                       seed)
+        return output
+
+    def _update(self, high: float, low: float, close: float) -> float:
+        """Compute the indicator for a new bar, once started."""
+        previous, self._close = self._close, close
+        if previous is None:
+            return NAN
+
+        timeperiod = self.timeperiod
+        true_range = max(high - low, abs(high - previous),
+                         abs(low - previous))
+        if self._count >= timeperiod:
+            self._value += (true_range - self._value) / timeperiod
+            return self._value
+
+        self._count += 1
+        self._value += true_range
+        if self._count < timeperiod:
+            return NAN
+        self._value /= timeperiod
+        return self._value
+
+
+def bbands(name: str, timeperiod: int = 5, nbdevup: float = 2.0,
+           nbdevdn: float = 2.0, *, source: str = None,
+           **params) -> List[Indicator]:
+    """Build the Bollinger Bands indicators, to add to a strategy in order.
+
+    Args:
+        name: base name, the indicators being named `<name>_middle`,
+            `<name>_stddev`, `<name>_upper` and `<name>_lower`.
+        timeperiod: moving average and standard deviation period.
+        nbdevup: upper band distance, in standard deviations.
+        nbdevdn: lower band distance, in standard deviations.
+        source: column to read, defaults to "close".
+        params: plot parameters, see `Indicator`.
+    """
+    middle, stddev = f"{name}_middle", f"{name}_stddev"
+    return [
+        SMA(timeperiod).indicator(middle, source=source, **params),
+        STDDEV(timeperiod).indicator(stddev, source=source, **params),
+        combine(f"{name}_upper", [middle, stddev],
+                lambda mean, deviation: mean + nbdevup * deviation,
+                key=("bbands_upper", nbdevup), **params),
+        combine(f"{name}_lower", [middle, stddev],
+                lambda mean, deviation: mean - nbdevdn * deviation,
+                key=("bbands_lower", nbdevdn), **params),
+    ]
+
+
+def donchian(name: str, timeperiod: int = 20,
+             **params) -> List[Indicator]:
+    """Build the Donchian Channel indicators, to add to a strategy in order.
+
+    Args:
+        name: base name, the indicators being named `<name>_upper` (highest
+            high), `<name>_lower` (lowest low) and `<name>_middle`.
+        timeperiod: channel period.
+        params: plot parameters, see `Indicator`.
+    """
+    upper, lower = f"{name}_upper", f"{name}_lower"
+    return [
+        MAX(timeperiod).indicator(upper, source="high", **params),
+        MIN(timeperiod).indicator(lower, source="low", **params),
+        combine(f"{name}_middle", [upper, lower],
+                lambda highest, lowest: (highest + lowest) / 2,
+                key="donchian_middle", **params),
+    ]
@@ -18,24 +18,29 @@ __all__ = [
     "BaseClass",
     "BaseMetaClass",
     "Client",
+    "Column",
     "Datasource",
     "Datastore",
     "FlexArray",
     "cross",
+    "cross_mask",
     "crossover",
+    "crossover_mask",
     "crossunder",
+    "crossunder_mask",
 ]
 
 
 from numbers import Number
+from typing import Any
 
-import pandas as pd
+import numpy as np
 
 from .baseclass import BaseClass, BaseMetaClass
 from .client import Client
 from .datasource import Datasource
 from .datastore import Datastore
-from .flexarray import FlexArray
+from .flexarray import Column, FlexArray
 
 
 # def argument_validator(name, *, in_tuple):
@@ -60,18 +65,26 @@ from .flexarray import FlexArray
 #     return decorator
 
 
+def _values(series: Any) -> Any:
+    """Return the underlying values of a series.
+
+    Series exposing a `values` numpy array (pandas Series, `Column`,
+    strategy `Indicator`) are read through it directly, numbers are
+    repeated to compare with both bars.
+    """
+    if isinstance(series, Number):
+        return (series, series)
+    return getattr(series, "values", series)
+
+
 def crossover(series1, series2) -> bool:
     """Return `True` if `series1` just crossed over `series2`.
 
     >>> crossover(self.data.Close, self.sma)
     True
     """
-    series1 = (series1.values if isinstance(series1, pd.Series) else
-               (series1, series1) if isinstance(series1, Number) else
-               series1)
-    series2 = (series2.values if isinstance(series2, pd.Series) else
-               (series2, series2) if isinstance(series2, Number) else
-               series2)
+    series1 = _values(series1)
+    series2 = _values(series2)
 
     try:
         return series1[-2] < series2[-2] and series1[-1] > series2[-1]
@@ -95,3 +108,38 @@ def cross(series1, series2) -> bool:
     True
     """
     return crossover(series1, series2) or crossunder(series1, series2)
+
+
+def crossover_mask(series1, series2) -> np.ndarray:
+    """Return the mask of the bars where `series1` crossed over `series2`.
+
+    The array form of `crossover`, over the whole series in one pass: a
+    bar is `True` when `series1` was below `series2` on the previous bar
+    and is above it on this one. Either series can be a number.
+
+    >>> close[crossover_mask(close, sma)]
+    """
+    values1, values2 = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(getattr(series, "values", series),
+                                   dtype=float))
+          for series in (series1, series2)))
+    mask = np.zeros(values1.shape, dtype=bool)
+    mask[1:] = (values1[:-1] < values2[:-1]) & (values1[1:] > values2[1:])
+    return mask
+
+
+def crossunder_mask(series1, series2) -> np.ndarray:
+    """Return the mask of the bars where `series1` crossed under `series2`.
+
+    >>> close[crossunder_mask(close, sma)]
+    """
+    return crossover_mask(series2, series1)
+
+
+def cross_mask(series1, series2) -> np.ndarray:
+    """Return the mask of the bars where the series crossed either way.
+
+    >>> close[cross_mask(close, sma)]
+    """
+    return (crossover_mask(series1, series2) |
+            crossunder_mask(series1, series2))
@@ -0,0 +1,163 @@
+# -*- coding: utf-8; py-indent-offset:4 -*-
+# Copyright (C) 2019 - 2021 Richard Kemp
+
+r"""Mercury column file module.
+
+Binary on-disk layout for columnar data, designed to be memory-mapped so
+histories larger than the available memory can be used in place.
+
+Layout (all integers little-endian):
+
+    offset  size  content
+    0       8     magic string b"\x93MERCURY"
+    8       4     uint32, length `n` of the JSON header in bytes
+    12      n     utf-8 JSON header
+    ...           zero padding up to the next 64 bytes boundary
+    ...           data sections, each one aligned on 64 bytes
+
+The JSON header is an object with the keys:
+
+- `version` (int): layout version, currently 1.
+- `size` (int): number of rows.
+- `index` (object): `name`, `dtype` and `offset` of the index values.
+- `columns` (list): `name`, `dtype` and `offset` of each column.
+- `metadata` (object): free data attached by the writer.
+
+Dtypes are numpy dtype strings (e.g. "<f8", "<M8[ns]") and offsets are
+relative to the start of the data area, i.e. the first 64 bytes boundary
+following the header. Each column holds `size` contiguous values.
+Columns sharing a dtype are written next to each other without padding so
+they form a single contiguous 2-D block.
+
+Provide:
+    - read
+    - write
+"""
+
+from __future__ import annotations
+
+
+__copyright__ = "Copyright 2019 - 2021 Richard Kemp"
+__revision__ = "$Id$"
+__all__ = [
+    "read",
+    "write",
+]
+
+
+import json
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+MAGIC = b"\x93MERCURY"
+VERSION = 1
+ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the next alignment boundary."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _check(columns: Dict[str, np.ndarray], index: np.ndarray,
+           index_name: str) -> None:
+    """Ensure columns can be written along the index."""
+    for name, array in [(index_name, index), *columns.items()]:
+        if array.dtype.hasobject:
+            raise TypeError(f"Column '{name}' cannot be stored, object dtype")
+        if len(array) != len(index):
+            raise ValueError(f"Column '{name}' length differs from index")
+
+
+def write(path: str, columns: Dict[str, np.ndarray], index: np.ndarray, *,
+          index_name: str = None, metadata: dict = None) -> None:
+    """Write columns and their index to a column file.
+
+    Args:
+        path: target file location, overwritten if existing.
+        columns: values by column name, all of the index length.
+        index: index (time axis) values.
+        index_name: name of the index.
+        metadata: JSON serializable data to store in the header.
+
+    Raises:
+        TypeError: a column holds python objects.
+        ValueError: columns and index lengths differ.
+    """
+    arrays = {name: np.ascontiguousarray(array)
+              for name, array in columns.items()}
+    _check(arrays, index, index_name)
+
+    # group columns by dtype so each group is a contiguous block
+    groups = {}
+    for name, array in arrays.items():
+        groups.setdefault(array.dtype.str, []).append(name)
+
+    sections = [({"name": index_name, "dtype": index.dtype.str, "offset": 0},
+                 np.ascontiguousarray(index))]
+    offset = _align(index.nbytes)
+    for dtype, names in groups.items():
+        for name in names:
+            sections.append(({"name": name, "dtype": dtype, "offset": offset},
+                             arrays[name]))
+            offset += arrays[name].nbytes
+        offset = _align(offset)
+
+    header = {"version": VERSION, "size": len(index),
+              "index": sections[0][0],
+              "columns": [spec for spec, _ in sections[1:]],
+              "metadata": metadata or {}}
+    raw = json.dumps(header).encode("utf-8")
+    start = _align(len(MAGIC) + 4 + len(raw))
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<I", len(raw)))
+        file.write(raw)
+        for spec, array in sections:
+            file.write(b"\0" * (start + spec["offset"] - file.tell()))
+            array.tofile(file)
+
+
+def read(path: str, *, mode: str = "r") -> Tuple[Dict[str, np.ndarray],
+                                                 np.ndarray, dict]:
+    """Memory-map a column file.
+
+    Args:
+        path: column file location.
+        mode: `numpy.memmap` mode, "r" (read-only), "r+" (read-write) or
+            "c" (copy-on-write).
+
+    Returns:
+        A tuple of memory-mapped columns by name, memory-mapped index and
+        the file header.
+
+    Raises:
+        ValueError: the file is not a valid column file.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{path}' is not a mercury column file")
+        (length,) = struct.unpack("<I", file.read(4))
+        header = json.loads(file.read(length).decode("utf-8"))
+
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported column file version "
+                         f"{header['version']}")
+
+    size = header["size"]
+    raw = (np.memmap(path, dtype=np.uint8, mode=mode,
+                     offset=_align(len(MAGIC) + 4 + length))
+           if size else np.empty(0, dtype=np.uint8))
+
+    def section(spec: dict) -> np.ndarray:
+        dtype = np.dtype(spec["dtype"])
+        start = spec["offset"]
+        return raw[start:start + size * dtype.itemsize].view(dtype)
+
+    columns = {spec["name"]: section(spec) for spec in header["columns"]}
+
+    return columns, section(header["index"]), header
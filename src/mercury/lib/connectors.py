@@ -85,6 +85,18 @@ class WebSocket(Connector):
         """Transmit a payload to the remote server."""
         return self.loop.run_until_complete(self.__async__send(payload))
 
+    def emit(self, payload: str) -> None:
+        """Transmit a payload to the remote server, without waiting."""
+        return self.loop.run_until_complete(self.ws.send(payload))
+
+    def receive(self) -> str:
+        """Wait for the next message pushed by the remote server."""
+        try:
+            return self.loop.run_until_complete(self.ws.recv())
+        except websockets.exceptions.ConnectionClosedError:
+            self.__logger.error("connection lost")
+            raise ConnectionLostError
+
     async def __async__send(self, payload: str) -> str:
         """Async transmission of payload data."""
         try:
@@ -14,11 +14,18 @@ from __future__ import annotations
 __copyright__ = "Copyright 2019 - 2021 Richard Kemp"
 __revision__ = "$Id$"
 __all__ = [
+    "Column",
     "FlexArray",
+    "Row",
 ]
 
 
+import copy
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator
+
 import numpy as np
+from numpy.lib.mixins import NDArrayOperatorsMixin
 
 import pandas as pd
 
@@ -27,19 +34,203 @@ from .baseclass import BaseClass
 # TODO: to improve based on backtesting.py/backtesting/_util.py stuff
 
 
+def _allocate(array: np.ndarray, capacity: int) -> np.ndarray:
+    """Return a new buffer of `capacity` rows starting with `array` values."""
+    buffer = np.empty(capacity, dtype=array.dtype)
+    buffer[:len(array)] = array
+    return buffer
+
+
+def _allocate_blocks(columns: Dict[str, np.ndarray], size: int,
+                     capacity: int) -> Dict[str, np.ndarray]:
+    """Store columns in one contiguous 2-D block per dtype.
+
+    Each block is shaped `(columns, capacity)` so every column is itself a
+    contiguous row of its block. The first `size` values of each column are
+    copied in.
+
+    Returns:
+        A mapping of each column name to its (full capacity) row view,
+        following the `columns` order.
+    """
+    groups = {}
+    for name, array in columns.items():
+        groups.setdefault(array.dtype, []).append(name)
+
+    views = {}
+    for dtype, names in groups.items():
+        block = np.empty((len(names), capacity), dtype=dtype)
+        for row, name in enumerate(names):
+            block[row, :size] = columns[name][:size]
+            views[name] = block[row]
+
+    return {name: views[name] for name in columns}
+
+
+class Column(NDArrayOperatorsMixin):
+    """Persistent view of a column bounded by the cursor of its owner.
+
+    Unlike a numpy slice, a Column does not need to be rebuilt when the
+    cursor moves: indexing is resolved against the owner cursor at access
+    time, so `column[-1]` is always the value under the cursor.
+
+    A Column behaves like a read-only 1-D array (`len`, indexing, numpy
+    functions and operators), `values` returns the actual numpy view.
+    """
+    __slots__ = ("_buffer", "_owner")
+
+    def __init__(self, buffer: np.ndarray, owner: Any) -> None:
+        """Bind a buffer to an owner providing a `_cursor` attribute."""
+        self._buffer = buffer
+        self._owner = owner
+
+    def __len__(self) -> int:
+        """Override __len__."""
+        return self._owner._cursor
+
+    def __getitem__(self, index: Any) -> Any:
+        """Override __getitem__, indexes are relative to the cursor."""
+        if isinstance(index, (int, np.integer)):
+            cursor = self._owner._cursor
+            position = cursor + index if index < 0 else index
+            if not 0 <= position < cursor:
+                raise IndexError("index out of range")
+            return self._buffer[position]
+        return self._buffer[:self._owner._cursor][index]
+
+    def __iter__(self) -> Any:
+        """Override __iter__."""
+        return iter(self.values)
+
+    def __array__(self, dtype: np.dtype = None, copy: bool = None) -> Any:
+        """Expose the bounded values to numpy."""
+        values = self.values
+        return values if dtype is None else values.astype(dtype)
+
+    def __array_ufunc__(self, ufunc: np.ufunc, method: str, *inputs: Any,
+                        **kwargs: Any) -> Any:
+        """Run numpy ufuncs (and operators) against the bounded values."""
+        inputs = tuple(item.values if isinstance(item, Column) else item
+                       for item in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __repr__(self) -> str:
+        """Override __repr__."""
+        return f"Column({self.values!r})"
+
+    @property
+    def values(self) -> np.ndarray:
+        """Return the numpy view of the values up to the cursor."""
+        return self._buffer[:self._owner._cursor]
+
+
+class Row(Mapping):
+    """Read-only mapping of the values under the cursor of its owner.
+
+    A single Row is bound to a FlexArray and reused for its whole life, no
+    values are copied: each access reads the column buffers at the cursor
+    position. Values are available as items (`row["close"]`) or attributes
+    (`row.close`). The index is exposed under its name (usually "date")
+    as a pandas Timestamp when the index holds datetimes.
+
+    Being bound to the cursor, a Row reflects the new values once the cursor
+    moves, use `dict(row)` to keep a snapshot.
+    """
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: FlexArray) -> None:
+        """Bind the row to a FlexArray."""
+        self._owner = owner
+
+    def __getitem__(self, key: str) -> Any:
+        """Override __getitem__."""
+        owner = self._owner
+        if not owner._cursor:
+            raise IndexError("No row under the cursor")
+        key = owner._keys[key]
+        value = owner._data[key][owner._cursor - 1]
+        if key == "index" and isinstance(value, np.datetime64):
+            value = pd.Timestamp(value)
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        """Override __getattr__."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over columns name, the index being named after it."""
+        index_name = self._owner._index_name
+        return (index_name if key == "index" else key
+                for key in self._owner._data)
+
+    def __len__(self) -> int:
+        """Override __len__."""
+        return len(self._owner._data)
+
+    def __repr__(self) -> str:
+        """Override __repr__."""
+        return f"Row({dict(self)!r})"
+
+
 class FlexArray(BaseClass):
     """Wrap pandas DataFrame for specific needs in Mercury.
 
+    Values are stored in growable numpy buffers holding more rows
+    (`capacity`) than actually used (`size`): columns sharing a dtype live
+    in a single contiguous 2-D block, the index (time axis) in its own
+    buffer. Column dtypes can be selected to shrink memory, e.g. float32
+    prices and int32 volumes for large histories. Appending data only
+    writes the new rows at the end of the buffers, reallocating them by
+    doubling their capacity when full, so a single row append costs O(1)
+    amortized. The pandas DataFrame representation is only built when
+    requested through `dataframe`.
+
+    Columns are accessed as attributes (or items) and are bounded by the
+    cursor. By default they are numpy slices cached until the cursor moves.
+    With `views` enabled they are persistent `Column` objects bound to the
+    cursor instead, so moving the cursor costs nothing whatever the number
+    of columns in use.
+
     TODO: doc here
     """
-    def __init__(self, dataframe: pd.DataFrame) -> None:
-        """Initialize a mercury DataFrame from a pandas DataFrame."""
+    def __init__(self, dataframe: pd.DataFrame = None, *,
+                 capacity: int = None, dtypes: Dict[str, Any] = None,
+                 views: bool = False) -> None:
+        """Initialize a mercury DataFrame from a pandas DataFrame.
+
+        The DataFrame values are copied into the internal storage, no
+        reference to it is kept.
+
+        Args:
+            dataframe: source data, the index being the time axis. If
+                omitted the array is empty, without any column, until
+                buffers are attached.
+            capacity: number of rows to preallocate, useful when the final
+                size of the array is known in advance (e.g. a live session).
+            dtypes: dtype to store some columns with, by column name.
+            views: return persistent `Column` views instead of numpy slices.
+        """
         # TODO: make cursor private read-only (see double undescrore)
         # https://stackoverflow.com/a/39716001/3612177
-        self.dataframe = dataframe
+        self.views = views
         self._cache = {}
+        self._views = {}
+        self._row = Row(self)
+        self._listeners = []
         self._cursor = None
-        self._reindex()
+        self._revision = 0
+        self._amends = 0
+        self._amendable = False  # the last row may be updated in place
+        self._dtypes = dtypes or {}
+        if dataframe is None:
+            self._attach({}, np.empty(0, dtype="datetime64[ns]"))
+        else:
+            self._load(dataframe, capacity)
 
     def __getitem__(self, item: str) -> np.ndarray:
         """Override __getitem__."""
@@ -47,6 +238,8 @@ class FlexArray(BaseClass):
 
     def __getattr__(self, item: str) -> np.ndarray:
         """Override __getattr__."""
+        if item.startswith("_"):
+            raise AttributeError(item)
         try:
             return self._get_slice(item)
         except KeyError:
@@ -62,47 +255,223 @@ class FlexArray(BaseClass):
         """Override __len__."""
         return self._cursor
 
+    @property
+    def capacity(self) -> int:
+        """Number of rows the internal buffers can hold without growing."""
+        return len(self._data["index"])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory allocated by the internal buffers, in bytes."""
+        blocks = {id(data.base): data.base for key, data in self._data.items()
+                  if key != "index"}
+        return (sum(block.nbytes for block in blocks.values()) +
+                self._data["index"].nbytes)
+
+    @property
+    def dataframe(self) -> pd.DataFrame:
+        """Return the pandas DataFrame representation of the whole data.
+
+        The DataFrame is built on demand from the internal buffers and cached
+        until the next change of the data.
+        """
+        if self._frame is None:
+            size = self._size
+            index = pd.Index(self._data["index"][:size],
+                             name=self._index_name)
+            self._frame = pd.DataFrame({col: data[:size]
+                                        for col, data in self._data.items()
+                                        if col != "index"},
+                                       index=index)
+        return self._frame
+
+    @dataframe.setter
+    def dataframe(self, dataframe: pd.DataFrame) -> None:
+        """Replace the whole data by a new DataFrame."""
+        self._load(dataframe)
+
+    def _load(self, dataframe: pd.DataFrame, capacity: int = None) -> None:
+        """Fill internal buffers from a DataFrame."""
+        size = len(dataframe)
+        capacity = max(capacity or 0, size, 1)
+        data = _allocate_blocks(
+            {col: np.asarray(array, dtype=self._dtypes.get(col))
+             for col, array in dataframe.items()},
+            size, capacity)
+        self._attach(data, _allocate(dataframe.index.values, capacity),
+                     dataframe.index.name, size)
+
+    def _attach(self, columns: Dict[str, np.ndarray], index: np.ndarray,
+                index_name: str = None, size: int = None) -> None:
+        """Use the given arrays as internal buffers, without copying them.
+
+        Arrays can be larger than `size` (defaults to the index length), the
+        extra rows being the available capacity. Memory-mapped arrays are
+        used in place, growing them for an append moves them in memory.
+
+        The data being replaced, the revision is bumped so values derived
+        from the previous data (e.g. indicators) are known to be stale.
+        """
+        self._revision += 1
+        self._frame = None
+        self._index_name = index_name
+        self._data = dict(columns)
+        self._data["index"] = index
+        self._keys = {key: key for key in self._data}
+        self._keys[index_name] = "index"
+        self._views.clear()
+        self._size = len(index) if size is None else size
+        self._reindex()
+
     def _reindex(self) -> None:
-        """Rebuild internal index from the original dataframe."""
+        """Reset the cursor to the end of the data."""
         self._cache.clear()
-        self._cursor = len(self.dataframe)
-        self._data = {col: np.array(array)
-                      for col, array in self.dataframe.items()}
-        self._data["index"] = self.dataframe.index.copy()
+        self._cursor = self._size
+
+    def _reserve(self, size: int) -> None:
+        """Ensure buffers can hold `size` rows, doubling their capacity."""
+        if size <= self.capacity:
+            return
+        capacity = max(size, 2 * self.capacity)
+        index = _allocate(self._data.pop("index")[:self._size], capacity)
+        self._data = _allocate_blocks(self._data, self._size, capacity)
+        self._data["index"] = index
+        for key, view in self._views.items():
+            view._buffer = self._data[key]
 
     def _get_slice(self, key) -> np.ndarray:
         """Extract an array subset based on DataFrame._cursor value.
 
-        TODO: doc here
+        In `views` mode, return the persistent `Column` of the key instead.
+        """
+        if self.views:
+            return self.column(key)
+        data = self._cache.get(key)
+        if data is None:
+            data = self._data[self._keys[key]][:self._cursor]
+            self._cache[key] = data
+        return data
+
+    def column(self, key: str) -> Column:
+        """Return the persistent cursor-bound view of a column."""
+        key = self._keys[key]
+        view = self._views.get(key)
+        if view is None:
+            view = Column(self._data[key], self)
+            self._views[key] = view
+        return view
+
+    def view(self, start: int = None, stop: int = None) -> FlexArray:
+        """Return a zero-copy view of rows between two positions.
+
+        Positions follow python slicing rules and are bounded by the cursor,
+        so a view never exposes rows beyond it. The view shares the buffers
+        of this array (no data is copied) and gets its own cursor, set at
+        its end. Appending to a view moves it to new buffers.
         """
-        if self._cache.get(key) is None:
-            key = "index" if key == self._data.get("index").name else key
-            self._cache[key] = self._data[key][:self._cursor]
-        return self._cache.get(key)
+        start, stop, _ = slice(start, stop).indices(self._cursor)
+        stop = max(start, stop)
+
+        view = copy.copy(self)
+        view._cache = {}
+        view._views = {}
+        view._row = Row(view)
+        view._listeners = []
+        view._attach({key: data[start:stop]
+                      for key, data in self._data.items() if key != "index"},
+                     self._data["index"][start:stop], self._index_name)
+
+        return view
 
     def set_cursor(self, cursor) -> None:
         """Set the internal cursor value to shift the subset representation.
 
-        TODO: doc here
+        Cached slices are dropped, `Column` views follow the cursor as is.
+
+        Raises:
+            IndexError: the cursor is not within `1` and the size.
         """
+        if not 0 < cursor <= self._size:
+            raise IndexError(f"Cursor {cursor} out of range "
+                             f"(1 to {self._size})")
+        self._set_cursor(cursor)
+
+    def _set_cursor(self, cursor: int) -> None:
+        """Set the cursor without bounds check, 0 exposing no row."""
         self._cursor = cursor
-        self._cache.clear()
+        if self._cache:
+            self._cache.clear()
 
     def append(self, array: FlexArray) -> None:
-        """Append another array to the current one."""
-        # TODO: ensure both dataframe are compatible
-        # index_name = self._data.get("index").name
-        self.dataframe = self.dataframe.append(array.dataframe)
+        """Append another array to the current one.
+
+        Only the new rows are copied, at the end of the internal buffers.
+        The cursor is moved to the new end of the data.
+
+        Raises:
+            ValueError: both arrays do not share the same columns.
+        """
+        if array._data.keys() != self._data.keys():
+            raise ValueError("Cannot append an array with different columns")
+
+        self._write(self._size, {key: data[:array._size]
+                                 for key, data in array._data.items()},
+                    array._size)
+
+    def append_row(self, values: Dict[str, Any]) -> None:
+        """Append a single row, in O(1) amortized.
+
+        Args:
+            values: value by column name, the index value being given
+                under the index name (usually "date").
+
+        Raises:
+            KeyError: a column value is missing.
+        """
+        self._write(self._size, {self._keys[key]: value
+                                 for key, value in values.items()}, 1)
+
+    def _write(self, start: int, values: Dict[str, np.ndarray],
+               count: int) -> None:
+        """Write `count` rows of `values` into the buffers at `start`."""
+        self._reserve(start + count)
+        for key, data in self._data.items():
+            data[start:start + count] = values[key]
+        self._size = start + count
+        self._frame = None
         self._reindex()
+        for listener in self._listeners:
+            listener(start, count)
 
-    @property
-    def current(self) -> dict:
-        """Return the last candle values.
+    def _amend(self) -> None:
+        """Notify the last row updated in place.
 
-        TODO: doc here
+        Unlike replaced data, the revision is kept: values derived from the
+        previous rows stay valid, only the ones of the last row have to be
+        computed again, which `_amends` counts (see `Indicator`). Listeners
+        are called as for an appended row.
         """
-        values = {key: data[self._cursor - 1]
-                  for key, data in self._data.items()}
-        values[self._data.get("index").name] = values.pop("index")
+        self._amends += 1
+        self._frame = None
+        self._cache.clear()
+        for listener in self._listeners:
+            listener(self._size - 1, 1)
+
+    def subscribe(self, listener: Callable[[int, int], None]) -> None:
+        """Register a callback notified of appended or amended rows.
 
-        return values
+        The listener is called with the position of the first new row and
+        the number of rows appended, once they are written. The last row
+        updated in place is notified the same way, its position being
+        before the end of the data seen on the previous call.
+        """
+        self._listeners.append(listener)
+
+    @property
+    def current(self) -> Row:
+        """Return the candle values under the cursor.
+
+        The same `Row` object is returned on each call and always reflects
+        the current cursor position, nothing is allocated.
+        """
+        return self._row
@@ -7,6 +7,7 @@
 __copyright__ = "Copyright 2019 - 2021 Richard Kemp"
 __revision__ = "$Id$"
 
+from datetime import datetime
 from os.path import dirname, join
 
 from mercury import Timeframe, Timeseries
@@ -72,6 +73,18 @@ class TestGetMethod():
         assert ts.timeframe is TIMEFRAME
         assert isinstance(ts.data, DataFrame)
 
+    def test_get_range(self):
+        ds = Datasource(FILE, COLSMAP, INDEX, INSTRUMENT, TIMEFRAME)
+        index = ds.data.index
+        ts = ds.get_timeseries(index[5], index[9])
+        assert len(ts) == 5
+        assert ts.close[0] == ds.data.close.iloc[5]
+
+    def test_get_invalid_range(self):
+        ds = Datasource(FILE, COLSMAP, INDEX, INSTRUMENT, TIMEFRAME)
+        with pytest.raises(IndexError):
+            ds.get_timeseries(datetime(1900, 1, 1), datetime(1900, 2, 1))
+
     # def test_get_existing_range_data(self):
     #     ds = CSV(FILE, COLSMAP, INDEX)
     #     df = ds.get()
@@ -82,3 +95,15 @@ class TestGetMethod():
     #                         to_date=datetime(2019, 2, 1, 23, 00, 00),
     #                         instrument='EURUSD',
     #                         timeframe=Timeframe.H1)
+
+
+class TestToFile():
+    def test_convert(self, tmp_path):
+        ds = Datasource(FILE, COLSMAP, INDEX, INSTRUMENT, TIMEFRAME)
+        path = str(tmp_path / "eurusd.bin")
+        ds.to_file(path)
+        ts = Timeseries.from_file(path)
+        assert ts.instrument == INSTRUMENT
+        assert ts.timeframe is TIMEFRAME
+        assert len(ts) == len(ds.data)
+        assert ts.close[-1] == ds.data.close.iloc[-1]
@@ -11,6 +11,8 @@ import pandas as pd
 import pytest
 from numpy import array, random
 
+from mercury.lib import Datastore
+
 
 @pytest.fixture
 def dataset():
@@ -30,3 +32,24 @@ def dataset():
         "volume": array(random.uniform(low=200, high=1500, size=(50,)),
                         dtype=int),
     }
+
+
+class MemoryDatastore(Datastore):
+    def _connect(self):
+        self.data = {}
+
+    def store(self, name, data, metadata={}):
+        self.data[name] = data
+
+    def append(self, name, data):
+        self.data[name] = self.data[name].append(data)
+
+    def get(self, name):
+        return self.data[name]
+
+
+@pytest.fixture
+def datastore():
+    store = MemoryDatastore()
+    store._connect()
+    return store
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from mercury import PriceType, TickAggregator, Timeframe, Timeseries
+
+
+START = pd.Timestamp("2021-01-04 10:00:00").timestamp()
+
+
+@pytest.fixture
+def aggregator():
+    return TickAggregator("EURUSD", [Timeframe.M1, Timeframe.M5])
+
+
+class TestTickAggregator():
+    def test_open_bar(self, aggregator):
+        for offset, bid in enumerate([1.0, 1.2, 0.9, 1.1]):
+            aggregator.push(START + offset, bid, bid + 0.1)
+        bar = aggregator.current(Timeframe.M1)
+        assert (bar["open"], bar["high"], bar["low"], bar["close"],
+                bar["volume"]) == (1.0, 1.2, 0.9, 1.1, 4)
+        assert len(aggregator.timeseries[Timeframe.M1]) == 0
+
+    def test_close_bar(self, aggregator):
+        aggregator.push(START, 1.0, 1.1)
+        aggregator.push(START + 30, 1.2, 1.3)
+        aggregator.push(START + 60, 1.3, 1.4)
+        candles = aggregator.timeseries[Timeframe.M1]
+        assert len(candles) == 1
+        assert candles.current["date"] == pd.Timestamp("2021-01-04 10:00")
+        assert candles.current["high"] == 1.2
+        assert len(aggregator.timeseries[Timeframe.M5]) == 0
+
+    def test_matches_resample(self, aggregator):
+        prices = np.random.uniform(1.0, 1.2, 1200)
+        for offset, bid in enumerate(prices):
+            aggregator.push(START + offset, bid, bid)
+        aggregator.flush()
+        m1 = aggregator.timeseries[Timeframe.M1]
+        m5 = aggregator.timeseries[Timeframe.M5]
+        assert len(m1) == 20
+        pd.testing.assert_frame_equal(m1.resample(Timeframe.M5).data,
+                                      m5.data)
+
+    def test_subscribers_notified(self, aggregator):
+        closed = []
+        aggregator.timeseries[Timeframe.M1].subscribe(
+            lambda start, count: closed.append(start))
+        for offset in range(0, 180, 10):
+            aggregator.push(START + offset, 1.0, 1.1)
+        assert closed == [0, 1]
+
+    def test_mid_price(self):
+        aggregator = TickAggregator("EURUSD", [Timeframe.M1],
+                                    price=PriceType.LAST)
+        aggregator.push(START, 1.0, 1.2)
+        assert aggregator.current(Timeframe.M1)["close"] == 1.1
+
+    def test_history_then_stream(self, monkeypatch):
+        xapi = pytest.importorskip("mercury.extras.brokers.xapi")
+        monkeypatch.setenv("TZ", "Asia/Tokyo")
+        time.tzset()
+        try:
+            history = xapi.reduce_candles([
+                {"ctm": (START - 60 * bars) * 1000, "open": 1.0, "low": 0.0,
+                 "high": 0.1, "close": 0.05, "vol": 10}
+                for bars in (3, 2, 1)])
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+        candles = Timeseries.from_arrays("EURUSD", Timeframe.M1, history)
+        aggregator = TickAggregator("EURUSD", [Timeframe.M1],
+                                    timeseries={Timeframe.M1: candles})
+        aggregator.push(START, 1.0, 1.1)
+        aggregator.push(START + 60, 1.2, 1.3)
+        assert candles.date[2] == np.datetime64("2021-01-04T09:59")
+        assert len(candles) == 4
+        assert candles.current["date"] == pd.Timestamp("2021-01-04 10:00")
+        assert (np.diff(candles.date) > np.timedelta64(0)).all()
@@ -0,0 +1,118 @@
+import pytest
+
+import numpy as np
+
+from mercury import (OrderAction, PositionStatus, PositionType, PriceType,
+                     Strategy, Timeframe, Timeseries)
+from mercury.backtest import BacktestBroker, Simulator
+
+
+@pytest.fixture
+def timeseries():
+    return Timeseries.from_arrays("EURUSD", Timeframe.H1, {
+        "date": np.datetime64("2021-01-04T00", "h") + np.arange(4),
+        "open": [1.00, 1.01, 1.04, 1.10],
+        "high": [1.02, 1.05, 1.04, 1.12],
+        "low": [0.99, 1.00, 0.95, 1.08],
+        "close": [1.01, 1.04, 0.96, 1.11],
+    })
+
+
+@pytest.fixture
+def broker(timeseries):
+    broker = BacktestBroker(spread=0.01)
+    broker.attach(timeseries)
+    timeseries.set_cursor(1)
+    return broker
+
+
+def step(broker, timeseries):
+    timeseries.set_cursor(len(timeseries) + 1)
+    broker.match()
+
+
+class TestBacktestBroker():
+    def test_market(self, broker, timeseries):
+        assert broker._api_get_market_price(
+            "EURUSD", PriceType.ASK) == pytest.approx(1.02)
+        broker._api_submit_order(OrderAction.BUY, 2, instrument="EURUSD")
+        position, = broker.positions
+        assert position.type is PositionType.BUY
+        assert position.open_price == pytest.approx(1.02)
+        step(broker, timeseries)
+        assert broker.close(position, None) is None
+        assert position.status is PositionStatus.CLOSED
+        assert position.profit == pytest.approx(0.04)
+        assert broker.account.balance == pytest.approx(10000.04)
+        assert broker._api_get_positions(
+            status=PositionStatus.CLOSED) == [position]
+
+    def test_pending(self, broker, timeseries):
+        broker._api_submit_order(OrderAction.BUY_LIMIT, 1, price=1.00,
+                                 instrument="EURUSD")
+        stop = broker._api_submit_order(OrderAction.BUY_STOP, 1, price=1.06,
+                                        instrument="EURUSD")
+        broker._api_submit_order(OrderAction.SELL_LIMIT, 1, price=1.2,
+                                 instrument="EURUSD")
+        step(broker, timeseries)
+        position, = broker.positions
+        assert position.open_price == 1.00
+        assert stop in broker.orders
+        step(broker, timeseries)
+        step(broker, timeseries)
+        assert stop not in broker.orders
+        assert broker.positions[-1].open_price == 1.10  # gap at the open
+        assert len(broker.orders) == 1
+
+    def test_cancel(self, broker, timeseries):
+        order = broker._api_submit_order(OrderAction.SELL_STOP, 1,
+                                         price=1.00, instrument="EURUSD")
+        broker.cancel_order(order)
+        step(broker, timeseries)
+        assert not broker.positions
+        with pytest.raises(KeyError):
+            broker.cancel_order(order)
+
+    def test_stop_loss_first(self, broker, timeseries):
+        step(broker, timeseries)
+        broker._api_submit_order(OrderAction.BUY, 1, instrument="EURUSD",
+                                 sl=0.97, tp=1.035)
+        step(broker, timeseries)
+        position, = broker.history
+        assert position.close_price == 0.97
+        assert position.profit == pytest.approx(0.97 - 1.05)
+
+    def test_short_exits(self, broker, timeseries):
+        broker._api_submit_order(OrderAction.SELL, 1, instrument="EURUSD",
+                                 sl=1.03, tp=0.9)
+        step(broker, timeseries)
+        position, = broker.history
+        assert position.close_price == 1.03
+        assert position.profit == pytest.approx(1.01 - 1.03)
+
+    def test_candles(self, broker, timeseries):
+        step(broker, timeseries)
+        candles = broker._api_get_candles("EURUSD", Timeframe.H1,
+                                          start_date="2021-01-04T01")
+        np.testing.assert_array_equal(candles.close, [1.04])
+
+
+class TestSimulatorBroker():
+    def test_run(self, timeseries, datastore):
+        class BuyOnce(Strategy):
+            def setup(self):
+                pass
+
+            def tick(self):
+                if not self.broker.history and not self.broker.positions:
+                    self.broker._api_submit_order(
+                        OrderAction.BUY, 1, instrument="EURUSD", sl=0.98)
+
+        simulator = Simulator(BuyOnce, datastore=datastore,
+                              timeseries=timeseries, warmup=1)
+        for _ in range(2):
+            strategy = simulator.run()
+            position, = strategy.broker.history
+            assert position.open_price == 1.01
+            assert position.close_price == 0.98
+            assert strategy.broker.account.balance == pytest.approx(9999.97)
@@ -0,0 +1,81 @@
+import pytest
+
+import numpy as np
+
+from mercury.backtest import simulate
+
+
+CLOSE = np.array([1., 2., 3., 4., 5., 4., 3., 2.])
+SIGNAL = np.array([1, 0, 0, 0, 0, 0, 0, 0], dtype=bool)
+EXIT = np.array([0, 0, 0, 1, 0, 0, 0, 0], dtype=bool)
+
+
+class TestSimulate():
+    def test_signals(self):
+        result = simulate(CLOSE, SIGNAL | np.roll(EXIT, 2), EXIT)
+        np.testing.assert_array_equal(result.position,
+                                      [1, 1, 1, 0, 0, 1, 1, 1])
+        np.testing.assert_array_equal(result.pnl, [0, 1, 2, 3, 3, 3, 2, 1])
+        assert result.trades.tolist() == [(0, 3, 1., 4., 3.)]
+
+    def test_short(self):
+        result = simulate(CLOSE, SIGNAL, EXIT, direction=-1, size=2)
+        np.testing.assert_array_equal(result.position,
+                                      [-2, -2, -2, 0, 0, 0, 0, 0])
+        assert result.trades["pnl"].tolist() == [-6.]
+
+    def test_stop_loss_first(self):
+        high = CLOSE + 2
+        low = CLOSE - 2
+        result = simulate(CLOSE, SIGNAL, EXIT, high=high, low=low,
+                          stop_loss=0.5, take_profit=1.5)
+        assert result.trades.tolist() == [(0, 1, 1., 0.5, -0.5)]
+        result = simulate(CLOSE, SIGNAL, EXIT, high=high, low=low,
+                          take_profit=1.5)
+        assert result.trades.tolist() == [(0, 1, 1., 2.5, 1.5)]
+
+    def test_gaps(self):
+        opening = np.r_[CLOSE[0], 0.2, 6.0, CLOSE[3:]]
+        for jit in (True, False):
+            result = simulate(CLOSE, SIGNAL, EXIT, low=CLOSE - 2,
+                              opening=opening, stop_loss=0.5, jit=jit)
+            assert result.trades.tolist() == [(0, 1, 1., 0.2, -0.8)]
+            result = simulate(CLOSE, SIGNAL, EXIT, high=CLOSE + 2,
+                              opening=opening, take_profit=4, jit=jit)
+            assert result.trades.tolist() == [(0, 2, 1., 6.0, 5.0)]
+
+    def test_length(self):
+        with pytest.raises(ValueError):
+            simulate(CLOSE, SIGNAL[:-1], EXIT)
+
+    @pytest.mark.parametrize("direction", [1, -1])
+    def test_jit(self, direction):
+        state = np.random.RandomState(0)
+        close = 100 + np.cumsum(state.normal(size=5000))
+        entries = state.rand(5000) < 0.05
+        exits = state.rand(5000) < 0.05
+        exits[-1] = True
+        params = dict(high=close + 1, low=close - 1, direction=direction,
+                      stop_loss=1.5, take_profit=3)
+        compiled = simulate(close, entries, exits, **params)
+        python = simulate(close, entries, exits, jit=False, **params)
+        assert len(compiled.trades) > 10
+        np.testing.assert_array_equal(compiled.position, python.position)
+        np.testing.assert_array_equal(compiled.pnl, python.pnl)
+        np.testing.assert_array_equal(compiled.trades, python.trades)
+        assert compiled.pnl[-1] == pytest.approx(
+            compiled.trades["pnl"].sum())
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_vectorized(self, seed):
+        state = np.random.RandomState(seed)
+        close = 100 + np.cumsum(state.normal(size=2000))
+        entries = state.rand(2000) < 0.1
+        exits = state.rand(2000) < 0.1
+        vectorized = simulate(close, entries, exits, direction=-1)
+        # a stop loss never reached runs the bar loop
+        loop = simulate(close, entries, exits, direction=-1, stop_loss=1e9)
+        assert (entries & exits).any()
+        np.testing.assert_array_equal(vectorized.position, loop.position)
+        np.testing.assert_array_equal(vectorized.pnl, loop.pnl)
+        np.testing.assert_array_equal(vectorized.trades, loop.trades)
@@ -1,6 +1,13 @@
 import pytest
 
+import numpy as np
+import pandas as pd
+
+from mercury import (Indicator, OrderAction, Parameter, Strategy, Timeframe,
+                     Timeseries)
 from mercury.backtest import Simulator
+from mercury.indicators import SMA
+from mercury.lib import crossover_mask, crossunder_mask
 
 
 # bt = Simulator(StrategySMACrossOver, 'EURUSD', datastore=, datasource=csv_ds)
@@ -14,8 +21,84 @@ from mercury.backtest import Simulator
 # Report methods : print, plot, export(pdf, html, json, csv)
 # -> report info should vary depending on a simple run or from an optimize one
 
+class RecordStrategy(Strategy):
+    runs = []
+
+    def setup(self):
+        self.add_indicator(Indicator(
+            "mean", lambda timeseries: (pd.Series(timeseries.close)
+                                        .rolling(5).mean().values)))
+        self.values = []
+        self.runs.append(self.values)
+
+    def tick(self):
+        self.values.append(float(self.mean))
+
+
+class SmaStrategy(Strategy):
+    fast = Parameter(10, values=[2, 3])
+    slow = Parameter(30)
+
+    def setup(self):
+        self.add_indicator(SMA(self.fast).indicator("fast_sma"))
+        self.add_indicator(SMA(self.slow).indicator("slow_sma"))
+
+    def tick(self):
+        pass
+
+    def signals(self):
+        return {"entries": crossover_mask(self.fast_sma, self.slow_sma),
+                "exits": crossunder_mask(self.fast_sma, self.slow_sma)}
+
+
+class SignalStrategy(Strategy):
+    rules = {}
+
+    def setup(self):
+        pass
+
+    def tick(self):
+        bar = len(self.timeseries) - 1
+        if self.broker.positions:
+            if self.rules["exits"][bar]:
+                self.broker.close(self.broker.positions[0], None)
+        elif self.rules["entries"][bar]:
+            self.broker._api_submit_order(OrderAction.SELL, 2,
+                                          instrument="EURUSD")
+
+
+class CrossStrategy(SmaStrategy):
+    def tick(self):
+        above = float(self.fast_sma) > float(self.slow_sma)
+        if self.broker.positions:
+            if not above:
+                self.broker.close(self.broker.positions[0], None)
+        elif above:
+            self.broker._api_submit_order(OrderAction.BUY, 1,
+                                          instrument="EURUSD")
+
+
+def profits(strategy):
+    return [position.profit for position in strategy.broker.history]
+
+
+@pytest.fixture
+def timeseries(dataset):
+    return Timeseries("EURUSD", Timeframe.H1,
+                      pd.DataFrame(dataset).set_index("date"))
+
+
 class TestSimulator():
-    pass
+    def test_precompute(self, timeseries, datastore):
+        RecordStrategy.runs.clear()
+        for precompute in (False, True):
+            timeseries.set_cursor(len(timeseries.data))
+            Simulator(RecordStrategy, datastore=datastore,
+                      timeseries=timeseries, warmup=5,
+                      precompute=precompute).run()
+        incremental, precomputed = RecordStrategy.runs
+        assert len(precomputed) == 46
+        np.testing.assert_allclose(precomputed, incremental)
 
     # sanitychecks strategy inheritance
     # sanitychecks datastore inheritance
@@ -51,3 +134,134 @@ class TestSimulator():
     #   - Report
 
     # export as pdf ?
+
+    def test_optimize(self, timeseries, datastore, monkeypatch):
+        batches = []
+        batch = SMA._batch
+
+        def counted(self, values):
+            batches.append(self.timeperiod)
+            return batch(self, values)
+
+        monkeypatch.setattr(SMA, "_batch", counted)
+        simulator = Simulator(SmaStrategy, datastore=datastore,
+                              timeseries=timeseries, precompute=True)
+        runs = list(simulator.optimize(fast=range(1, 6), slow=range(6, 11)))
+        assert len(runs) == 25
+        assert sorted(batches) == list(range(1, 11))
+        params, history = runs[-1]
+        assert params == {"fast": 5, "slow": 10}
+        assert history == simulator.run(**params).broker.history
+
+    def test_declared_values(self, timeseries, datastore):
+        simulator = Simulator(SmaStrategy, datastore=datastore,
+                              timeseries=timeseries)
+        runs = [params for params, _ in simulator.optimize(slow=[20])]
+        assert runs == [{"fast": 2, "slow": 20}, {"fast": 3, "slow": 20}]
+
+    def test_inferred_warmup(self, timeseries, datastore):
+        RecordStrategy.runs.clear()
+        Simulator(RecordStrategy, datastore=datastore,
+                  timeseries=timeseries).run()
+        values = RecordStrategy.runs[0]
+        assert len(values) == 46
+        assert not np.isnan(values[0])
+
+    def test_simulate(self, timeseries, datastore):
+        simulator = Simulator(SmaStrategy, datastore=datastore,
+                              timeseries=timeseries)
+        result = simulator.simulate(fast=2, slow=5)
+        close = timeseries.data.close.values
+        assert len(result.pnl) == len(close)
+        assert not result.position[:4].any()
+        for trade in result.trades:
+            assert trade["pnl"] == close[trade["exit"]] - close[trade["entry"]]
+        np.testing.assert_allclose(result.pnl[result.trades["exit"]],
+                                   np.cumsum(result.trades["pnl"]))
+        python = simulator.simulate(fast=2, slow=5, jit=False)
+        np.testing.assert_array_equal(result.pnl, python.pnl)
+
+    def test_simulate_unsupported(self, timeseries, datastore):
+        with pytest.raises(NotImplementedError):
+            Simulator(RecordStrategy, datastore=datastore,
+                      timeseries=timeseries).simulate()
+
+    def test_simulate_matches_run(self, timeseries, datastore):
+        state = np.random.RandomState(0)
+        rules = {"entries": state.rand(50) < 0.3,
+                 "exits": state.rand(50) < 0.3}
+        rules["exits"][-1] = True
+        simulator = Simulator(SignalStrategy, datastore=datastore,
+                              timeseries=timeseries, warmup=1)
+        SignalStrategy.rules = rules
+        broker = simulator.run().broker
+        history = broker.history
+        result = simulator.simulate(dict(rules, size=2, direction=-1))
+        assert len(history) == len(result.trades) > 5
+        assert [position.profit for position in history] == \
+            result.trades["pnl"].tolist()
+        assert [position.open_price for position in history] == \
+            result.trades["entry_price"].tolist()
+        assert result.pnl[-1] == pytest.approx(
+            broker.account.balance - broker.account.capital)
+
+    def test_optimize_brokers(self, timeseries, datastore):
+        simulator = Simulator(CrossStrategy, datastore=datastore,
+                              timeseries=timeseries, precompute=True)
+        runs = dict((tuple(params.values()), history)
+                    for params, history in simulator.optimize(
+                        fast=[2, 3], slow=[6]))
+        for fast in (2, 3):
+            assert [position.profit for position in runs[(fast, 6)]] == \
+                profits(simulator.run(fast=fast, slow=6))
+        assert runs[(2, 6)] != runs[(3, 6)]
+        assert not simulator.broker.history
+
+    def test_optimize_workers(self, timeseries, datastore):
+        simulator = Simulator(CrossStrategy, datastore=datastore,
+                              timeseries=timeseries, precompute=True)
+        grid = {"fast": [2, 3, 4], "slow": [6, 8]}
+        sequential = dict((tuple(params.values()), outcome)
+                          for params, outcome in simulator.optimize(
+                              evaluate=profits, **grid))
+        parallel = dict((tuple(params.values()), outcome)
+                        for params, outcome in simulator.optimize(
+                            workers=2, evaluate=profits, **grid))
+        assert parallel == sequential
+        assert any(sequential.values())
+        params, history = next(simulator.optimize(workers=2, fast=[2],
+                                                  slow=[6]))
+        assert [position.profit for position in history] == \
+            sequential[(2, 6)]
+
+    def test_optimize_samples(self, timeseries, datastore):
+        simulator = Simulator(SmaStrategy, datastore=datastore,
+                              timeseries=timeseries)
+        grid = {"fast": range(1, 6), "slow": range(6, 11)}
+        runs = [params for params, _ in simulator.optimize(
+            samples=8, seed=1, evaluate=profits, **grid)]
+        assert len(runs) == len(set(map(tuple, map(dict.values, runs)))) == 8
+        assert all(params["fast"] in grid["fast"] and
+                   params["slow"] in grid["slow"] for params in runs)
+        assert runs == [params for params, _ in simulator.optimize(
+            samples=8, seed=1, evaluate=profits, **grid)]
+
+    def test_optimize_halving(self, datastore):
+        state = np.random.RandomState(0)
+        timeseries = Timeseries.from_arrays("EURUSD", Timeframe.M1, {
+            "date": np.arange(900).astype("datetime64[m]"),
+            "close": 1 + np.cumsum(state.normal(0, 0.001, 900))})
+        simulator = Simulator(CrossStrategy, datastore=datastore,
+                              timeseries=timeseries, precompute=True)
+        grid = {"fast": [2, 3, 4], "slow": [6, 8, 10]}
+        complete = dict((tuple(params.values()), outcome)
+                        for params, outcome in simulator.optimize(
+                            evaluate=profits, **grid))
+        for workers in (1, 2):
+            pruned = dict((tuple(params.values()), outcome)
+                          for params, outcome in simulator.optimize(
+                              workers=workers, evaluate=profits, halving=3,
+                              **grid))
+            assert 1 <= len(pruned) < len(complete)
+            assert all(complete[params] == outcome
+                       for params, outcome in pruned.items())
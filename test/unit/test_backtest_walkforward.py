@@ -0,0 +1,94 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from mercury import OrderAction, Parameter, Strategy, Timeframe, Timeseries
+from mercury.backtest import Simulator, WalkForward
+from mercury.indicators import SMA
+
+
+class CrossStrategy(Strategy):
+    fast = Parameter(2)
+    slow = Parameter(6)
+
+    def setup(self):
+        self.add_indicator(SMA(self.fast).indicator("fast_sma"))
+        self.add_indicator(SMA(self.slow).indicator("slow_sma"))
+
+    def tick(self):
+        above = float(self.fast_sma) > float(self.slow_sma)
+        if self.broker.positions:
+            if not above:
+                self.broker.close(self.broker.positions[0], None)
+        elif above:
+            self.broker._api_submit_order(OrderAction.BUY, 1,
+                                          instrument="EURUSD")
+
+
+def balance(strategy):
+    return strategy.broker.account.balance
+
+
+@pytest.fixture
+def simulator(dataset, datastore):
+    timeseries = Timeseries("EURUSD", Timeframe.H1,
+                            pd.DataFrame(dataset).set_index("date"))
+    return Simulator(CrossStrategy, datastore=datastore,
+                     timeseries=timeseries, precompute=True)
+
+
+class TestWalkForward():
+    def test_windows(self, simulator):
+        assert WalkForward(simulator, train=20, test=10).windows() == [
+            ((0, 20), (20, 30)), ((10, 30), (30, 40)), ((20, 40), (40, 50))]
+        assert WalkForward(simulator, train=30, test=10,
+                           anchored=True).windows() == [
+            ((0, 30), (30, 40)), ((0, 40), (40, 50))]
+        assert WalkForward(simulator, train=20, test=10,
+                           step=15).windows() == [((0, 20), (20, 30)),
+                                                  ((15, 35), (35, 45))]
+        with pytest.raises(ValueError):
+            WalkForward(simulator, train=20, test=10, step=5)
+
+    def test_run(self, simulator, monkeypatch):
+        batches = []
+        batch = SMA._batch
+
+        def counted(self, values):
+            batches.append(self.timeperiod)
+            return batch(self, values)
+
+        monkeypatch.setattr(SMA, "_batch", counted)
+        grid = {"fast": [2, 3], "slow": [5, 6]}
+        result = WalkForward(simulator, train=20, test=10).run(**grid)
+        assert sorted(batches) == [2, 3, 5, 6]
+        assert len(result.folds) == 3
+        assert len(result.equity) == len(result.dates) == 30
+        assert result.equity.any()
+        assert list(result.dates) == list(
+            simulator.candles._data["index"][20:50])
+
+        for fold in result.folds:
+            scores = {(fast, slow): simulator._run(
+                {"fast": fast, "slow": slow}, fold["train"])
+                .broker.account.balance
+                for fast in grid["fast"] for slow in grid["slow"]}
+            assert fold["score"] == max(scores.values())
+            assert scores[tuple(fold["params"].values())] == fold["score"]
+
+        first, last = result.folds[0]["test"]
+        strategy = simulator._run(result.folds[0]["params"], (first, last))
+        closed = sum(position.profit for position in strategy.broker.history)
+        held = sum((simulator.candles.close[last - 1] -
+                    position.open_price) * position.volume
+                   for position in strategy.broker.positions)
+        assert result.equity[9] == pytest.approx(closed + held)
+
+    def test_workers(self, simulator):
+        walk = WalkForward(simulator, train=20, test=10)
+        sequential = walk.run(score=balance, fast=[2, 3], slow=[5, 6])
+        parallel = walk.run(score=balance, workers=2, fast=[2, 3],
+                            slow=[5, 6])
+        assert parallel.folds == sequential.folds
+        np.testing.assert_array_equal(parallel.equity, sequential.equity)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from mercury import Indicator, Timeframe, Timeseries
+from mercury.lib import (cross, cross_mask, crossover, crossover_mask,
+                         crossunder, crossunder_mask)
+
+
+FAST = np.array([1.0, 2.0, 3.0, 2.0, 1.0, 2.0, np.nan, 3.0])
+SLOW = np.full(8, 1.5)
+
+
+class TestCrossMasks():
+    def test_masks(self):
+        np.testing.assert_array_equal(
+            np.flatnonzero(crossover_mask(FAST, SLOW)), [1, 5])
+        np.testing.assert_array_equal(
+            np.flatnonzero(crossunder_mask(FAST, SLOW)), [4])
+        np.testing.assert_array_equal(
+            np.flatnonzero(cross_mask(FAST, SLOW)), [1, 4, 5])
+
+    def test_number(self):
+        np.testing.assert_array_equal(crossover_mask(FAST, 1.5),
+                                      crossover_mask(FAST, SLOW))
+        np.testing.assert_array_equal(crossunder_mask(1.5, FAST),
+                                      crossover_mask(FAST, SLOW))
+
+    def test_matches_last_bar_functions(self):
+        fast, slow = pd.Series(FAST), pd.Series(SLOW)
+        for functions in ((crossover, crossover_mask),
+                          (crossunder, crossunder_mask),
+                          (cross, cross_mask)):
+            last, mask = functions
+            expected = [bool(last(fast[:i], slow[:i]))
+                        for i in range(1, len(fast) + 1)]
+            np.testing.assert_array_equal(mask(fast, slow), expected)
+
+
+class TestIndicators():
+    def test_indicator_values(self, dataset):
+        timeseries = Timeseries("EURUSD", Timeframe.H1,
+                                pd.DataFrame(dataset).set_index("date"))
+        close = Indicator("close", lambda timeseries: timeseries.close)
+        mean = Indicator("mean", lambda timeseries: np.full(
+            len(timeseries), timeseries.close.mean()))
+        for indicator in (close, mean):
+            indicator.precompute(timeseries)
+        timeseries.set_cursor(30)
+        np.testing.assert_array_equal(close.values, dataset["close"][:30])
+        assert crossover(close, mean) == crossover_mask(close, mean)[-1]
+        assert len(cross_mask(close, mean)) == 30
@@ -0,0 +1,59 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from mercury import (Engine, Indicator, Parameter, Strategy, Timeframe,
+                     Timeseries)
+from mercury.indicators import SMA
+
+
+class SmaStrategy(Strategy):
+    timeperiod = Parameter(10)
+
+    def setup(self):
+        self.add_indicator(SMA(self.timeperiod).indicator("sma"))
+
+    def tick(self):
+        pass
+
+
+class FakeBroker():
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.requests = []
+
+    def _api_get_candles(self, instrument, timeframe, start_date, end_date):
+        self.requests.append((start_date, end_date))
+        return Timeseries(instrument, timeframe,
+                          pd.DataFrame(self.dataset).set_index("date"))
+
+
+class TestStart():
+    def test_inferred_warmup(self, dataset, monkeypatch):
+        monkeypatch.setattr(Engine, "_run_loop", lambda self: None)
+        broker = FakeBroker(dataset)
+        engine = Engine(broker=broker, strategy=SmaStrategy)
+        engine.start(instrument="EURUSD", timeframe=Timeframe.H1)
+        assert engine.warmup == 10
+        start_date, end_date = broker.requests[0]
+        assert end_date - start_date == pd.Timedelta(hours=10)
+        assert engine.strategy.timeseries is engine.candles
+        assert not np.isnan(float(engine.strategy.sma))
+
+    def test_unknown_lookback(self, dataset, monkeypatch):
+        class BatchStrategy(Strategy):
+            def setup(self):
+                self.add_indicator(Indicator(
+                    "close", lambda timeseries: timeseries.close))
+
+            def tick(self):
+                pass
+
+        monkeypatch.setattr(Engine, "_run_loop", lambda self: None)
+        engine = Engine(broker=FakeBroker(dataset), strategy=BatchStrategy)
+        engine.start(instrument="EURUSD", timeframe=Timeframe.H1)
+        assert engine.warmup == 1
+        engine = Engine(broker=FakeBroker(dataset), strategy=BatchStrategy)
+        engine.start(instrument="EURUSD", timeframe=Timeframe.H1, warmup=3)
+        assert engine.warmup == 3
@@ -0,0 +1,81 @@
+import pytest
+
+import numpy as np
+
+from mercury import Feed, Strategy, Timeframe, Timeseries
+
+
+def hourly(bars, start="2021-01-04"):
+    dates = np.datetime64(start, "h") + np.arange(bars)
+    close = np.arange(bars, dtype=float)
+    return Timeseries.from_arrays("EURUSD", Timeframe.H1, {
+        "date": dates, "high": close + 1, "close": close})
+
+
+class FeedStrategy(Strategy):
+    def setup(self):
+        self.add_feed("daily", Timeframe.D1)
+
+    def tick(self):
+        pass
+
+
+class TestFeed():
+    def test_requires_source(self):
+        with pytest.raises(ValueError):
+            Feed()
+        with pytest.raises(ValueError):
+            Feed(Timeframe.D1, timeseries=hourly(1))
+
+    def test_completed_bars(self):
+        base = hourly(72)
+        feed = Feed(Timeframe.D1)
+        for cursor in range(1, 73):
+            base.set_cursor(cursor)
+            daily = feed.sync(base)
+            assert len(daily) == cursor // 24
+        base.set_cursor(50)
+        daily = feed.sync(base)
+        np.testing.assert_array_equal(daily.close, [23, 47])
+        np.testing.assert_array_equal(daily.high, [24, 48])
+
+    def test_loaded(self):
+        base = hourly(72)
+        daily = base.resample(Timeframe.D1)
+        feed = Feed(timeseries=daily)
+        base.set_cursor(48)
+        assert feed.sync(base) is daily
+        assert len(daily) == 2
+        base.set_cursor(47)
+        assert len(feed.sync(base)) == 1
+
+    def test_append(self):
+        base = hourly(30)
+        feed = Feed(Timeframe.D1)
+        assert len(feed.sync(base)) == 1
+        base.append(hourly(20, start="2021-01-05T06"))
+        daily = feed.sync(base)
+        assert len(daily) == 2
+        assert daily.close[-1] == 17
+        assert daily.high[-1] == 30
+
+    def test_rebind(self):
+        feed = Feed(Timeframe.D1)
+        assert len(feed.sync(hourly(30))) == 1
+        assert len(feed.sync(hourly(50))) == 2
+        base = hourly(10)
+        feed.sync(base)
+        base.dataframe = hourly(72).dataframe
+        assert len(feed.sync(base)) == 3
+
+
+class TestStrategyFeed():
+    def test_attribute(self):
+        base = hourly(72)
+        strategy = FeedStrategy(None, base)
+        base.set_cursor(30)
+        assert len(strategy.daily) == 1
+        base.set_cursor(72)
+        assert strategy.daily.close[-1] == 71
+        with pytest.raises(AttributeError):
+            strategy.weekly
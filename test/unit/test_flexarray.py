@@ -0,0 +1,160 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from mercury.lib import FlexArray
+
+
+@pytest.fixture
+def dataframe(dataset):
+    return pd.DataFrame(dataset).set_index("date")
+
+
+class TestAppend():
+    def test_append_rows(self, dataframe):
+        array = FlexArray(dataframe.iloc[:10])
+        array.append(FlexArray(dataframe.iloc[10:11]))
+        assert len(array) == 11
+        assert array.close[-1] == dataframe.close.iloc[10]
+        np.testing.assert_array_equal(array.close, dataframe.close[:11])
+
+    def test_capacity_doubles(self, dataframe):
+        array = FlexArray(dataframe.iloc[:10])
+        assert array.capacity == 10
+        for i in range(10, 21):
+            array.append(FlexArray(dataframe.iloc[i:i + 1]))
+        assert array.capacity == 40
+        assert len(array) == 21
+
+    def test_preallocated_capacity(self, dataframe):
+        array = FlexArray(dataframe.iloc[:10], capacity=50)
+        buffer = array._data["close"]
+        array.append(FlexArray(dataframe.iloc[10:]))
+        assert array._data["close"] is buffer
+
+    def test_dataframe_built_on_demand(self, dataframe):
+        array = FlexArray(dataframe.iloc[:10])
+        array.append(FlexArray(dataframe.iloc[10:]))
+        assert array._frame is None
+        pd.testing.assert_frame_equal(array.dataframe, dataframe,
+                                      check_freq=False)
+        assert array.dataframe is array.dataframe
+
+    def test_incompatible_columns(self, dataframe):
+        array = FlexArray(dataframe)
+        with pytest.raises(ValueError):
+            array.append(FlexArray(dataframe[["close"]]))
+
+    def test_current_after_append(self, dataframe):
+        array = FlexArray(dataframe.iloc[:10])
+        array.append(FlexArray(dataframe.iloc[10:12]))
+        assert array.current["date"] == dataframe.index[11]
+        assert array.current["close"] == dataframe.close.iloc[11]
+
+
+class TestViews():
+    def test_column_follows_cursor(self, dataframe):
+        array = FlexArray(dataframe, views=True)
+        close = array.close
+        array.set_cursor(10)
+        assert array.close is close
+        assert len(close) == 10
+        assert close[-1] == dataframe.close.iloc[9]
+        np.testing.assert_array_equal(close[-3:], dataframe.close[7:10])
+
+    def test_column_out_of_cursor(self, dataframe):
+        array = FlexArray(dataframe, views=True)
+        array.set_cursor(10)
+        with pytest.raises(IndexError):
+            array.close[10]
+        with pytest.raises(IndexError):
+            array.close[-11]
+
+    def test_column_numpy_interface(self, dataframe):
+        array = FlexArray(dataframe, views=True)
+        array.set_cursor(10)
+        assert np.mean(array.close) == dataframe.close[:10].mean()
+        np.testing.assert_array_equal(array.high - array.low,
+                                      (dataframe.high - dataframe.low)[:10])
+
+    def test_column_survives_growth(self, dataframe):
+        array = FlexArray(dataframe.iloc[:10], views=True)
+        close = array.close
+        array.append(FlexArray(dataframe.iloc[10:]))
+        assert close[-1] == dataframe.close.iloc[-1]
+
+    def test_index_column(self, dataframe):
+        array = FlexArray(dataframe, views=True)
+        assert array.date[-1] == dataframe.index.values[-1]
+
+    def test_slices_mode(self, dataframe):
+        array = FlexArray(dataframe)
+        array.set_cursor(10)
+        assert isinstance(array.close, np.ndarray)
+        assert len(array.close) == 10
+
+
+class TestCurrent():
+    def test_row_reused(self, dataframe):
+        array = FlexArray(dataframe)
+        assert array.current is array.current
+
+    def test_row_follows_cursor(self, dataframe):
+        array = FlexArray(dataframe)
+        row = array.current
+        array.set_cursor(10)
+        assert row["close"] == dataframe.close.iloc[9]
+        assert row.close == dataframe.close.iloc[9]
+        assert row["date"] == dataframe.index[9]
+        assert isinstance(row.get("date"), pd.Timestamp)
+
+    def test_cursor_bounds(self, dataframe):
+        array = FlexArray(dataframe.iloc[:10], capacity=20)
+        for cursor in (0, 11, -1):
+            with pytest.raises(IndexError):
+                array.set_cursor(cursor)
+        assert len(array) == 10
+        with pytest.raises(IndexError):
+            FlexArray(dataframe.iloc[:0]).current["close"]
+
+    def test_row_mapping(self, dataframe):
+        array = FlexArray(dataframe)
+        snapshot = dict(array.current)
+        assert set(snapshot) == {"date", *dataframe.columns}
+        assert "close" in array.current
+        assert array.current.get("foo") is None
+        with pytest.raises(AttributeError):
+            array.current.foo
+
+
+class TestStorage():
+    def test_columns_share_blocks(self, dataframe):
+        array = FlexArray(dataframe)
+        block = array._data["open"].base
+        assert block.ndim == 2
+        assert array._data["close"].base is block
+        assert array._data["volume"].base is not block
+        assert array.close.flags["C_CONTIGUOUS"]
+
+    def test_dtypes(self, dataframe):
+        dtypes = {"close": np.float32, "volume": np.int32}
+        array = FlexArray(dataframe, dtypes=dtypes)
+        assert array.close.dtype == np.float32
+        assert array.volume.dtype == np.int32
+        assert array.open.dtype == np.float64
+        array.append(FlexArray(dataframe))
+        assert array.close.dtype == np.float32
+
+    def test_nbytes(self, dataframe):
+        default = FlexArray(dataframe)
+        compact = FlexArray(dataframe, dtypes={
+            column: np.float32 for column in dataframe.columns})
+        index = dataframe.index.values.nbytes
+        assert compact.nbytes - index == (default.nbytes - index) / 2
+
+    def test_source_not_retained(self, dataframe):
+        array = FlexArray(dataframe)
+        assert array._frame is None
+        pd.testing.assert_frame_equal(array.dataframe, dataframe,
+                                      check_freq=False)
@@ -0,0 +1,150 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from mercury import Strategy, Timeframe, Timeseries
+from mercury.indicators import (ATR, EMA, MACD, MAX, MIN, RSI, SMA, STDDEV,
+                                STOCH, WMA, bbands, donchian, macd, stoch)
+
+
+@pytest.fixture
+def prices():
+    random = np.random.RandomState(42)
+    close = 1.1 + np.cumsum(random.normal(0, 0.001, 500))
+    spread = np.abs(random.normal(0, 0.0005, (2, 500)))
+    return {"high": close + spread[0], "low": close - spread[1],
+            "close": close}
+
+
+KERNELS = [SMA(10), EMA(10), WMA(10), RSI(14), ATR(14), STDDEV(5, 2),
+           MAX(10), MIN(10), MACD(12, 26), STOCH(5, 3)]
+
+
+@pytest.mark.parametrize("kernel", KERNELS, ids=lambda kernel: type(kernel)
+                         .__name__)
+def test_stream_matches_batch(kernel, prices):
+    values = [prices[column] for column in kernel.columns]
+    batch = kernel.batch(*values)
+    stream = kernel.clone()
+    streamed = [stream.update(*bar) for bar in zip(*values)]
+    np.testing.assert_allclose(streamed, batch, rtol=1e-9)
+    assert not np.isnan(batch[-1])
+
+
+class TestKernels():
+    def test_sma(self, prices):
+        expected = pd.Series(prices["close"]).rolling(10).mean()
+        np.testing.assert_allclose(SMA(10).batch(prices["close"]), expected)
+
+    def test_ema(self):
+        values = np.arange(1.0, 8.0)
+        ema = EMA(3).batch(values)
+        assert np.isnan(ema[:2]).all()
+        assert ema[2] == 2.0
+        assert ema[3] == pytest.approx(3.0)
+        np.testing.assert_allclose(ema[3:], values[3:] - 1)
+
+    def test_ema_long_series(self):
+        values = np.random.RandomState(0).normal(100, 1, 5000)
+        expected = [np.nan, np.nan, values[:3].mean()]
+        for value in values[3:]:
+            expected.append(expected[-1] + 0.5 * (value - expected[-1]))
+        np.testing.assert_allclose(EMA(3).batch(values), expected)
+
+    def test_wma(self):
+        values = np.array([1.0, 2.0, 3.0, 6.0])
+        np.testing.assert_allclose(WMA(3).batch(values),
+                                   [np.nan, np.nan, 14 / 6, 26 / 6])
+
+    def test_rsi(self):
+        values = np.array([1.0, 2.0, 1.5, 2.5, 2.5, 3.0])
+        rsi = RSI(2).batch(values)
+        assert rsi[2] == pytest.approx(100 * 0.5 / 0.75)
+        gain, loss = (0.5 + 1.0) / 2, (0.25 + 0.0) / 2
+        assert rsi[3] == pytest.approx(100 * gain / (gain + loss))
+        assert RSI(2).batch(np.ones(5))[-1] == 0
+
+    def test_leading_nan(self, prices):
+        values = prices["close"].copy()
+        values[:7] = np.nan
+        expected = np.concatenate(([np.nan] * 7,
+                                   SMA(5).batch(values[7:])))
+        np.testing.assert_allclose(SMA(5).batch(values), expected)
+        stream = SMA(5)
+        np.testing.assert_allclose([stream.update(value)
+                                    for value in values], expected)
+
+    def test_short_series(self):
+        for kernel in KERNELS:
+            values = [np.ones(3)] * len(kernel.columns)
+            assert np.isnan(kernel.batch(*values)).all()
+
+
+class IndicatorsStrategy(Strategy):
+    def setup(self):
+        self.add_indicator(RSI(14).indicator("rsi"))
+        for indicators in (bbands("bb", 20), macd("macd"), stoch("stoch"),
+                           donchian("channel", 10)):
+            for indicator in indicators:
+                self.add_indicator(indicator)
+
+    def tick(self):
+        pass
+
+
+@pytest.fixture
+def timeseries(prices):
+    dataframe = pd.DataFrame(prices, index=pd.date_range(
+        "2021-01-01", periods=500, freq="H", name="date"))
+    return Timeseries("EURUSD", Timeframe.H1, dataframe)
+
+
+class TestIndicators():
+    NAMES = ["rsi", "bb_middle", "bb_upper", "bb_lower", "macd",
+             "macd_signal", "macd_hist", "stoch_k", "stoch_d",
+             "channel_upper", "channel_lower", "channel_middle"]
+
+    def test_composites(self, timeseries, prices):
+        strategy = IndicatorsStrategy(None, timeseries)
+        close = prices["close"]
+        np.testing.assert_allclose(
+            strategy.bb_upper.data() - strategy.bb_middle.data(),
+            2 * STDDEV(20).batch(close))
+        line = MACD().batch(close)
+        np.testing.assert_allclose(strategy.macd_hist.data(),
+                                   line - EMA(9).batch(line))
+        np.testing.assert_allclose(strategy.stoch_d.data(),
+                                   SMA(3).batch(STOCH().batch(
+                                       prices["high"], prices["low"],
+                                       close)))
+        np.testing.assert_allclose(strategy.channel_middle.data(),
+                                   (MAX(10).batch(prices["high"]) +
+                                    MIN(10).batch(prices["low"])) / 2)
+
+    def test_precompute_matches_stream(self, timeseries):
+        expected = IndicatorsStrategy(None, timeseries)
+        strategy = IndicatorsStrategy(None, timeseries)
+        strategy.precompute()
+        for cursor in (100, 250, 500):
+            timeseries.set_cursor(cursor)
+            for name in self.NAMES:
+                np.testing.assert_allclose(
+                    getattr(strategy, name).data(),
+                    getattr(expected, name).data(), rtol=1e-9)
+
+
+@pytest.mark.parametrize("kernel", KERNELS, ids=lambda kernel: type(kernel)
+                         .__name__)
+def test_lookback(kernel, prices):
+    values = [prices[column] for column in kernel.columns]
+    assert np.isnan(kernel.batch(*values)).argmin() == kernel.lookback
+
+
+class TestLookback():
+    def test_strategy(self, timeseries):
+        strategy = IndicatorsStrategy(None, timeseries)
+        assert strategy.macd_signal.lookback == 25 + 8
+        assert strategy.bb_upper.lookback == 19
+        assert strategy.stoch_d.lookback == 4 + 2 + 2
+        assert strategy.lookback == 33
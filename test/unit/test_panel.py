@@ -0,0 +1,107 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from mercury import OrderAction, Panel, Strategy, Timeframe, Timeseries
+from mercury.backtest import Simulator
+
+
+@pytest.fixture
+def dataframe(dataset):
+    return pd.DataFrame(dataset).set_index("date")
+
+
+@pytest.fixture
+def panel(dataframe):
+    return Panel([
+        Timeseries("EURUSD", Timeframe.H1, dataframe),
+        Timeseries("GBPUSD", Timeframe.H1, dataframe.iloc[::2] * 2),
+    ])
+
+
+class TestPanel():
+    def test_shape(self, panel, dataframe):
+        assert panel.instruments == ["EURUSD", "GBPUSD"]
+        assert panel.close.shape == (2, len(dataframe))
+        assert len(panel) == len(dataframe)
+
+    def test_cross_section(self, panel, dataframe):
+        panel.set_cursor(11)
+        np.testing.assert_array_equal(
+            panel.close[:, -1], [dataframe.close.iloc[10],
+                                 dataframe.close.iloc[10] * 2])
+
+    def test_missing_bars(self, panel, dataframe):
+        panel.set_cursor(2)
+        assert np.isnan(panel.close[1, -1])
+        np.testing.assert_array_equal(panel.available[:, -1], [True, False])
+
+    def test_fill(self, dataframe):
+        panel = Panel([
+            Timeseries("EURUSD", Timeframe.H1, dataframe),
+            Timeseries("GBPUSD", Timeframe.H1, dataframe.iloc[::2]),
+        ], fill=True)
+        panel.set_cursor(2)
+        assert panel.close[1, -1] == dataframe.close.iloc[0]
+        assert panel.volume[1, -1] == 0
+
+    def test_current(self, panel, dataframe):
+        panel.set_cursor(3)
+        assert panel.current["date"] == dataframe.index[2]
+        assert panel.current["close"][0] == dataframe.close.iloc[2]
+
+    def test_cursor_lower_bound(self, panel):
+        panel.set_cursor(1)
+        with pytest.raises(IndexError):
+            panel.set_cursor(0)
+
+    def test_cursor_upper_bound(self, panel, dataframe):
+        panel.set_cursor(len(dataframe))
+        with pytest.raises(IndexError):
+            panel.set_cursor(len(dataframe) + 1)
+
+    def test_timeframes_mismatch(self, dataframe):
+        with pytest.raises(ValueError):
+            Panel([Timeseries("EURUSD", Timeframe.H1, dataframe),
+                   Timeseries("GBPUSD", Timeframe.H4, dataframe)])
+
+
+class TestSimulator():
+    def test_run(self, panel, datastore, dataframe):
+        closes = []
+
+        class Recorder(Strategy):
+            def setup(self):
+                pass
+
+            def tick(self):
+                closes.append(self.timeseries.close[:, -1].copy())
+
+        simulator = Simulator(Recorder, datastore=datastore,
+                              timeseries=panel, warmup=1)
+        simulator.run()
+        assert len(closes) == len(dataframe)
+        assert closes[-1][0] == dataframe.close.iloc[-1]
+        assert closes[0][0] == dataframe.close.iloc[0]
+        assert np.isnan(closes[1][1])
+        assert closes[2][1] == dataframe.close.iloc[2] * 2
+
+    def test_broker(self, panel, datastore, dataframe):
+        class Trader(Strategy):
+            def setup(self):
+                pass
+
+            def tick(self):
+                if len(self.timeseries) == 3:
+                    for instrument in ("EURUSD", "GBPUSD"):
+                        self.broker._api_submit_order(
+                            OrderAction.BUY, 1, instrument=instrument)
+
+        simulator = Simulator(Trader, datastore=datastore, timeseries=panel,
+                              warmup=1)
+        positions = simulator.run().broker.positions
+        assert [position.open_price for position in positions] == [
+            dataframe.close.iloc[2], dataframe.close.iloc[2] * 2]
+        assert [position.open_date for position in positions] == [
+            dataframe.index[2]] * 2
@@ -0,0 +1,338 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from mercury import Indicator, Parameter, Strategy, Timeframe, Timeseries
+from mercury.indicators import SMA
+
+
+def mean(timeperiod):
+    def stream():
+        window = []
+
+        def update(row):
+            update.calls += 1
+            window.append(row["close"])
+            if len(window) < timeperiod:
+                return float("NaN")
+            return np.mean(window[-timeperiod:])
+
+        update.calls = 0
+        streams.append(update)
+        return update
+
+    streams = []
+    stream.streams = streams
+    return stream
+
+
+class RunningSum():
+    calls = 0
+
+    def __init__(self):
+        self.total = 0.0
+
+    def __call__(self, row):
+        RunningSum.calls += 1
+        self.total += row["close"]
+        return self.total
+
+
+def batch_mean(timeperiod):
+    return lambda timeseries: (pd.Series(timeseries.close)
+                               .rolling(timeperiod).mean().values)
+
+
+class DummyStrategy(Strategy):
+    def setup(self):
+        self.add_indicator(Indicator("mean", stream=mean(5)))
+        self.add_indicator(Indicator("batch", batch_mean(5)))
+
+    def tick(self):
+        pass
+
+
+@pytest.fixture
+def timeseries(dataset):
+    return Timeseries("EURUSD", Timeframe.H1,
+                      pd.DataFrame(dataset).set_index("date"))
+
+
+class TestIndicator():
+    def test_requires_function(self):
+        with pytest.raises(ValueError):
+            Indicator("foo")
+
+    def test_stream_matches_batch(self, timeseries):
+        strategy = DummyStrategy(None, timeseries)
+        for cursor in range(1, len(timeseries) + 1):
+            timeseries.set_cursor(cursor)
+            np.testing.assert_allclose(strategy.mean.data(),
+                                       strategy.batch.data())
+
+    def test_stream_updates_once_per_bar(self, timeseries):
+        indicator = Indicator("mean", stream=mean(5))
+        for cursor in range(1, 21):
+            timeseries.set_cursor(cursor)
+            indicator.apply(timeseries)
+            indicator.apply(timeseries)
+        assert indicator._update.calls == 20
+        assert len(indicator.data()) == 20
+
+    def test_catch_up_and_backward_cursor(self, timeseries):
+        indicator = Indicator("mean", stream=mean(5))
+        timeseries.set_cursor(30)
+        indicator.apply(timeseries)
+        assert len(timeseries) == 30
+        assert float(indicator) == pytest.approx(timeseries.close[-5:].mean())
+        timeseries.set_cursor(10)
+        indicator.apply(timeseries)
+        assert float(indicator) == pytest.approx(timeseries.close[-5:].mean())
+        assert indicator._update.calls == 30
+
+    def test_history_rewrite(self, timeseries, dataset):
+        stream = mean(5)
+        indicator = Indicator("mean", stream=stream)
+        indicator.apply(timeseries)
+        dataset["close"] = dataset["close"] * 2
+        timeseries.dataframe = pd.DataFrame(dataset).set_index("date")
+        indicator.apply(timeseries)
+        assert len(stream.streams) == 2
+        assert float(indicator) == pytest.approx(timeseries.close[-5:].mean())
+
+    def test_resampled_open_bar(self, dataset):
+        dataframe = pd.DataFrame(dataset).set_index("date")
+        source = Timeseries("EURUSD", Timeframe.H1, dataframe.iloc[:1])
+        hours = source.resample(Timeframe.H4, incremental=True)
+        windows = []
+
+        def last(timeseries):
+            windows.append(len(timeseries))
+            return timeseries.close
+
+        RunningSum.calls = 0
+        indicators = [Indicator("total", stream=RunningSum),
+                      Indicator("last", last, window=2),
+                      SMA(2).indicator("sma"),
+                      Indicator("mean", stream=mean(5))]
+        for i in range(1, len(dataframe) + 1):
+            for indicator in indicators:
+                indicator.apply(hours)
+            source.append(Timeseries("EURUSD", Timeframe.H1,
+                                     dataframe.iloc[i:i + 1]))
+
+        # one evaluation per source row, the open bar only is recomputed
+        assert RunningSum.calls == len(windows) == len(dataframe)
+        expected = source.resample(Timeframe.H4).close
+        total, last, sma, closure = (float(indicator)
+                                     for indicator in indicators)
+        assert total == pytest.approx(expected.sum())
+        assert last == expected[-1]
+        assert sma == pytest.approx(expected[-2:].mean())
+        # closures cannot be rewound, they are started over
+        assert closure == pytest.approx(expected[-5:].mean())
+
+    def test_unknown_attribute(self, timeseries):
+        strategy = DummyStrategy(None, timeseries)
+        with pytest.raises(AttributeError):
+            strategy.foo
+
+
+class TestPrecompute():
+    def test_bounded_by_cursor(self, timeseries):
+        strategy = DummyStrategy(None, timeseries)
+        strategy.precompute()
+        assert "mean" in vars(strategy)
+        timeseries.set_cursor(10)
+        assert len(strategy.mean.data()) == 10
+        assert strategy.mean[-1] == strategy.mean.data()[9]
+        assert np.isnan(strategy.mean.previous(6))
+        with pytest.raises(IndexError):
+            strategy.batch[10]
+
+    def test_matches_incremental(self, timeseries):
+        expected = DummyStrategy(None, timeseries)
+        strategy = DummyStrategy(None, timeseries)
+        strategy.precompute()
+        for cursor in range(1, len(timeseries) + 1):
+            timeseries.set_cursor(cursor)
+            for name in ("mean", "batch"):
+                np.testing.assert_allclose(getattr(strategy, name).data(),
+                                           getattr(expected, name).data())
+                assert (float(getattr(strategy, name)) ==
+                        pytest.approx(float(getattr(expected, name)),
+                                      nan_ok=True))
+
+    def test_appended_bars(self, timeseries, dataset):
+        indicator = Indicator("mean", stream=mean(5))
+        timeseries.set_cursor(40)
+        indicator.precompute(timeseries)
+        timeseries.set_cursor(50)
+        indicator.apply(timeseries)
+        assert len(indicator.data()) == 50
+        assert float(indicator) == pytest.approx(timeseries.close[-5:].mean())
+
+
+def ema(timeperiod, key="close"):
+    alpha = 2 / (timeperiod + 1)
+
+    def stream():
+        state = {}
+
+        def update(row, *inputs):
+            value = inputs[0] if inputs else row[key]
+            state["ema"] = (value if "ema" not in state else
+                            alpha * value + (1 - alpha) * state["ema"])
+            return state["ema"]
+
+        return update
+
+    return stream
+
+
+class MacdStrategy(Strategy):
+    def setup(self):
+        self.add_indicator(Indicator("fast", stream=ema(12)))
+        self.add_indicator(Indicator("slow", stream=ema(26)))
+        self.add_indicator(Indicator(
+            "macd", inputs=["fast", "slow"],
+            stream=lambda: lambda row, fast, slow: fast - slow))
+        self.add_indicator(Indicator("signal", stream=ema(9),
+                                     inputs=["macd"]))
+        self.add_indicator(Indicator(
+            "histogram", lambda timeseries, macd, signal: macd - signal,
+            inputs=["macd", "signal"]))
+
+    def tick(self):
+        pass
+
+
+class TestGraph():
+    def test_values(self, timeseries):
+        strategy = MacdStrategy(None, timeseries)
+        close = pd.Series(timeseries.close)
+        macd = (close.ewm(span=12, adjust=False).mean() -
+                close.ewm(span=26, adjust=False).mean())
+        signal = macd.ewm(span=9, adjust=False).mean()
+        np.testing.assert_allclose(strategy.macd.data(), macd)
+        np.testing.assert_allclose(strategy.histogram.data(), macd - signal)
+
+    def test_evaluated_once_per_cursor(self, timeseries):
+        strategy = MacdStrategy(None, timeseries)
+        for cursor in range(1, 11):
+            timeseries.set_cursor(cursor)
+            for _ in range(3):
+                strategy.histogram
+                strategy.signal
+        info = strategy.cache_info()
+        assert info["fast"]["misses"] == 10
+        assert info["macd"]["misses"] == 10
+        assert info["histogram"] == {"hits": 20, "misses": 10}
+
+    def test_precompute(self, timeseries):
+        expected = MacdStrategy(None, timeseries)
+        strategy = MacdStrategy(None, timeseries)
+        strategy.precompute()
+        timeseries.set_cursor(20)
+        np.testing.assert_allclose(strategy.histogram.data(),
+                                   expected.histogram.data())
+
+    def test_unknown_input(self, timeseries):
+        strategy = DummyStrategy(None, timeseries)
+        with pytest.raises(KeyError):
+            strategy.add_indicator(Indicator("foo", stream=ema(5),
+                                             inputs=["bar"]))
+
+
+class ParamStrategy(Strategy):
+    fast = Parameter(10, values=[2, 3])
+    slow = Parameter(30)
+
+    def setup(self):
+        self.add_indicator(SMA(self.fast).indicator("fast_sma"))
+        self.add_indicator(SMA(self.slow).indicator("slow_sma"))
+
+    def tick(self):
+        pass
+
+
+class ChildStrategy(ParamStrategy):
+    factor = Parameter(1)
+
+
+class TestParameters():
+    def test_defaults(self, timeseries):
+        strategy = ParamStrategy(None, timeseries, slow=20)
+        assert strategy.fast == 10
+        assert strategy.slow == 20
+        assert strategy.params == {"fast": 10, "slow": 20}
+        assert ParamStrategy.fast.default == 10
+        assert ParamStrategy(None, timeseries).slow == 30
+
+    def test_inheritance(self, timeseries):
+        assert list(ChildStrategy.parameters()) == ["fast", "slow", "factor"]
+        assert ChildStrategy(None, timeseries, factor=2).params["factor"] == 2
+
+    def test_unknown(self, timeseries):
+        with pytest.raises(TypeError):
+            ParamStrategy(None, timeseries, foo=1)
+
+    def test_shared_precompute(self, timeseries):
+        cache = {}
+        first = ParamStrategy(None, timeseries, fast=5, slow=20)
+        second = ParamStrategy(None, timeseries, fast=20, slow=5)
+        first.precompute(cache)
+        second.precompute(cache)
+        assert len(cache) == 2
+        assert second.cache_info()["fast_sma"] == {"hits": 1, "misses": 0}
+        assert np.shares_memory(second.fast_sma.values,
+                                first.slow_sma.values)
+
+
+class TestLookback():
+    def test_detected(self, timeseries):
+        strategy = DummyStrategy(None, timeseries)
+        assert strategy.lookback is None
+        strategy.batch
+        assert strategy._indicators["batch"].lookback == 4
+
+    def test_declared(self, timeseries):
+        strategy = ParamStrategy(None, timeseries, fast=5, slow=20)
+        assert strategy.lookback == 19
+        indicator = Indicator("spread", inputs=["slow_sma"], lookback=2,
+                              stream=lambda: lambda row, sma: sma)
+        strategy.add_indicator(indicator)
+        assert strategy.lookback == 21
+
+
+class TestWindow():
+    def test_trailing_slices(self, timeseries):
+        lengths = []
+
+        def mean(window):
+            lengths.append(len(window))
+            return np.full(len(window), window.close.mean())
+
+        indicator = Indicator("mean", mean, window=5)
+        for cursor in range(1, 51):
+            timeseries.set_cursor(cursor)
+            indicator.apply(timeseries)
+        assert lengths == [1, 2, 3, 4] + [5] * 46
+        expected = pd.Series(timeseries.close).rolling(5, 1).mean()
+        np.testing.assert_allclose(indicator.data(), expected)
+
+    def test_zero_copy(self, timeseries):
+        windows = []
+        indicator = Indicator("close", lambda window: windows.append(
+            window) or window.close, window=3)
+        indicator.apply(timeseries)
+        assert np.shares_memory(windows[-1].close, timeseries.close)
+        assert windows[-1].instrument == "EURUSD"
+
+    def test_precompute(self, timeseries):
+        indicator = Indicator("sum", lambda window: window.close.cumsum(),
+                              window=4)
+        indicator.precompute(timeseries)
+        expected = pd.Series(timeseries.close).rolling(4, 1).sum()
+        np.testing.assert_allclose(indicator.data(), expected)
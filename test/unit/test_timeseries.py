@@ -0,0 +1,169 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from mercury import Timeframe, Timeseries
+from mercury.core.timeseries import COMPACT_DTYPES
+from mercury.indicators import SMA
+
+
+@pytest.fixture
+def timeseries(dataset):
+    dataframe = pd.DataFrame(dataset).set_index("date")
+    return Timeseries("EURUSD", Timeframe.H1, dataframe)
+
+
+class TestFile():
+    def test_roundtrip(self, timeseries, tmp_path):
+        path = str(tmp_path / "eurusd.bin")
+        timeseries.to_file(path)
+        loaded = Timeseries.from_file(path)
+        assert loaded.instrument == "EURUSD"
+        assert loaded.timeframe is Timeframe.H1
+        assert isinstance(loaded.close, np.memmap)
+        pd.testing.assert_frame_equal(loaded.data, timeseries.data)
+
+    def test_cursor(self, timeseries, tmp_path):
+        path = str(tmp_path / "eurusd.bin")
+        timeseries.to_file(path)
+        loaded = Timeseries.from_file(path)
+        loaded.set_cursor(10)
+        np.testing.assert_array_equal(loaded.close, timeseries.close[:10])
+        assert loaded.current["date"] == timeseries.data.index[9]
+
+    def test_compact(self, timeseries, tmp_path):
+        path = str(tmp_path / "eurusd.bin")
+        timeseries.to_file(path, dtypes=COMPACT_DTYPES)
+        loaded = Timeseries.from_file(path)
+        assert loaded.close.dtype == np.float32
+        assert loaded.volume.dtype == np.int32
+
+    def test_append(self, timeseries, tmp_path):
+        path = str(tmp_path / "eurusd.bin")
+        timeseries.to_file(path)
+        loaded = Timeseries.from_file(path)
+        loaded.append(timeseries)
+        assert len(loaded) == 2 * len(timeseries)
+        assert not isinstance(loaded.close, np.memmap)
+
+    def test_invalid_file(self, tmp_path):
+        path = tmp_path / "invalid.bin"
+        path.write_bytes(b"foo")
+        with pytest.raises(ValueError):
+            Timeseries.from_file(str(path))
+
+
+class TestResample():
+    @pytest.mark.parametrize("timeframe, rule", [
+        (Timeframe.H4, "4H"),
+        (Timeframe.D1, "D"),
+        (Timeframe.W1, "W-MON"),
+        (Timeframe.MN, "MS"),
+    ])
+    def test_batch(self, timeseries, timeframe, rule):
+        resampled = timeseries.resample(timeframe)
+        expected = timeseries.data.resample(
+            rule, label="left", closed="left").agg({
+                "open": "first", "high": "max", "low": "min",
+                "close": "last", "adj_close": "last", "volume": "sum",
+            }).dropna()
+        assert resampled.timeframe is timeframe
+        np.testing.assert_array_equal(resampled.close, expected.close)
+        np.testing.assert_array_equal(resampled.high, expected.high)
+        np.testing.assert_array_equal(resampled.volume, expected.volume)
+
+    def test_lower_timeframe(self, timeseries):
+        with pytest.raises(ValueError):
+            timeseries.resample(Timeframe.M1)
+
+    def test_incremental(self, dataset):
+        dataframe = pd.DataFrame(dataset).set_index("date")
+        source = Timeseries("EURUSD", Timeframe.H1, dataframe.iloc[:5])
+        resampled = source.resample(Timeframe.H4, incremental=True)
+        for i in range(5, len(dataframe)):
+            source.append(Timeseries("EURUSD", Timeframe.H1,
+                                     dataframe.iloc[i:i + 1]))
+        expected = source.resample(Timeframe.H4)
+        pd.testing.assert_frame_equal(resampled.data, expected.data)
+
+    def test_incremental_chained(self, dataset):
+        dataframe = pd.DataFrame(dataset).set_index("date")
+        source = Timeseries("EURUSD", Timeframe.H1, dataframe.iloc[:5])
+        hours = source.resample(Timeframe.H4, incremental=True)
+        days = hours.resample(Timeframe.D1, incremental=True)
+        sma = SMA(2).indicator("sma")
+        values = []
+        for i in range(5, len(dataframe)):
+            source.append(Timeseries("EURUSD", Timeframe.H1,
+                                     dataframe.iloc[i:i + 1]))
+            sma.apply(hours)
+            values.append(float(sma))
+            expected = source.resample(Timeframe.H4)
+            assert values[-1] == pytest.approx(expected.close[-2:].mean())
+        pd.testing.assert_frame_equal(
+            days.data, source.resample(Timeframe.D1).data)
+
+
+class TestTimeIndexing():
+    def test_between(self, timeseries):
+        index = timeseries.data.index
+        view = timeseries.between(index[5], index[9])
+        assert len(view) == 5
+        np.testing.assert_array_equal(view.close, timeseries.close[5:10])
+        assert view.instrument == timeseries.instrument
+
+    def test_between_zero_copy(self, timeseries):
+        index = timeseries.data.index
+        view = timeseries.between(index[5], index[9])
+        assert np.shares_memory(view.close, timeseries.close)
+
+    def test_between_open_bounds(self, timeseries):
+        index = timeseries.data.index
+        assert len(timeseries.between(end=index[4])) == 5
+        assert len(timeseries.between(start=index[45])) == 5
+
+    def test_between_respects_cursor(self, timeseries):
+        index = timeseries.data.index
+        timeseries.set_cursor(10)
+        assert len(timeseries.between(index[5], index[20])) == 5
+
+    def test_at(self, timeseries):
+        index = timeseries.data.index
+        row = timeseries.at(index[7])
+        assert row["close"] == timeseries.close[7]
+        assert row["date"] == index[7]
+        with pytest.raises(KeyError):
+            timeseries.at(index[7] + pd.Timedelta(minutes=1))
+
+    def test_view_append_does_not_leak(self, timeseries):
+        view = timeseries.view(0, 5)
+        view.append(timeseries.view(10, 11))
+        assert view.close[-1] == timeseries.close[10]
+        assert timeseries.close[5] != timeseries.close[10]
+
+
+class TestFromArrays():
+    def test_build(self, dataset):
+        timeseries = Timeseries.from_arrays("EURUSD", Timeframe.H1, dataset)
+        assert len(timeseries) == 50
+        np.testing.assert_array_equal(timeseries.close, dataset["close"])
+        assert timeseries.current["date"] == dataset["date"][-1]
+        assert timeseries._frame is None
+
+    def test_lazy_dataframe(self, dataset):
+        timeseries = Timeseries.from_arrays("EURUSD", Timeframe.H1, dataset)
+        expected = pd.DataFrame(dataset).set_index("date")
+        pd.testing.assert_frame_equal(timeseries.data, expected)
+        assert timeseries.data is timeseries.dataframe
+
+    def test_no_copy(self, dataset):
+        dataset["date"] = np.array(dataset["date"], dtype="datetime64[ns]")
+        timeseries = Timeseries.from_arrays("EURUSD", Timeframe.H1, dataset,
+                                            copy=False)
+        assert timeseries._data["close"] is dataset["close"]
+
+    def test_missing_index(self, dataset):
+        del dataset["date"]
+        with pytest.raises(KeyError):
+            Timeseries.from_arrays("EURUSD", Timeframe.H1, dataset)